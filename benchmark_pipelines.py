@@ -0,0 +1,207 @@
+"""
+Time the ingestion and logo pipelines end to end against the in-memory Supabase stand-in
+
+Usage:
+    python benchmark_pipelines.py --latency-ms 40 --members 500 --logos 20
+    python benchmark_pipelines.py --pipelines populate --modes batched async
+
+No network is needed: SUPABASE_BACKEND is forced to 'memory', Firecrawl
+scraping is replaced by the local mapping file, and downloads copy files
+from downloaded_logos/. Injected latency makes every request cost roughly
+what a round trip to a real project does.
+"""
+import os
+import sys
+import csv
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent
+
+PIPELINES = ["populate", "upload_mapped", "fetch_and_upload", "logo_pipeline"]
+POPULATE_MODES = ["serial", "batched", "async", "rpc"]
+
+
+def configure_backend(latency_ms, jitter_ms):
+    """Select the in-memory backend before any script module creates its client"""
+    os.environ["SUPABASE_BACKEND"] = "memory"
+    os.environ["SUPABASE_MEMORY_LATENCY_MS"] = str(latency_ms)
+    os.environ["SUPABASE_MEMORY_JITTER_MS"] = str(jitter_ms)
+    # The logo scripts build a FirecrawlApp at import time, which refuses an empty key
+    os.environ.setdefault("FIRECRAWL_API_KEY", "fc-offline-benchmark")
+
+
+@contextlib.contextmanager
+def quiet(verbose):
+    """Silence the scripts' progress output unless --verbose"""
+    if verbose:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+@contextlib.contextmanager
+def logo_workspace(limit):
+    """Temporary working directory holding the first `limit` mapped logos and their mapping file"""
+    with open(REPO_DIR / "logo_company_mapping.csv", "r", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        mappings = [m for m in reader if m["company_name"].strip()][:limit]
+
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        shutil.copytree(REPO_DIR / "downloaded_logos", Path(workdir) / "downloaded_logos")
+        with open(Path(workdir) / "logo_company_mapping.csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(mappings)
+        os.chdir(workdir)
+        try:
+            yield mappings
+        finally:
+            os.chdir(previous)
+
+
+def seed_members(db, populate_members):
+    """Load the HIMAP companies straight into the stand-in, without latency"""
+    db.insert("bpos", [populate_members.create_mock_data(company) for company in populate_members.companies])
+
+
+def bench_populate(db, members, modes, chunk_size, concurrency, verbose):
+    import populate_members
+
+    results = []
+    for mode in modes:
+        db.reset()
+        started = time.perf_counter()
+        with quiet(verbose):
+            if mode == "batched":
+                populate_members.populate_database_batched(members, chunk_size)
+            elif mode == "async":
+                asyncio.run(populate_members.populate_database_async(members, concurrency))
+            elif mode == "rpc":
+                populate_members.populate_database_rpc(members, chunk_size)
+            else:
+                populate_members.populate_database(members)
+        elapsed = time.perf_counter() - started
+        results.append((f"populate --mode {mode}", elapsed, db.requests, len(db.rows("bpos"))))
+    return results
+
+
+def bench_upload_mapped(db, logos, verbose):
+    import populate_members
+    import upload_mapped_logos
+
+    db.reset()
+    seed_members(db, populate_members)
+    db.requests = 0
+    with logo_workspace(logos):
+        started = time.perf_counter()
+        with quiet(verbose):
+            upload_mapped_logos.main()
+        elapsed = time.perf_counter() - started
+    return [("upload_mapped_logos", elapsed, db.requests, len(db.rows("bpo_media")))]
+
+
+def bench_fetch_and_upload(db, logos, verbose):
+    import populate_members
+    import fetch_and_upload_logos
+
+    db.reset()
+    seed_members(db, populate_members)
+    db.requests = 0
+    with logo_workspace(logos) as mappings:
+        # Stand-ins for the Firecrawl scrape and the HTTP download
+        images = [(m["company_name"].strip(), m["logo_file"]) for m in mappings]
+
+        def scrape_local():
+            return True, images
+
+        def copy_local(url, filename, cache=None):
+            shutil.copyfile(Path("downloaded_logos") / url, filename)
+            return True
+
+        original_scrape = fetch_and_upload_logos.scrape_himap_logos
+        original_download = fetch_and_upload_logos.download_image
+        fetch_and_upload_logos.scrape_himap_logos = scrape_local
+        fetch_and_upload_logos.download_image = copy_local
+        try:
+            started = time.perf_counter()
+            with quiet(verbose):
+                fetch_and_upload_logos.main()
+            elapsed = time.perf_counter() - started
+        finally:
+            fetch_and_upload_logos.scrape_himap_logos = original_scrape
+            fetch_and_upload_logos.download_image = original_download
+    return [("fetch_and_upload_logos", elapsed, db.requests, len(db.rows("bpo_media")))]
+
+
+def bench_logo_pipeline(db, logos, verbose):
+    import populate_members
+    import logo_pipeline
+
+    db.reset()
+    seed_members(db, populate_members)
+    results = []
+    with logo_workspace(logos):
+        # A cold build, then a rerun with nothing changed
+        for label in ("cold", "rerun"):
+            db.requests = 0
+            started = time.perf_counter()
+            with quiet(verbose):
+                logo_pipeline.LogoPipeline("mapping").run()
+            elapsed = time.perf_counter() - started
+            results.append((f"logo_pipeline ({label})", elapsed, db.requests, len(db.rows("bpo_media"))))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Supabase pipelines against the in-memory stand-in")
+    parser.add_argument("--latency-ms", type=float, default=40, help="Injected latency per request (default: 40)")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Random +/- jitter per request (default: 0)")
+    parser.add_argument("--members", type=int, default=200, help="Synthetic members for populate (default: 200)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic members (default: 0)")
+    parser.add_argument("--logos", type=int, default=20, help="Mapped logos for the logo pipelines (default: 20)")
+    parser.add_argument("--pipelines", nargs="+", choices=PIPELINES, default=PIPELINES)
+    parser.add_argument("--modes", nargs="+", choices=POPULATE_MODES, default=POPULATE_MODES)
+    parser.add_argument("--chunk-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--verbose", action="store_true", help="Show the scripts' own output")
+    args = parser.parse_args()
+
+    configure_backend(args.latency_ms, args.jitter_ms)
+    sys.path.insert(0, str(REPO_DIR))
+
+    from supabase_backend import default_database
+    from generate_synthetic_members import generate_members
+
+    print("=" * 80)
+    print(f"Pipeline benchmark - in-memory backend, {args.latency_ms:g}ms ± {args.jitter_ms:g}ms per request")
+    print("=" * 80)
+
+    results = []
+    if "populate" in args.pipelines:
+        members = list(generate_members(args.members, args.seed))
+        results += bench_populate(default_database, members, args.modes, args.chunk_size, args.concurrency, args.verbose)
+    if "upload_mapped" in args.pipelines:
+        results += bench_upload_mapped(default_database, args.logos, args.verbose)
+    if "fetch_and_upload" in args.pipelines:
+        results += bench_fetch_and_upload(default_database, args.logos, args.verbose)
+    if "logo_pipeline" in args.pipelines:
+        results += bench_logo_pipeline(default_database, args.logos, args.verbose)
+
+    print(f"\n{'Pipeline':<30} {'Seconds':>9} {'Requests':>9} {'Rows':>7} {'Rows/s':>9}")
+    print("-" * 68)
+    for name, elapsed, requests_made, rows in results:
+        rate = rows / elapsed if elapsed else 0.0
+        print(f"{name:<30} {elapsed:>9.2f} {requests_made:>9} {rows:>7} {rate:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Set-based writes to bpo_media
+
+Usage:
+    from bpo_media import media_row, upsert_media
+    rows = [media_row(bpo_id, 'logo', url), media_row(bpo_id, 'logo_256w_webp', url2)]
+    upsert_media(supabase, rows)
+
+upsert_media() sends every row in one INSERT ... ON CONFLICT (bpo_id,
+logo_media_type, is_primary) DO UPDATE request (chunked only for very
+large batches), relying on migrations/add_bpo_media_unique_key.sql, which
+keys logo media types only (logo_media_type is NULL for photos). Concurrent
+runs converge on the last write instead of racing a SELECT against an
+INSERT.
+"""
+
+# Unique key added by migrations/add_bpo_media_unique_key.sql
+MEDIA_CONFLICT_KEY = "bpo_id,logo_media_type,is_primary"
+
+# Rows per upsert request; one request covers every HIMAP logo and its derivatives
+MEDIA_CHUNK_SIZE = 1000
+
+
+def media_row(bpo_id, media_type, file_url, is_primary=True, display_order=1):
+    """One bpo_media row"""
+    return {
+        'bpo_id': bpo_id,
+        'media_type': media_type,
+        'file_url': file_url,
+        'is_primary': is_primary,
+        'display_order': display_order,
+    }
+
+
+def conflict_key(row, index=None):
+    """The row's key in the unique index; rows that are not logos have none (index keeps them apart)"""
+    if row['media_type'].startswith('logo'):
+        return (row['bpo_id'], row['media_type'], row['is_primary'])
+    return ('row', index)
+
+
+def dedupe(rows):
+    """Last row per conflict key; Postgres rejects an upsert that touches a row twice"""
+    latest = {}
+    for index, row in enumerate(rows):
+        latest[conflict_key(row, index)] = row
+    return list(latest.values())
+
+
+def upsert_media(client, rows, chunk_size=MEDIA_CHUNK_SIZE):
+    """Insert or update bpo_media rows in as few requests as possible; returns the written rows"""
+    rows = dedupe(rows)
+    written = []
+    for start in range(0, len(rows), chunk_size):
+        response = client.table('bpo_media').upsert(
+            rows[start:start + chunk_size],
+            on_conflict=MEDIA_CONFLICT_KEY
+        ).execute()
+        written.extend(response.data)
+    return written
@@ -4,16 +4,34 @@ Scrape brand data from a website using Firecrawl API.
 
 Usage:
     python scrape_brand_data.py <url> [--output-dir <dir>]
+    python scrape_brand_data.py --urls-file <file> [--workers <n>] [--output-dir <dir>]
 
 Example:
     python scrape_brand_data.py https://firecrawl.dev --output-dir ./brand_data
+    python scrape_brand_data.py --urls-file member_sites.txt --output-dir ./brand_data
+
+Batch mode reads one URL per line (blank lines and # comments are skipped,
+"-" reads stdin). It submits every URL to Firecrawl's /v2/batch/scrape
+endpoint and polls the job; when the API has no batch endpoint, or a URL
+is missing from the job's results, it is scraped on its own. Results are
+saved and images downloaded by a pool of --workers threads sharing one
+HTTP session. brand_manifest.json in the output directory lists every
+site with its files, branding and any error.
+
+Set FIRECRAWL_API_URL (or --api-url) to send requests somewhere other than
+https://api.firecrawl.dev, e.g. a local caching stand-in that replays
+recorded responses (scrape_cache.py serve in the repository root).
 """
 
 import os
+import re
 import sys
 import json
+import time
 import argparse
 import requests
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from urllib.parse import urlparse
 from dotenv import load_dotenv
@@ -21,89 +39,241 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+# Hard cap per downloaded asset, matching the bpo-assets bucket's file_size_limit (create_bucket.py)
+MAX_DOWNLOAD_BYTES = 5 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = 30
+
+DEFAULT_API_URL = "https://api.firecrawl.dev"
+
+SCRAPE_FORMATS = ["branding", "screenshot", "images", "markdown"]
+
+# A full-page scrape with screenshots can take a while
+SCRAPE_TIMEOUT = 120
+
+# Batch mode: concurrent scrapes/downloads, and how the batch job is polled
+DEFAULT_WORKERS = 8
+BATCH_POLL_INTERVAL = 2
+BATCH_TIMEOUT = 900
+
+MANIFEST_FILE = "brand_manifest.json"
+
+# Bytes read before deciding what kind of file is arriving
+SNIFF_BYTES = 512
+
+# Leading bytes -> file extension for the image types we keep
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+    (b"\x00\x00\x01\x00", ".ico"),
+]
 
-def scrape_brand_data(url, api_key, output_dir="."):
+
+def sniff_image_type(head):
     """
-    Scrape brand data from a URL using Firecrawl API.
+    Identify an image from its first bytes.
+    
+    Returns:
+        str: File extension for the image type, or None if it is not an image
+    """
+    for signature, ext in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if text.startswith(b"<svg") or (text.startswith(b"<?xml") and b"<svg" in text):
+        return ".svg"
+    return None
+
+
+class ScrapeError(Exception):
+    """A scrape the Firecrawl API rejected or could not finish"""
+
+
+def download_image(url, output_path, stem, max_bytes=MAX_DOWNLOAD_BYTES, session=None):
+    """
+    Stream an image to disk in chunks, aborting once it is too large or not an image.
     
     Args:
-        url: The URL to scrape
-        api_key: Firecrawl API key
-        output_dir: Directory to save output files
+        url: Image URL
+        output_path: Directory to save into
+        stem: File name without extension; the extension comes from the sniffed type
+        max_bytes: Largest body accepted
+        session: requests.Session to reuse connections (default: a one-off request)
         
     Returns:
-        dict: The scraped brand data
+        Path: The saved file
     """
-    # Create output directory
-    output_path = Path(output_dir)
-    output_path.mkdir(parents=True, exist_ok=True)
-    
-    # Prepare API request
-    api_url = "https://api.firecrawl.dev/v2/scrape"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    
-    payload = {
-        "url": url,
-        "formats": ["branding", "screenshot", "images", "markdown"]
-    }
-    
-    print(f"Scraping brand data from: {url}")
+    with (session or requests).get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        response.raise_for_status()
+        
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            raise ValueError(f"{declared} bytes exceeds the {max_bytes} byte limit")
+        
+        part_file = output_path / f"{stem}.part"
+        head = b""
+        ext = None
+        size = 0
+        try:
+            with open(part_file, "wb") as f:
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    if ext is None:
+                        head += chunk[:SNIFF_BYTES - len(head)]
+                        if len(head) >= SNIFF_BYTES:
+                            ext = sniff_image_type(head)
+                            if ext is None:
+                                raise ValueError("response is not an image")
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ValueError(f"body exceeds the {max_bytes} byte limit")
+                    f.write(chunk)
+            ext = ext or sniff_image_type(head)
+            if ext is None:
+                raise ValueError("response is not an image")
+            image_file = output_path / f"{stem}{ext}"
+            part_file.replace(image_file)
+            return image_file
+        finally:
+            if part_file.exists():
+                part_file.unlink()
+
+
+def log(message):
+    """Print a whole line in one write, so lines from worker threads do not interleave"""
+    sys.stdout.write(f"{message}\n")
+    sys.stdout.flush()
+
+
+def api_base_url(api_base=None):
+    return (api_base or os.getenv("FIRECRAWL_API_URL") or DEFAULT_API_URL).rstrip("/")
+
+
+def api_headers(api_key):
+    """Headers for Firecrawl API calls only; image downloads never see the key"""
+    headers = {"Content-Type": "application/json"}
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+    return headers
+
+
+def make_session(workers=1):
+    """One keep-alive session with a connection pool sized for the workers"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def fetch_brand_data(url, api_key, api_base=None, session=None):
+    """
+    Scrape one URL with the /v2/scrape endpoint.
     
-    # Make API request
-    response = requests.post(api_url, headers=headers, json=payload)
+    Returns:
+        dict: The API response ({"success": true, "data": {...}})
+        
+    Raises:
+        ScrapeError: If the API rejects the request or reports a failure
+    """
+    response = (session or requests).post(
+        f"{api_base_url(api_base)}/v2/scrape",
+        headers=api_headers(api_key),
+        json={"url": url, "formats": SCRAPE_FORMATS},
+        timeout=SCRAPE_TIMEOUT
+    )
     
     if response.status_code != 200:
-        print(f"Error: API request failed with status {response.status_code}")
-        print(f"Response: {response.text}")
-        sys.exit(1)
+        raise ScrapeError(f"API request failed with status {response.status_code}\nResponse: {response.text}")
     
     data = response.json()
     
     if not data.get("success"):
-        print(f"Error: API returned unsuccessful response")
-        print(f"Response: {json.dumps(data, indent=2)}")
-        sys.exit(1)
+        raise ScrapeError(f"API returned unsuccessful response\nResponse: {json.dumps(data, indent=2)}")
+    
+    return data
+
+
+def save_brand_data(data, url, output_path, session=None, stem=None):
+    """
+    Save a scrape response and download its screenshot and logo.
     
+    Args:
+        stem: File name prefix (default: the domain)
+        
+    Returns:
+        dict: Manifest entry with the saved files and the branding block
+    """
     # Extract domain name for file naming
     domain = urlparse(url).netloc.replace("www.", "")
+    stem = stem or domain
+    entry = {"url": url, "domain": domain, "brand_data": None, "screenshot": None, "logo": None}
     
     # Save full response
-    output_file = output_path / f"{domain}_brand_data.json"
+    output_file = output_path / f"{stem}_brand_data.json"
     with open(output_file, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2)
-    print(f"✓ Saved brand data to: {output_file}")
+    entry["brand_data"] = output_file.name
+    log(f"✓ Saved brand data to: {output_file}")
     
     # Save screenshot if available
     if "screenshot" in data.get("data", {}):
         screenshot_url = data["data"]["screenshot"]
-        screenshot_file = output_path / f"{domain}_screenshot.png"
         
-        print(f"Downloading screenshot...")
-        screenshot_response = requests.get(screenshot_url)
-        if screenshot_response.status_code == 200:
-            with open(screenshot_file, "wb") as f:
-                f.write(screenshot_response.content)
-            print(f"✓ Saved screenshot to: {screenshot_file}")
+        log(f"Downloading screenshot for {domain}...")
+        try:
+            screenshot_file = download_image(screenshot_url, output_path, f"{stem}_screenshot", session=session)
+            entry["screenshot"] = screenshot_file.name
+            log(f"✓ Saved screenshot to: {screenshot_file}")
+        except Exception as e:
+            log(f"Warning: Could not download screenshot for {domain}: {e}")
     
     # Download logo if available
-    branding = data.get("data", {}).get("branding", {})
+    branding = data.get("data", {}).get("branding") or {}
     if branding.get("logo"):
         logo_url = branding["logo"]
-        logo_ext = Path(logo_url).suffix or ".png"
-        logo_file = output_path / f"{domain}_logo{logo_ext}"
         
-        print(f"Downloading logo...")
+        log(f"Downloading logo for {domain}...")
         try:
-            logo_response = requests.get(logo_url)
-            if logo_response.status_code == 200:
-                with open(logo_file, "wb") as f:
-                    f.write(logo_response.content)
-                print(f"✓ Saved logo to: {logo_file}")
+            logo_file = download_image(logo_url, output_path, f"{stem}_logo", session=session)
+            entry["logo"] = logo_file.name
+            log(f"✓ Saved logo to: {logo_file}")
         except Exception as e:
-            print(f"Warning: Could not download logo: {e}")
+            log(f"Warning: Could not download logo for {domain}: {e}")
+    
+    entry["branding"] = branding
+    return entry
+
+
+def scrape_brand_data(url, api_key, output_dir=".", api_base=None):
+    """
+    Scrape brand data from a URL using Firecrawl API.
+    
+    Args:
+        url: The URL to scrape
+        api_key: Firecrawl API key
+        output_dir: Directory to save output files
+        api_base: Firecrawl API base URL (default: FIRECRAWL_API_URL or DEFAULT_API_URL)
+        
+    Returns:
+        dict: The scraped brand data
+    """
+    # Create output directory
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    
+    print(f"Scraping brand data from: {url}")
+    
+    try:
+        data = fetch_brand_data(url, api_key, api_base)
+    except ScrapeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    
+    save_brand_data(data, url, output_path)
     
     print(f"\n✓ Brand data extraction complete!")
     print(f"  Output directory: {output_path.absolute()}")
@@ -111,11 +281,211 @@ def scrape_brand_data(url, api_key, output_dir="."):
     return data
 
 
+def read_url_list(path):
+    """
+    URLs from a file (or stdin for "-"), one per line, in order and without repeats.
+    
+    A URL without a scheme gets https://.
+    """
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    
+    urls = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if "://" not in line:
+            line = f"https://{line}"
+        if line not in urls:
+            urls.append(line)
+    return urls
+
+
+def url_key(url):
+    """Loose form of a URL for matching batch results to the requested URLs"""
+    parsed = urlparse(url)
+    return f"{parsed.netloc.lower().replace('www.', '')}{parsed.path.rstrip('/')}"
+
+
+def file_stems(urls):
+    """
+    {url: file name prefix} for a batch: the domain, plus the path for a
+    page below the site root, so pages on one host do not overwrite each other.
+    """
+    stems, taken = {}, set()
+    for url in urls:
+        stem = re.sub(r"[^A-Za-z0-9.-]+", "_", url_key(url)).strip("_")
+        candidate, n = stem, 2
+        while candidate in taken:
+            candidate, n = f"{stem}_{n}", n + 1
+        taken.add(candidate)
+        stems[url] = candidate
+    return stems
+
+
+def batch_scrape(urls, api_key, api_base=None, session=None):
+    """
+    Scrape every URL in one /v2/batch/scrape job.
+    
+    Returns:
+        dict: {url_key: scrape response} for the documents the job returned,
+              or None if the API has no batch endpoint
+              
+    Raises:
+        ScrapeError: If the job is rejected, fails or times out
+    """
+    session = session or requests
+    api_base = api_base_url(api_base)
+    headers = api_headers(api_key)
+    
+    response = session.post(
+        f"{api_base}/v2/batch/scrape",
+        headers=headers,
+        json={"urls": urls, "formats": SCRAPE_FORMATS},
+        timeout=SCRAPE_TIMEOUT
+    )
+    if response.status_code in (404, 405, 501):
+        return None
+    if response.status_code != 200 or not response.json().get("success"):
+        raise ScrapeError(f"Batch request failed with status {response.status_code}: {response.text}")
+    
+    job = response.json()
+    status_url = job.get("url") or f"{api_base}/v2/batch/scrape/{job['id']}"
+    print(f"Batch job {job.get('id')} started for {len(urls)} URLs")
+    
+    # Poll until the job finishes
+    deadline = time.monotonic() + BATCH_TIMEOUT
+    while True:
+        status = session.get(status_url, headers=headers, timeout=SCRAPE_TIMEOUT).json()
+        if status.get("status") == "completed":
+            break
+        if status.get("status") == "failed":
+            raise ScrapeError(f"Batch job failed: {json.dumps(status)}")
+        if time.monotonic() > deadline:
+            raise ScrapeError(f"Batch job did not finish within {BATCH_TIMEOUT}s")
+        print(f"  ... {status.get('completed', 0)}/{status.get('total', len(urls))} scraped")
+        time.sleep(BATCH_POLL_INTERVAL)
+    
+    # Large jobs return their documents a page at a time
+    documents = list(status.get("data") or [])
+    next_url = status.get("next")
+    while next_url:
+        page = session.get(next_url, headers=headers, timeout=SCRAPE_TIMEOUT).json()
+        documents.extend(page.get("data") or [])
+        next_url = page.get("next")
+    
+    results = {}
+    for document in documents:
+        metadata = document.get("metadata") or {}
+        source = metadata.get("sourceURL") or metadata.get("url")
+        if source and not metadata.get("error"):
+            results[url_key(source)] = {"success": True, "data": document}
+    return results
+
+
+def scrape_brand_data_batch(urls, api_key, output_dir=".", api_base=None, workers=DEFAULT_WORKERS, use_batch=True):
+    """
+    Scrape brand data for many URLs concurrently and write a combined manifest.
+    
+    Args:
+        urls: The URLs to scrape
+        api_key: Firecrawl API key
+        output_dir: Directory to save output files
+        api_base: Firecrawl API base URL (default: FIRECRAWL_API_URL or DEFAULT_API_URL)
+        workers: Concurrent scrapes and downloads
+        use_batch: Try the /v2/batch/scrape endpoint first
+        
+    Returns:
+        dict: The manifest
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    session = make_session(workers)
+    started = time.perf_counter()
+    
+    # URLs that differ only in scheme, www. or a trailing slash are one site
+    unique = {}
+    for url in urls:
+        unique.setdefault(url_key(url), url)
+    urls = list(unique.values())
+    stems = file_stems(urls)
+    
+    print(f"Scraping brand data from {len(urls)} sites with {workers} workers")
+    
+    batched = None
+    if use_batch:
+        try:
+            batched = batch_scrape(urls, api_key, api_base, session)
+            if batched is None:
+                print("Batch endpoint unavailable, scraping sites one by one")
+        except (ScrapeError, requests.RequestException, ValueError) as e:
+            print(f"Warning: Batch scrape failed, scraping sites one by one: {e}")
+    
+    def process(url):
+        try:
+            data = (batched or {}).get(url_key(url))
+            source = "batch" if data else "scrape"
+            if not data:
+                data = fetch_brand_data(url, api_key, api_base, session)
+            entry = save_brand_data(data, url, output_path, session, stems[url])
+            entry.update(status="ok", source=source)
+        except Exception as e:
+            log(f"Error: {url}: {e}")
+            entry = {"url": url, "domain": urlparse(url).netloc.replace("www.", ""), "status": "failed", "error": str(e)}
+        return entry
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        sites = list(pool.map(process, urls))
+    
+    elapsed = time.perf_counter() - started
+    succeeded = sum(1 for site in sites if site["status"] == "ok")
+    manifest = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "batch_endpoint": batched is not None,
+        "elapsed_seconds": round(elapsed, 2),
+        "total": len(sites),
+        "succeeded": succeeded,
+        "failed": len(sites) - succeeded,
+        "sites": sites,
+    }
+    manifest_file = output_path / MANIFEST_FILE
+    with open(manifest_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    
+    print(f"\n✓ Brand data extraction complete: {succeeded}/{len(sites)} sites in {elapsed:.1f}s")
+    for site in sites:
+        if site["status"] != "ok":
+            print(f"  ✗ {site['url']}: {site['error'].splitlines()[0]}")
+    print(f"  Manifest: {manifest_file}")
+    print(f"  Output directory: {output_path.absolute()}")
+    
+    return manifest
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Scrape brand data from a website using Firecrawl API"
     )
-    parser.add_argument("url", help="URL to scrape")
+    parser.add_argument("url", nargs="?", help="URL to scrape")
+    parser.add_argument(
+        "--urls-file",
+        help="Scrape every URL in this file (one per line, - for stdin) instead of a single URL"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Concurrent scrapes and downloads in batch mode (default: {DEFAULT_WORKERS})"
+    )
+    parser.add_argument(
+        "--no-batch-endpoint",
+        action="store_true",
+        help="Scrape each URL on its own instead of submitting one batch job"
+    )
     parser.add_argument(
         "--output-dir",
         default=".",
@@ -125,18 +495,37 @@ def main():
         "--api-key",
         help="Firecrawl API key (or set FIRECRAWL_API_KEY env var)"
     )
+    parser.add_argument(
+        "--api-url",
+        help=f"Firecrawl API base URL (or set FIRECRAWL_API_URL env var; default: {DEFAULT_API_URL})"
+    )
     
     args = parser.parse_args()
+    if bool(args.url) == bool(args.urls_file):
+        parser.error("give either a URL or --urls-file")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
     
-    # Get API key
+    # Get API key; a local stand-in does not need one
     api_key = args.api_key or os.getenv("FIRECRAWL_API_KEY")
-    if not api_key:
+    api_base = args.api_url or os.getenv("FIRECRAWL_API_URL")
+    if not api_key and not api_base:
         print("Error: Firecrawl API key required")
         print("Set FIRECRAWL_API_KEY environment variable or use --api-key")
         sys.exit(1)
     
     # Scrape brand data
-    scrape_brand_data(args.url, api_key, args.output_dir)
+    if args.urls_file:
+        urls = read_url_list(args.urls_file)
+        if not urls:
+            print(f"Error: No URLs in {args.urls_file}")
+            sys.exit(1)
+        manifest = scrape_brand_data_batch(
+            urls, api_key, args.output_dir, api_base, args.workers, not args.no_batch_endpoint
+        )
+        sys.exit(0 if manifest["succeeded"] else 1)
+    
+    scrape_brand_data(args.url, api_key, args.output_dir, api_base)
 
 
 if __name__ == "__main__":
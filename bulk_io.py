@@ -0,0 +1,26 @@
+"""
+Batching and COPY helpers shared by the bulk loaders
+
+populate_members.py (batched, rpc and copy modes) and media_sql.py (SQL
+and COPY backfills of bpo_media) cut their rows into fixed-size batches
+and write COPY ... (FORMAT csv) files the same way.
+"""
+
+
+def chunked(items, size):
+    """Yield successive lists of at most `size` items"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def copy_value(value):
+    """Render a value the way COPY ... (FORMAT csv) reads it; None stays an unquoted empty field (NULL)"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
@@ -1,136 +1,283 @@
 """
-Upload logos to Supabase using MCP - bypasses auth issues
+Reconcile the logo mapping file, downloaded logos, storage and bpo_media
+
+Usage:
+    python check_logo_mappings.py                  # summary of every difference
+    python check_logo_mappings.py --json           # the full report as JSON on stdout
+    python check_logo_mappings.py -o report.json --check   # write it; exit 1 if anything differs
+
+Each source is loaded once: logo_company_mapping.csv, one scan of
+downloaded_logos/, one paginated list of bpo-assets/logos/, one paginated
+select of the primary 'logo' rows in bpo_media and the active companies
+from the CompanyResolver cache. The sets are then compared in a single
+pass, and the report lists only what a pipeline run has to fix.
+
+logo_pipeline.py uploads a duplicate logo once, under its representative's
+name, so the mapped logos are deduped the same way (logo_phash) and each
+company is expected to point at its representative's object. A company
+pointing at its own copy (upload_mapped_logos.py does not dedupe) is fine
+as long as that object exists.
+
+    unresolved            mapping rows whose company name matches no (or several) active companies
+    missing_files         mapped logo files not in downloaded_logos/
+    unmapped_files        downloaded logos no mapping row refers to
+    missing_in_storage    mapped logos whose object is not in the bucket
+    members_without_logo  active companies with no primary logo row
+    stale_urls            logo rows pointing somewhere other than the mapped object, or at a missing one
+    orphaned_objects      objects in logos/ that no row or mapping refers to
 """
+import os
+import sys
 import csv
+import json
+import argparse
 from pathlib import Path
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from supabase_backend import get_client
+from company_resolver import CompanyResolver
+from logo_derivatives import storage_stem
+from logo_phash import find_duplicates
+
+# Load environment variables
+load_dotenv()
+
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
 
 LOGOS_DIR = Path('downloaded_logos')
 MAPPING_FILE = 'logo_company_mapping.csv'
 
-def main():
-    """Read the mapping file and generate upload commands"""
-    print("=" * 80)
-    print("Logo Upload Helper - Generating Company IDs")
-    print("=" * 80)
-    
-    # Read mapping file
-    if not Path(MAPPING_FILE).exists():
-        print(f"❌ Mapping file '{MAPPING_FILE}' not found!")
-        return
-    
-    with open(MAPPING_FILE, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        mappings = list(reader)
-    
-    # Filter for entries with company names
-    mappings_to_process = [m for m in mappings if m['company_name'].strip()]
-    
-    print(f"\n📊 Found {len(mappings_to_process)} logos with company names assigned\n")
-    
-    # Company name to ID mapping (from your database)
-    company_ids = {
-        "Abbott Philippines": 1,
-        "Accenture": 2,
-        "Access Healthcare": 3,
-        "ADEC Healthcare": 4,
-        "Afni": 5,
-        "Alorica": 6,
-        "Atos (Former Syntel)": 7,
-        "AWS": 8,
-        "Capstone": 9,
-        "Carelon": 10,
-        "Cliniqon": 11,
-        "Cognizant": 12,
-        "Concentrix": 13,
-        "Conifer": 14,
-        "Connext": 15,
-        "Datamatics": 16,
-        "Dexcom": 17,
-        "DME Serve": 18,
-        "Dynaquest": 19,
-        "eDat Services": 20,
-        "Everise": 21,
-        "Evolent Health": 22,
-        "EXL": 23,
-        "Fresenius": 24,
-        "Genfinity": 25,
-        "Ibex": 26,
-        "Infinit-O": 27,
-        "Inspiro": 28,
-        "IQVIA": 29,
-        "iReply Back Office Services": 30,
-        "iRHYTHM": 31,
-        "Johnson & Johnson": 32,
-        "LKN Strategies": 33,
-        "Lyric": 34,
-        "MedCheck": 35,
-        "MedCode": 36,
-        "Medical Abstract": 37,
-        "MEDMETRIX": 38,
-        "Microsourcing": 39,
-        "MiraMed": 40,
-        "Nordic": 41,
-        "Office Symmetry": 42,
-        "Omega Healthcare": 43,
-        "Optimum TransSchool": 44,
-        "Optum": 45,
-        "Passelande": 46,
-        "Pointwest": 47,
-        "R1RCM": 48,
-        "Sagility": 49,
-        "Savant Technologies": 50,
-        "Shearwater": 51,
-        "SMS Global": 52,
-        "Staywell": 53,
-        "Tata Consultancy": 54,
-        "Teleperformance": 55,
-        "Tenet Health": 56,
-        "TTSI": 57,
-        "UST Global": 58,
-        "Vector Outsourcing": 59,
-        "VISAYA": 60,
-        "VXI Global": 61,
-        "Wagmi": 62,
-        "Wipro": 63,
-        "WorldSource": 64
-    }
-    
-    # Generate output with matched IDs
-    print("Company Name | Logo File | BPO ID | Status")
-    print("-" * 80)
-    
-    matched = 0
-    unmatched = []
-    
-    for mapping in mappings_to_process:
+BUCKET_NAME = 'bpo-assets'
+LOGO_FOLDER = 'logos'
+
+# Rows per bpo_media page and objects per storage list() page
+PAGE_SIZE = 1000
+
+SECTIONS = [
+    'unresolved', 'missing_files', 'unmapped_files', 'missing_in_storage',
+    'members_without_logo', 'stale_urls', 'orphaned_objects',
+]
+
+
+def load_mapping(path):
+    """Mapping rows that name a company"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [m for m in csv.DictReader(f) if m['company_name'].strip()]
+
+
+def scan_files(directory):
+    """Names of the files in a directory, from one scan"""
+    if not directory.exists():
+        return set()
+    with os.scandir(directory) as entries:
+        return {entry.name for entry in entries if entry.is_file()}
+
+
+def find_representatives(mappings, files, logos_dir):
+    """{logo_file: logo_file of the copy the pipeline keeps} for every mapped duplicate"""
+    paths = {str(logos_dir / m['logo_file']): m['logo_file'] for m in mappings if m['logo_file'] in files}
+    return {paths[path]: paths[kept] for path, kept in find_duplicates(list(paths)).items()}
+
+
+def load_logo_rows(client):
+    """Every primary 'logo' row in bpo_media, one page at a time"""
+    rows, start = [], 0
+    while True:
+        response = (
+            client.table('bpo_media')
+            .select('id, bpo_id, file_url')
+            .eq('media_type', 'logo')
+            .eq('is_primary', True)
+            .order('id')
+            .range(start, start + PAGE_SIZE - 1)
+            .execute()
+        )
+        rows.extend(response.data)
+        if len(response.data) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+def list_objects(bucket, folder):
+    """Paths of the objects directly inside a bucket folder (sub-folders are skipped)"""
+    paths, offset = set(), 0
+    while True:
+        page = bucket.list(folder, {'limit': PAGE_SIZE, 'offset': offset})
+        # Folder placeholders come back without metadata
+        paths.update(f"{folder}/{item['name']}" for item in page if item.get('metadata'))
+        if len(page) < PAGE_SIZE:
+            return paths
+        offset += PAGE_SIZE
+
+
+def object_path(file_url):
+    """Storage path of a public bpo-assets URL, or None for anything else"""
+    marker = f"/storage/v1/object/public/{BUCKET_NAME}/"
+    _, found, path = (file_url or '').partition(marker)
+    return path.split('?')[0].split('#')[0] if found else None
+
+
+def logo_path(company_name, logo_file):
+    return f"{LOGO_FOLDER}/{storage_stem(company_name)}{Path(logo_file).suffix}"
+
+
+def reconcile(mappings, files, companies, logo_rows, objects, resolver, public_url, representatives=None):
+    """Compare the loaded sets; returns {section: [entries]}"""
+    report = {section: [] for section in SECTIONS}
+    representatives = representatives or {}
+    # The pipeline names a representative's objects after its (last) mapping row
+    names = {m['logo_file']: m['company_name'].strip() for m in mappings}
+
+    # Mapping -> the object and URL each resolved company should have
+    expected = {}
+    own_copies = {}
+    mapped_files = set()
+    for mapping in mappings:
         company_name = mapping['company_name'].strip()
         logo_file = mapping['logo_file']
-        file_path = LOGOS_DIR / logo_file
-        
-        if not file_path.exists():
-            print(f"{company_name} | {logo_file} | N/A | ❌ File not found")
+        mapped_files.add(logo_file)
+        if logo_file not in files:
+            report['missing_files'].append({'company_name': company_name, 'logo_file': logo_file})
+        bpo_id = resolver.resolve(company_name)
+        if not bpo_id:
+            reason = 'ambiguous' if resolver.ambiguous(company_name) else 'not_found'
+            report['unresolved'].append({'company_name': company_name, 'logo_file': logo_file, 'reason': reason})
             continue
-        
-        bpo_id = company_ids.get(company_name)
-        
-        if bpo_id:
-            print(f"{company_name} | {logo_file} | {bpo_id} | ✅ Matched")
-            matched += 1
+        kept = representatives.get(logo_file, logo_file)
+        path = logo_path(names[kept], kept)
+        expected[bpo_id] = {
+            'bpo_id': bpo_id,
+            'company_name': company_name,
+            'logo_file': logo_file,
+            'duplicate_of': kept if kept != logo_file else None,
+            'storage_path': path,
+            'expected_url': public_url(path),
+        }
+        if kept != logo_file:
+            own = logo_path(company_name, logo_file)
+            own_copies[bpo_id] = (own, public_url(own))
+
+    report['unmapped_files'] = sorted(files - mapped_files)
+
+    rows = {row['bpo_id']: row for row in logo_rows}
+    referenced = {entry['storage_path'] for entry in expected.values()}
+    referenced.update(object_path(row['file_url']) for row in logo_rows)
+
+    for company in sorted(companies, key=lambda c: c['company_name']):
+        bpo_id = company['id']
+        entry = expected.get(bpo_id)
+        row = rows.get(bpo_id)
+
+        # A deduped company may still point at its own copy
+        own_path, own_url = own_copies.get(bpo_id, (None, None))
+        on_own_copy = row is not None and own_url is not None and row['file_url'] == own_url and own_path in objects
+
+        if entry and not on_own_copy and entry['storage_path'] not in objects:
+            report['missing_in_storage'].append(dict(entry, on_disk=entry['logo_file'] in files))
+
+        if not row:
+            report['members_without_logo'].append({
+                'bpo_id': bpo_id,
+                'company_name': company['company_name'],
+                'mapped': entry is not None,
+            })
+            continue
+
+        path = object_path(row['file_url'])
+        if entry and row['file_url'] != entry['expected_url'] and not on_own_copy:
+            reason = 'differs_from_mapping'
+        elif path and path.startswith(f"{LOGO_FOLDER}/") and path.count('/') == 1 and path not in objects:
+            reason = 'object_missing'
         else:
-            print(f"{company_name} | {logo_file} | ??? | ⚠️  Not in database")
-            unmatched.append(company_name)
-    
-    print(f"\n{'='*80}")
-    print(f"✅ Matched: {matched} companies")
-    print(f"⚠️  Unmatched: {len(unmatched)} companies")
-    
-    if unmatched:
-        print(f"\nUnmatched companies:")
-        for name in unmatched:
-            print(f"  - {name}")
-    
-    print(f"{'='*80}")
-    print("\nℹ️  Please ask Antigravity to upload these logos using the MCP Supabase tool")
+            continue
+        report['stale_urls'].append({
+            'bpo_id': bpo_id,
+            'company_name': company['company_name'],
+            'media_id': row['id'],
+            'file_url': row['file_url'],
+            'expected_url': entry['expected_url'] if entry else None,
+            'reason': reason,
+        })
+
+    report['orphaned_objects'] = sorted(objects - referenced)
+    return report
+
+
+def print_summary(report):
+    for section in SECTIONS:
+        entries = report[section]
+        print(f"\n{'✅' if not entries else '⚠️ '} {section}: {len(entries)}")
+        for entry in entries[:20]:
+            if isinstance(entry, str):
+                print(f"     {entry}")
+            else:
+                detail = entry.get('reason') or entry.get('logo_file') or ('mapped' if entry.get('mapped') else 'no mapping')
+                print(f"     {entry.get('company_name', '')}  {detail}")
+        if len(entries) > 20:
+            print(f"     ... {len(entries) - 20} more (use --json for the full list)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile logo mappings, local files, storage and bpo_media")
+    parser.add_argument("--mapping", default=MAPPING_FILE, help=f"Logo mapping CSV (default: {MAPPING_FILE})")
+    parser.add_argument("--logos-dir", default=str(LOGOS_DIR), help=f"Downloaded logos (default: {LOGOS_DIR})")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    parser.add_argument("-o", "--output", help="Also write the JSON report to this file")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 when anything differs")
+    args = parser.parse_args()
+
+    if not Path(args.mapping).exists():
+        sys.exit(f"❌ Mapping file '{args.mapping}' not found!")
+
+    supabase = get_client(SUPABASE_URL, SUPABASE_KEY)
+    bucket = supabase.storage.from_(BUCKET_NAME)
+    resolver = CompanyResolver(supabase)
+
+    # Load every source once
+    mappings = load_mapping(args.mapping)
+    files = scan_files(Path(args.logos_dir))
+    companies = resolver.companies()
+    logo_rows = load_logo_rows(supabase)
+    objects = list_objects(bucket, LOGO_FOLDER)
+    representatives = find_representatives(mappings, files, Path(args.logos_dir))
+
+    report = reconcile(mappings, files, companies, logo_rows, objects, resolver, bucket.get_public_url,
+                       representatives)
+    document = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'counts': {
+            'mappings': len(mappings),
+            'files': len(files),
+            'companies': len(companies),
+            'logo_rows': len(logo_rows),
+            'objects': len(objects),
+            'duplicates': len(representatives),
+            **{section: len(report[section]) for section in SECTIONS},
+        },
+        **report,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+    if args.json:
+        print(json.dumps(document, indent=2))
+    else:
+        print("=" * 80)
+        print("Logo Reconciliation")
+        print("=" * 80)
+        counts = document['counts']
+        print(f"📊 {counts['mappings']} mappings, {counts['files']} files, {counts['companies']} companies, "
+              f"{counts['logo_rows']} logo rows, {counts['objects']} objects")
+        print_summary(report)
+        if args.output:
+            print(f"\n💾 Report written to {args.output}")
+        print(f"{'='*80}")
+
+    if args.check and any(report[section] for section in SECTIONS):
+        sys.exit(1)
+
 
 if __name__ == '__main__':
     main()
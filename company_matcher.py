@@ -0,0 +1,142 @@
+"""
+Match scraped or hand-typed company names to bpos rows
+
+Usage:
+    from company_matcher import CompanyMatcher
+    matcher = CompanyMatcher.load(supabase)
+    company, score = matcher.match("Concentrix Philippines")
+    for score, company in matcher.candidates("Omega HMS"):
+        ...
+
+Active companies are fetched once (one paginated select) and indexed by
+normalized name, by token and by character trigram over company_name and
+trade_name. A lookup only scores the companies that share a token or a
+trigram with the query, so matching thousands of logos costs one query
+plus near-constant work per name.
+"""
+import re
+import unicodedata
+
+# Words that say nothing about which company a name refers to
+STOP_WORDS = {
+    "the", "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "llc",
+    "philippines", "phils", "ph",
+}
+
+# Minimum score for match() to accept the best candidate
+DEFAULT_MIN_SCORE = 0.6
+
+# Rows per request when loading companies
+PAGE_SIZE = 1000
+
+
+def normalize(name):
+    """Lowercase ASCII words without punctuation or stop words"""
+    name = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode("ascii")
+    name = name.lower().replace("&", " and ")
+    words = re.findall(r"[a-z0-9]+", name)
+    meaningful = [w for w in words if w not in STOP_WORDS]
+    return " ".join(meaningful or words)
+
+
+def trigrams(text):
+    """Character trigrams of a normalized name, padded so short names still get some"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def score_names(query, query_tokens, query_grams, name, name_tokens, name_grams):
+    """Similarity in [0, 1] between two normalized names"""
+    if query == name:
+        return 1.0
+    # One name is the other plus extra words ("Optum" vs "Optum Global Solutions")
+    if f" {query} " in f" {name} " or f" {name} " in f" {query} ":
+        return 0.9
+    gram_similarity = len(query_grams & name_grams) / len(query_grams | name_grams)
+    token_overlap = len(query_tokens & name_tokens) / max(1, min(len(query_tokens), len(name_tokens)))
+    return round(0.6 * gram_similarity + 0.3 * token_overlap, 4)
+
+
+class CompanyMatcher:
+    """In-memory token and trigram index over company names"""
+
+    def __init__(self, companies):
+        self.companies = []
+        self.names = []
+        self.exact = {}
+        self.by_token = {}
+        self.by_gram = {}
+
+        for company in companies:
+            idx = len(self.companies)
+            self.companies.append(company)
+            entries = []
+            for raw in (company.get("company_name"), company.get("trade_name")):
+                name = normalize(raw)
+                if not name or any(name == entry[0] for entry in entries):
+                    continue
+                tokens, grams = set(name.split()), trigrams(name)
+                entries.append((name, tokens, grams))
+                self.exact.setdefault(name, idx)
+                for token in tokens:
+                    self.by_token.setdefault(token, set()).add(idx)
+                for gram in grams:
+                    self.by_gram.setdefault(gram, set()).add(idx)
+            self.names.append(entries)
+
+    @classmethod
+    def load(cls, client, page_size=PAGE_SIZE):
+        """Fetch every active company once and index it"""
+        companies = []
+        start = 0
+        while True:
+            response = (
+                client.table("bpos")
+                .select("id, company_name, trade_name")
+                .eq("is_active", True)
+                .order("id")
+                .range(start, start + page_size - 1)
+                .execute()
+            )
+            companies.extend(response.data)
+            if len(response.data) < page_size:
+                break
+            start += page_size
+        return cls(companies)
+
+    def __len__(self):
+        return len(self.companies)
+
+    def candidates(self, name, limit=5):
+        """Up to `limit` (score, company) pairs, best first"""
+        query = normalize(name)
+        if not query:
+            return []
+        if query in self.exact:
+            return [(1.0, self.companies[self.exact[query]])]
+
+        query_tokens, query_grams = set(query.split()), trigrams(query)
+        shared = {}
+        for token in query_tokens:
+            for idx in self.by_token.get(token, ()):
+                shared[idx] = shared.get(idx, 0) + 1
+        for gram in query_grams:
+            for idx in self.by_gram.get(gram, ()):
+                shared[idx] = shared.get(idx, 0) + 1
+
+        scored = []
+        for idx in sorted(shared, key=shared.get, reverse=True)[:max(limit * 10, 50)]:
+            score = max(
+                score_names(query, query_tokens, query_grams, *entry)
+                for entry in self.names[idx]
+            )
+            scored.append((score, self.companies[idx]))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return scored[:limit]
+
+    def match(self, name, min_score=DEFAULT_MIN_SCORE):
+        """(company, score) for the best candidate scoring at least `min_score`, else (None, score)"""
+        ranked = self.candidates(name, limit=1)
+        if ranked and ranked[0][0] >= min_score:
+            return ranked[0][1], ranked[0][0]
+        return None, ranked[0][0] if ranked else 0.0
@@ -0,0 +1,162 @@
+"""
+Resolve company names to bpos UUIDs from a locally cached copy of the table
+
+Usage:
+    from company_resolver import CompanyResolver
+    resolver = CompanyResolver(supabase)
+    bpo_id = resolver.resolve("Alorica")
+    ids = resolver.ids()                    # {company_name: id}
+
+    python company_resolver.py              # print the current name -> UUID map
+    python company_resolver.py --full       # rebuild the cache from scratch
+
+The id, names, is_active and updated_at of every company are kept in
+COMPANY_CACHE_FILE (default .company_cache.json). The first run fetches
+them all with one paginated select; after COMPANY_CACHE_TTL seconds
+(default 900) the next lookup fetches only rows whose updated_at is at or
+past the newest one already cached, and after COMPANY_CACHE_MAX_AGE
+(default 86400) the cache is rebuilt in full so deleted rows drop out.
+
+Names match exactly, ignoring case and surrounding or repeated spaces, on
+company_name or trade_name. Inactive companies and names shared by more
+than one company resolve to None rather than to a guess.
+"""
+import os
+import json
+import argparse
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from supabase_backend import get_client
+
+DEFAULT_CACHE_FILE = '.company_cache.json'
+DEFAULT_TTL = 900
+DEFAULT_MAX_AGE = 86400
+
+# Rows per request
+PAGE_SIZE = 1000
+
+COLUMNS = 'id, company_name, trade_name, is_active, updated_at'
+
+
+def name_key(name):
+    return ' '.join((name or '').split()).casefold()
+
+
+def now():
+    return datetime.now(timezone.utc)
+
+
+class CompanyResolver:
+    """name -> UUID lookups against an on-disk copy of bpos, refreshed by delta"""
+
+    def __init__(self, client, cache_path=None, ttl=None, max_age=None):
+        self.client = client
+        self.cache_path = cache_path or os.getenv('COMPANY_CACHE_FILE', DEFAULT_CACHE_FILE)
+        self.ttl = ttl if ttl is not None else int(os.getenv('COMPANY_CACHE_TTL', DEFAULT_TTL))
+        self.max_age = max_age if max_age is not None else int(os.getenv('COMPANY_CACHE_MAX_AGE', DEFAULT_MAX_AGE))
+        self.stats = {'full': 0, 'delta': 0, 'rows_fetched': 0}
+        self.cache = {'companies': {}, 'high_water': None, 'checked_at': None, 'built_at': None}
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                self.cache.update(json.load(f))
+        self._index = None
+
+    def fetch(self, since=None):
+        """Every company, or those updated at or after `since`, one page at a time"""
+        rows, start = [], 0
+        while True:
+            query = self.client.table('bpos').select(COLUMNS)
+            if since:
+                query = query.gte('updated_at', since)
+            response = query.order('id').range(start, start + PAGE_SIZE - 1).execute()
+            rows.extend(response.data)
+            if len(response.data) < PAGE_SIZE:
+                break
+            start += PAGE_SIZE
+        self.stats['rows_fetched'] += len(rows)
+        return rows
+
+    def age(self, stamp):
+        if not stamp:
+            return float('inf')
+        return (now() - datetime.fromisoformat(stamp)).total_seconds()
+
+    def refresh(self, full=False):
+        """Bring the cache up to date if it is older than the TTL (or always, with full=True)"""
+        full = full or not self.cache['high_water'] or self.age(self.cache['built_at']) > self.max_age
+        if not full and self.age(self.cache['checked_at']) <= self.ttl:
+            return
+
+        checked_at = now().isoformat()
+        if full:
+            companies = {}
+            self.stats['full'] += 1
+        else:
+            companies = self.cache['companies']
+            self.stats['delta'] += 1
+
+        for row in self.fetch(None if full else self.cache['high_water']):
+            companies[row['id']] = row
+        stamps = [c['updated_at'] for c in companies.values() if c.get('updated_at')]
+
+        self.cache['companies'] = companies
+        self.cache['high_water'] = max(stamps) if stamps else None
+        self.cache['checked_at'] = checked_at
+        if full:
+            self.cache['built_at'] = checked_at
+        self._index = None
+        self.save()
+
+    def save(self):
+        """Atomically rewrite the cache file"""
+        tmp = f"{self.cache_path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.cache, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.cache_path)
+
+    def companies(self):
+        """Active companies as {id, company_name, trade_name, ...} rows"""
+        self.refresh()
+        return [c for c in self.cache['companies'].values() if c.get('is_active', True)]
+
+    def index(self):
+        if self._index is None:
+            index = {}
+            for company in self.companies():
+                for name in {name_key(company['company_name']), name_key(company.get('trade_name'))}:
+                    if name:
+                        index.setdefault(name, set()).add(company['id'])
+            self._index = index
+        return self._index
+
+    def resolve(self, name):
+        """UUID of the one active company with this name, else None"""
+        ids = self.index().get(name_key(name), ())
+        return next(iter(ids)) if len(ids) == 1 else None
+
+    def ambiguous(self, name):
+        return len(self.index().get(name_key(name), ())) > 1
+
+    def ids(self):
+        """{company_name: id} for every active company"""
+        return {c['company_name']: c['id'] for c in self.companies()}
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Print the company name -> UUID map from the cached bpos table")
+    parser.add_argument("--full", action="store_true", help="Rebuild the cache instead of fetching the delta")
+    args = parser.parse_args()
+
+    resolver = CompanyResolver(get_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_ROLE_KEY')))
+    resolver.refresh(full=args.full)
+
+    for name, bpo_id in sorted(resolver.ids().items(), key=lambda item: item[0].casefold()):
+        print(f'{bpo_id}  {name}')
+    print(f"\n✅ {len(resolver.companies())} active companies "
+          f"({resolver.stats['full']} full / {resolver.stats['delta']} delta refreshes, "
+          f"{resolver.stats['rows_fetched']} rows fetched) -> {resolver.cache_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,11 +3,13 @@ Download all logos from HIMAP members page and create a mapping CSV for manual a
 """
 import os
 import re
-import requests
 import csv
 from pathlib import Path
 from dotenv import load_dotenv
-from firecrawl import FirecrawlApp
+from logo_downloader import download_all, download_file
+from logo_cache import LogoCache
+from logo_phash import find_duplicates
+from scrape_cache import ScrapeCache
 
 # Load environment variables
 load_dotenv('brand-extractor/.env')
@@ -17,20 +19,20 @@ FIRECRAWL_API_KEY = os.getenv('FIRECRAWL_API_KEY')
 LOGOS_DIR = Path('downloaded_logos')
 MAPPING_FILE = 'logo_company_mapping.csv'
 
-# Initialize Firecrawl
-firecrawl = FirecrawlApp(api_key=FIRECRAWL_API_KEY)
+# Initialize Firecrawl, answered from the local scrape cache when possible
+scraper = ScrapeCache(api_key=FIRECRAWL_API_KEY)
 
 def scrape_logos():
     """Scrape the HIMAP members page for all logos"""
     print("🔥 Scraping HIMAP members page...")
     
     try:
-        result = firecrawl.scrape(
-            url='https://himap.ph/members/list-of-members/',
+        result = scraper.scrape(
+            'https://himap.ph/members/list-of-members/',
             formats=['markdown']
         )
         
-        markdown = result.markdown if hasattr(result, 'markdown') else ''
+        markdown = result['data'].get('markdown') or ''
         
         # Extract all image URLs
         image_pattern = r'!\[([^\]]*)\]\(([^)]+)\)'
@@ -58,18 +60,12 @@ def scrape_logos():
         print(f"❌ Error scraping: {e}")
         return []
 
-def download_logo(url, filename):
-    """Download a logo image"""
+def download_logo(url, filename, cache=None):
+    """Download a logo image over the shared pooled session, conditionally when cached"""
     try:
-        response = requests.get(url, timeout=30, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        response.raise_for_status()
-        
-        with open(filename, 'wb') as f:
-            f.write(response.content)
-        
-        return True
+        if cache:
+            return cache.fetch(url, filename)
+        return download_file(url, filename)
         
     except Exception as e:
         print(f"  ❌ Error downloading {url}: {e}")
@@ -93,12 +89,9 @@ def main():
     
     print(f"\n📥 Downloading {len(logo_urls)} logos...")
     
-    # Download logos and create mapping data
-    mapping_data = []
-    
+    # Name every file up front, then download them concurrently
+    jobs = []
     for idx, url in enumerate(logo_urls, 1):
-        print(f"\n[{idx}/{len(logo_urls)}] {url}")
-        
         # Determine file extension
         if url.lower().endswith('.png'):
             ext = '.png'
@@ -108,25 +101,32 @@ def main():
             # Try to guess from URL
             ext = '.png'
         
-        filename = f"logo_{idx:03d}{ext}"
-        filepath = LOGOS_DIR / filename
-        
-        # Download
-        if download_logo(url, filepath):
-            print(f"  ✅ Saved as {filename}")
-            mapping_data.append({
-                'logo_file': filename,
-                'logo_url': url,
-                'company_name': '',  # To be filled manually
-                'notes': ''
-            })
+        jobs.append((url, LOGOS_DIR / f"logo_{idx:03d}{ext}"))
+    
+    cache = LogoCache()
+    downloaded = download_all(jobs, lambda url, filename: download_logo(url, filename, cache))
+    cache.save()
+    print(f"🗄️  Cache: {cache.summary()}")
+    
+    # Flag repeated and near-identical images so only one copy gets mapped and uploaded
+    duplicates = find_duplicates([filepath for (_, filepath), ok in zip(jobs, downloaded) if ok])
+    print(f"🟰 {len(duplicates)} duplicate logos found")
+    
+    # Create mapping data
+    mapping_data = []
+    for (url, filepath), ok in zip(jobs, downloaded):
+        if not ok:
+            notes = 'DOWNLOAD FAILED'
+        elif str(filepath) in duplicates:
+            notes = f"DUPLICATE OF {Path(duplicates[str(filepath)]).name}"
         else:
-            mapping_data.append({
-                'logo_file': filename,
-                'logo_url': url,
-                'company_name': '',
-                'notes': 'DOWNLOAD FAILED'
-            })
+            notes = ''
+        mapping_data.append({
+            'logo_file': filepath.name,
+            'logo_url': url,
+            'company_name': '',  # To be filled manually
+            'notes': notes
+        })
     
     # Create CSV mapping file
     print(f"\n📝 Creating mapping file: {MAPPING_FILE}")
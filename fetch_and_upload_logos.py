@@ -3,12 +3,18 @@ Fetch company logos from HIMAP members page using Firecrawl and upload to Supaba
 """
 import os
 import re
-import requests
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from dotenv import load_dotenv
-from supabase import create_client
-from firecrawl import FirecrawlApp
-import time
+from supabase_backend import get_client
+from company_matcher import CompanyMatcher
+from logo_downloader import download_file, HostLimiter, DEFAULT_WORKERS, DEFAULT_PER_HOST
+from logo_cache import LogoCache
+from logo_derivatives import render_job, upload_derivatives, storage_stem, DERIVATIVE_WIDTHS, DERIVATIVE_FORMATS
+from bpo_media import media_row, upsert_media
+from logo_phash import DuplicateIndex
+from queue_pipeline import Stage, run_stages, print_report
+from scrape_cache import ScrapeCache
 
 # Load environment variables
 load_dotenv()
@@ -18,22 +24,30 @@ FIRE_CRAWL_API_KEY = os.getenv('FIRECRAWL_API_KEY')
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
 
+# Workers per pipeline stage; each stage's queue holds twice its workers
+DOWNLOAD_WORKERS = DEFAULT_WORKERS
+RENDER_WORKERS = os.cpu_count() or 1
+UPLOAD_WORKERS = 8
+
+# Media rows per bpo_media upsert while the pipeline runs
+RECORD_BATCH = 100
+
 # Initialize clients
-firecrawl = FirecrawlApp(api_key=FIRE_CRAWL_API_KEY)
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+scraper = ScrapeCache(api_key=FIRE_CRAWL_API_KEY)
+supabase = get_client(SUPABASE_URL, SUPABASE_KEY)
 
 def scrape_himap_logos():
     """Scrape the HIMAP members page for company logos"""
     print("🔥 Scraping HIMAP members page...")
     
     try:
-        result = firecrawl.scrape(
-            url='https://himap.ph/members/list-of-members/',
+        result = scraper.scrape(
+            'https://himap.ph/members/list-of-members/',
             formats=['markdown']
         )
         
-        # Get markdown content from Document object
-        markdown = result.markdown if hasattr(result, 'markdown') else ''
+        # Get markdown content from the scrape response (replayed from .scrape_cache/ when fresh)
+        markdown = result['data'].get('markdown') or ''
         
         print(f"✅ Successfully scraped page")
         print(f"📝 Markdown length: {len(markdown)} characters")
@@ -52,32 +66,32 @@ def scrape_himap_logos():
         traceback.print_exc()
         return None, []
 
-def download_image(url, filename):
-    """Download an image from a URL"""
+def download_image(url, filename, cache=None):
+    """Download an image from a URL over the shared pooled session, conditionally when cached"""
     try:
-        print(f"  📥 Downloading {url}...")
-        response = requests.get(url, timeout=30, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        response.raise_for_status()
-        
-        with open(filename, 'wb') as f:
-            f.write(response.content)
-        
-        print(f"  ✅ Saved to {filename}")
-        return True
+        if cache:
+            return cache.fetch(url, filename)
+        return download_file(url, filename)
         
     except Exception as e:
         print(f"  ❌ Error downloading {url}: {e}")
         return False
 
-def upload_to_supabase(file_path, company_name):
+def upload_to_supabase(file_path, company_name, cache=None):
     """Upload logo to Supabase Storage and return the public URL"""
     try:
         # Create a clean filename
         safe_name = re.sub(r'[^a-zA-Z0-9_-]', '_', company_name.lower())
         file_ext = Path(file_path).suffix
         storage_path = f"logos/{safe_name}{file_ext}"
+        bucket = supabase.storage.from_('bpo-assets')
+        
+        # Skip the upload when this exact file is already in the bucket
+        if cache:
+            needed, sha = cache.needs_upload(bucket, 'bpo-assets', storage_path, file_path)
+            if not needed:
+                print(f"  ⏭️  Unchanged, skipping upload of {storage_path}")
+                return bucket.get_public_url(storage_path)
         
         print(f"  📤 Uploading {file_path} to Supabase Storage...")
         
@@ -86,14 +100,16 @@ def upload_to_supabase(file_path, company_name):
             file_content = f.read()
         
         # Upload to storage bucket (create 'bpo-assets' bucket if it doesn't exist)
-        result = supabase.storage.from_('bpo-assets').upload(
+        result = bucket.upload(
             storage_path,
             file_content,
-            {'content-type': f'image/{file_ext[1:]}'}
+            {'content-type': f'image/{file_ext[1:]}', 'upsert': 'true'}
         )
+        if cache:
+            cache.record_upload('bpo-assets', storage_path, sha)
         
         # Get public URL
-        public_url = supabase.storage.from_('bpo-assets').get_public_url(storage_path)
+        public_url = bucket.get_public_url(storage_path)
         
         print(f"  ✅ Uploaded! URL: {public_url}")
         return public_url
@@ -102,66 +118,17 @@ def upload_to_supabase(file_path, company_name):
         print(f"  ❌ Error uploading to Supabase: {e}")
         return None
 
-def match_company_to_db(company_name):
+def match_company_to_db(matcher, company_name):
     """Try to match the company name from the scraped data to the database"""
-    try:
-        # Fetch all companies
-        response = supabase.table('bpos').select('id, company_name, trade_name').eq('is_active', True).execute()
-        companies = response.data
-        
-        # Try exact match first
-        for company in companies:
-            if company['company_name'].lower() == company_name.lower():
-                return company['id']
-            if company.get('trade_name') and company['trade_name'].lower() == company_name.lower():
-                return company['id']
-        
-        # Try partial match
-        for company in companies:
-            if company_name.lower() in company['company_name'].lower() or company['company_name'].lower() in company_name.lower():
-                print(f"  ⚠️  Partial match: '{company_name}' -> '{company['company_name']}'")
-                return company['id']
-            if company.get('trade_name'):
-                if company_name.lower() in company['trade_name'].lower() or company['trade_name'].lower() in company_name.lower():
-                    print(f"  ⚠️  Partial match: '{company_name}' -> '{company['trade_name']}'")
-                    return company['id']
-        
+    company, score = matcher.match(company_name)
+    
+    if not company:
         print(f"  ⚠️  No match found for: {company_name}")
         return None
-        
-    except Exception as e:
-        print(f"  ❌ Error matching company: {e}")
-        return None
-
-def update_bpo_media(bpo_id, logo_url):
-    """Insert or update logo in bpo_media table"""
-    try:
-        # Check if logo already exists
-        existing = supabase.table('bpo_media').select('*').eq('bpo_id', bpo_id).eq('media_type', 'logo').execute()
-        
-        if existing.data:
-            # Update existing
-            supabase.table('bpo_media').update({
-                'file_url': logo_url,
-                'is_primary': True
-            }).eq('id', existing.data[0]['id']).execute()
-            print(f"  ✅ Updated existing logo record")
-        else:
-            # Insert new
-            supabase.table('bpo_media').insert({
-                'bpo_id': bpo_id,
-                'media_type': 'logo',
-                'file_url': logo_url,
-                'is_primary': True,
-                'display_order': 1
-            }).execute()
-            print(f"  ✅ Created new logo record")
-        
-        return True
-        
-    except Exception as e:
-        print(f"  ❌ Error updating media table: {e}")
-        return False
+    
+    if score < 1.0:
+        print(f"  ⚠️  Partial match ({score:.2f}): '{company_name}' -> '{company['company_name']}'")
+    return company['id']
 
 def main():
     """Main execution flow"""
@@ -182,47 +149,144 @@ def main():
     
     print(f"\n📊 Processing {len(images)} images...")
     
-    # Step 2: Process each image
-    processed = 0
+    # Load companies once for every lookup
+    try:
+        matcher = CompanyMatcher.load(supabase)
+    except Exception as e:
+        print(f"❌ Error loading companies: {e}")
+        return
+    
+    # Local content-addressed cache: unchanged logos are neither re-downloaded nor re-uploaded
+    cache = LogoCache()
+    
+    # Step 2: Name every candidate logo up front
+    candidates = []
     for alt_text, image_url in images:
-        print(f"\n{'='*60}")
-        print(f"Processing: {alt_text or 'Unnamed'}")
-        print(f"URL: {image_url}")
-        
         # Skip if not a company logo (based on alt text or URL patterns)
         if not alt_text or len(alt_text) < 3:
-            print("  ⏭️  Skipping - no alt text")
+            print(f"  ⏭️  Skipping - no alt text: {image_url}")
             continue
-        
-        # Download image
         file_ext = '.png' if 'png' in image_url.lower() else '.jpg'
-        temp_file = temp_dir / f"logo_{processed}{file_ext}"
-        
-        if not download_image(image_url, temp_file):
-            continue
-        
-        # Upload to Supabase
-        public_url = upload_to_supabase(temp_file, alt_text)
-        
-        if not public_url:
-            continue
-        
-        # Match to database company
-        bpo_id = match_company_to_db(alt_text)
-        
-        if bpo_id:
-            # Update database
-            update_bpo_media(bpo_id, public_url)
-            processed += 1
-        
-        # Clean up temp file
-        temp_file.unlink()
-        
-        # Rate limiting
-        time.sleep(0.5)
+        candidates.append({
+            'name': alt_text,
+            'url': image_url,
+            'file': str(temp_dir / f"logo_{len(candidates)}{file_ext}"),
+        })
+    
+    # Step 3: download -> dedupe -> render -> upload -> record, all running at once
+    print(f"\n🚚 Processing {len(candidates)} logos through the stage pipeline...")
+    host_slot = HostLimiter(DEFAULT_PER_HOST)
+    duplicates = DuplicateIndex()
+    uploaded = {}
+    waiting = {}
+    originals = {}
+    pending_rows = []
+    totals = {'processed': 0, 'recorded': 0, 'duplicates': 0, 'failed': 0}
+    
+    def download(item):
+        with host_slot(item['url']):
+            return item if download_image(item['url'], item['file'], cache) else None
+    
+    def dedupe(item):
+        # The first copy of a logo is kept; later copies reuse its upload
+        item['duplicate_of'] = duplicates.add(item['file'])
+        if item['duplicate_of']:
+            totals['duplicates'] += 1
+            Path(item['file']).unlink()
+        else:
+            originals[item['file']] = item['name']
+        return item
+    
+    def render(item):
+        if not item['duplicate_of']:
+            job = (item['file'], storage_stem(item['name']), str(temp_dir / 'derived'), DERIVATIVE_WIDTHS, DERIVATIVE_FORMATS)
+            _, item['derivatives'], error = render_pool.submit(render_job, job).result()
+            if error:
+                print(f"  ⚠️  Could not process {item['file']}: {error}")
+        return item
+    
+    def upload(item):
+        item['bpo_id'] = match_company_to_db(matcher, item['name'])
+        if item['duplicate_of']:
+            return item
+        public_url = upload_to_supabase(item['file'], item['name'], cache)
+        item['media'] = None
+        if public_url:
+            item['media'] = [('logo', public_url)]
+            try:
+                item['media'] += upload_derivatives(supabase, item['name'], item.get('derivatives', []), cache)
+            except Exception as e:
+                print(f"  ⚠️  Derivatives failed for {item['name']}: {e}")
+        Path(item['file']).unlink()
+        return item
+    
+    def flush():
+        if pending_rows:
+            totals['recorded'] += len(upsert_media(supabase, pending_rows))
+            pending_rows.clear()
+    
+    def link(bpo_id, media):
+        pending_rows.extend(media_row(bpo_id, media_type, url) for media_type, url in media)
+        totals['processed'] += 1
+        if len(pending_rows) >= RECORD_BATCH:
+            flush()
+    
+    def settle(source, bpo_id, name):
+        # A duplicate shares its original's upload, or fails with it
+        if uploaded.get(source):
+            link(bpo_id, uploaded[source])
+        else:
+            totals['failed'] += 1
+            print(f"  ❌ {name}: same logo as {originals[source]}, which failed")
+    
+    def record(item):
+        # Rows go out in batches while uploads are still running; duplicates wait for their original
+        source = item['duplicate_of'] or item['file']
+        if not item['duplicate_of']:
+            uploaded[source] = item['media']
+            if not item['media']:
+                totals['failed'] += 1
+            for bpo_id, name in waiting.pop(source, []):
+                settle(source, bpo_id, name)
+            if item['bpo_id'] and item['media']:
+                link(item['bpo_id'], item['media'])
+        elif item['bpo_id']:
+            if source in uploaded:
+                settle(source, item['bpo_id'], item['name'])
+            else:
+                waiting.setdefault(source, []).append((item['bpo_id'], item['name']))
+        return None
+    
+    def finish_record():
+        # An original dropped by a render or upload error never reaches record; its duplicates fail with it
+        for source, entries in waiting.items():
+            for bpo_id, name in entries:
+                settle(source, bpo_id, name)
+        waiting.clear()
+        flush()
+    
+    with ProcessPoolExecutor(max_workers=RENDER_WORKERS) as render_pool:
+        report = run_stages(candidates, [
+            Stage('download', download, workers=DOWNLOAD_WORKERS),
+            Stage('dedupe', dedupe, workers=1),
+            Stage('render', render, workers=RENDER_WORKERS),
+            Stage('upload', upload, workers=UPLOAD_WORKERS),
+            Stage('record', record, workers=1, finish=finish_record),
+        ])
+    
+    print(f"\n⏱️  Stage report:")
+    print_report(report)
+    print(f"🟰 {totals['duplicates']} duplicate logos reused another upload")
+    if totals['failed']:
+        print(f"⚠️  {totals['failed']} logos were not recorded, duplicates of a failed logo included")
+    print(f"💾 Recorded {totals['recorded']} media rows")
+    processed = totals['processed']
+    
+    cache.save()
     
     print(f"\n{'='*80}")
     print(f"✅ Completed! Processed {processed} logos")
+    print(f"🗄️  Cache: {cache.summary()}")
     print(f"{'='*80}")
     
     # Cleanup
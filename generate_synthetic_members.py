@@ -0,0 +1,181 @@
+"""
+Generate a deterministic synthetic HIMAP member directory for load testing
+
+Usage:
+    python generate_synthetic_members.py --count 100000 --seed 42 --output members.jsonl
+    python generate_synthetic_members.py --count 5000 --format csv --output members.csv
+
+Members are yielded one at a time, so any count streams in constant memory.
+The same seed always produces the same directory.
+"""
+import sys
+import csv
+import json
+import random
+import argparse
+
+# City -> (province, weight); weights roughly follow where healthcare BPO seats are
+CITY_DISTRIBUTION = {
+    "Makati": ("Metro Manila", 16),
+    "Bonifacio Global City": ("Metro Manila", 15),
+    "Quezon City": ("Metro Manila", 13),
+    "Pasig": ("Metro Manila", 9),
+    "Ortigas": ("Metro Manila", 8),
+    "Manila": ("Metro Manila", 6),
+    "Alabang": ("Metro Manila", 5),
+    "Cebu": ("Cebu", 10),
+    "Davao": ("Davao del Sur", 5),
+    "Clark": ("Pampanga", 4),
+    "Iloilo": ("Iloilo", 4),
+    "Bacolod": ("Negros Occidental", 3),
+    "Baguio": ("Benguet", 2),
+}
+
+# Service category -> weight; the first service drawn becomes the primary one
+SERVICE_DISTRIBUTION = {
+    "Revenue Cycle Management": 18,
+    "Medical Billing": 16,
+    "Medical Coding": 15,
+    "Claims Processing": 13,
+    "Patient Support Services": 11,
+    "Prior Authorization": 9,
+    "Clinical Documentation": 7,
+    "Healthcare IT": 7,
+    "Medical Transcription": 4,
+}
+
+# Accreditation -> probability a member holds it at all
+ACCREDITATION_DISTRIBUTION = {
+    "HIPAA": 0.85,
+    "ISO 27001": 0.55,
+    "SOC 2": 0.35,
+    "ISO 9001": 0.30,
+    "PCI DSS": 0.15,
+    "HITRUST": 0.10,
+}
+
+# State of an accreditation the member holds
+ACCREDITATION_STATES = {"active": 75, "pending": 15, "expired": 10}
+
+DELIVERY_MODELS = {"Offshore": 55, "Hybrid": 35, "Onsite": 10}
+
+NAME_PREFIXES = [
+    "Apex", "Bayani", "Blue Harbor", "Cardinal", "Coral", "Evergreen", "Golden Mango",
+    "Harbor", "Island", "Luzon", "Malaya", "Meridian", "Narra", "Pacific", "Pinnacle",
+    "Sampaguita", "Summit", "Tala", "Vista", "Visayan",
+]
+NAME_CORES = [
+    "Health", "Care", "MedServe", "Claims", "Revenue", "Clinical", "Medica", "Wellness",
+    "HealthWorks", "CareLink", "MedOps", "Remedy",
+]
+NAME_SUFFIXES = ["Solutions", "Services", "Global", "Outsourcing", "Partners", "BPO", "Inc.", "Philippines"]
+
+CSV_FIELDS = [
+    "name", "website", "city", "province", "total_employees", "healthcare_fte_count",
+    "services", "delivery_model", "no_of_active_clients", "years_serving_healthcare",
+    "accreditations",
+]
+
+
+def weighted_choice(rng, distribution):
+    """Pick one key of a {value: weight} mapping"""
+    return rng.choices(list(distribution), weights=list(distribution.values()))[0]
+
+
+def pick_services(rng):
+    """Draw 1-5 distinct services, most members offering 2-3"""
+    count = min(len(SERVICE_DISTRIBUTION), max(1, round(rng.gauss(2.6, 0.9))))
+    remaining = dict(SERVICE_DISTRIBUTION)
+    services = []
+    for _ in range(count):
+        service = weighted_choice(rng, remaining)
+        services.append(service)
+        del remaining[service]
+    return services
+
+
+def pick_accreditations(rng):
+    """Draw the accreditations a member holds, each with its current state"""
+    return [
+        {"name": name, "status": weighted_choice(rng, ACCREDITATION_STATES)}
+        for name, probability in ACCREDITATION_DISTRIBUTION.items()
+        if rng.random() < probability
+    ]
+
+
+def generate_members(count, seed=0):
+    """Yield `count` synthetic members in the same shape as populate_members.companies"""
+    rng = random.Random(seed)
+    name_counts = {}
+
+    for idx in range(1, count + 1):
+        base_name = f"{rng.choice(NAME_PREFIXES)} {rng.choice(NAME_CORES)} {rng.choice(NAME_SUFFIXES)}"
+        name_counts[base_name] = name_counts.get(base_name, 0) + 1
+        name = base_name if name_counts[base_name] == 1 else f"{base_name} {name_counts[base_name]}"
+
+        # Log-normal headcount: most members are a few hundred seats, a few are tens of thousands
+        total_employees = int(min(60000, max(50, rng.lognormvariate(6.4, 1.1))))
+        healthcare_fte_count = max(10, int(total_employees * rng.betavariate(2.5, 2.0)))
+
+        city = weighted_choice(rng, {city: weight for city, (_, weight) in CITY_DISTRIBUTION.items()})
+        slug = "".join(ch for ch in base_name.lower() if ch.isalnum())
+
+        yield {
+            "name": name,
+            "website": f"https://www.{slug}{idx}.example.com/",
+            "city": city,
+            "province": CITY_DISTRIBUTION[city][0],
+            "total_employees": total_employees,
+            "healthcare_fte_count": healthcare_fte_count,
+            "services": pick_services(rng),
+            "delivery_model": weighted_choice(rng, DELIVERY_MODELS),
+            "no_of_active_clients": max(1, int(rng.paretovariate(1.6) * 4)),
+            "years_serving_healthcare": min(30, max(1, int(rng.gammavariate(2.0, 4.0)))),
+            "accreditations": pick_accreditations(rng),
+        }
+
+
+def to_csv_row(member):
+    """Flatten list fields so a member fits in one CSV row"""
+    row = dict(member)
+    row["services"] = ";".join(member["services"])
+    row["accreditations"] = ";".join(f"{a['name']}:{a['status']}" for a in member["accreditations"])
+    return row
+
+
+def write_members(members, output, file_format="jsonl"):
+    """Stream members to an open text file as JSONL or CSV"""
+    written = 0
+    if file_format == "csv":
+        writer = csv.DictWriter(output, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for member in members:
+            writer.writerow(to_csv_row(member))
+            written += 1
+    else:
+        for member in members:
+            output.write(json.dumps(member) + "\n")
+            written += 1
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic HIMAP member directory")
+    parser.add_argument("--count", type=int, default=1000, help="Number of members (default: 1000)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl", help="Output format (default: jsonl)")
+    parser.add_argument("--output", help="Output file (default: stdout)")
+    args = parser.parse_args()
+
+    members = generate_members(args.count, args.seed)
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            written = write_members(members, f, args.format)
+        print(f"✅ Wrote {written} synthetic members to {args.output}", file=sys.stderr)
+    else:
+        write_members(members, sys.stdout, args.format)
+
+
+if __name__ == "__main__":
+    main()
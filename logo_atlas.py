@@ -0,0 +1,285 @@
+"""
+Pack the primary member logos into a few sprite sheets for the directory grid
+
+Usage:
+    python logo_atlas.py                 # rebuild changed sheets, upload them, record offsets
+    python logo_atlas.py --dry-run       # build locally only
+    python logo_atlas.py --rebuild       # forget slot assignments and repack everything
+
+Every logo in bpo_media (the 512px WebP derivative when there is one, else
+the original) is trimmed and letterboxed into a CELL_SIZE cell on a sheet
+of SHEET_COLUMNS x SHEET_ROWS cells. Each member keeps its slot between
+runs and new logos take the first free one, so a changed, added or removed
+logo re-renders and re-uploads only its own sheet. Sheets are named by a
+hash of their contents (atlas/logo-atlas-<n>.<hash>.webp) and can be
+cached forever.
+
+Offsets are kept in ATLAS_DIR/atlas.json and recorded per member in
+bpo_media as media_type 'logo_atlas', with a media fragment in file_url:
+    .../atlas/logo-atlas-0.<hash>.webp#xywh=448,128,448,128&sheet=1792x2048
+himap-directory.html already loads every logo% row, so it draws sprites
+without an extra request. atlas.json is written only after the sheets are
+uploaded and their rows recorded (never on --dry-run), so a dry or failed
+run leaves them dirty for the next one. Source downloads go through
+LogoCache, so an unchanged logo costs a 304.
+"""
+import os
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from dotenv import load_dotenv
+from PIL import Image
+from supabase_backend import get_client
+from logo_cache import LogoCache
+from logo_downloader import download_all
+from logo_derivatives import trim, SAVE_OPTIONS
+from bpo_media import media_row, upsert_media
+
+# Load environment variables
+load_dotenv()
+
+# Configuration
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+
+BUCKET_NAME = 'bpo-assets'
+ATLAS_FOLDER = 'atlas'
+ATLAS_MEDIA_TYPE = 'logo_atlas'
+
+# Source media types, preferred first
+SOURCE_MEDIA_TYPES = ['logo_512w_webp', 'logo']
+
+# One cell is drawn about 224x64 CSS px in the grid; cells are 2x for high-DPI screens
+CELL_SIZE = (448, 128)
+CELL_PADDING = 8
+SHEET_COLUMNS = 4
+SHEET_ROWS = 16
+SHEET_CAPACITY = SHEET_COLUMNS * SHEET_ROWS
+
+DEFAULT_ATLAS_DIR = 'logo_atlas'
+
+# Rows per request; PostgREST caps a response at 1000 rows by default
+PAGE_SIZE = 1000
+
+
+def sheet_size():
+    return CELL_SIZE[0] * SHEET_COLUMNS, CELL_SIZE[1] * SHEET_ROWS
+
+
+def slot_offset(slot):
+    """(x, y) of a slot's cell within its sheet"""
+    index = slot % SHEET_CAPACITY
+    return (index % SHEET_COLUMNS) * CELL_SIZE[0], (index // SHEET_COLUMNS) * CELL_SIZE[1]
+
+
+def fragment(slot):
+    """Media fragment locating a slot, e.g. #xywh=448,0,448,128&sheet=1792x2048"""
+    x, y = slot_offset(slot)
+    width, height = sheet_size()
+    return f"#xywh={x},{y},{CELL_SIZE[0]},{CELL_SIZE[1]}&sheet={width}x{height}"
+
+
+def fit_cell(path):
+    """A logo trimmed and centered in a transparent cell"""
+    with Image.open(path) as original:
+        original.load()
+        image = trim(original)
+    box = (CELL_SIZE[0] - 2 * CELL_PADDING, CELL_SIZE[1] - 2 * CELL_PADDING)
+    scale = min(box[0] / image.width, box[1] / image.height)
+    if scale < 1:
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS)
+    cell = Image.new('RGBA', CELL_SIZE, (0, 0, 0, 0))
+    cell.paste(image, ((CELL_SIZE[0] - image.width) // 2, (CELL_SIZE[1] - image.height) // 2))
+    return cell
+
+
+def load_sources(client):
+    """{bpo_id: file_url} of each member's preferred primary logo, read one page at a time"""
+    rows, start = [], 0
+    while True:
+        response = (
+            client.table('bpo_media')
+            .select('bpo_id, media_type, file_url')
+            .in_('media_type', SOURCE_MEDIA_TYPES)
+            .eq('is_primary', True)
+            .order('id')
+            .range(start, start + PAGE_SIZE - 1)
+            .execute()
+        )
+        rows.extend(response.data)
+        if len(response.data) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+
+    sources = {}
+    for row in sorted(rows, key=lambda r: SOURCE_MEDIA_TYPES.index(r['media_type']), reverse=True):
+        sources[row['bpo_id']] = row['file_url']
+    return sources
+
+
+class LogoAtlas:
+    """Slot assignments and sheet digests, persisted in ATLAS_DIR/atlas.json"""
+
+    def __init__(self, root=None):
+        self.root = Path(root or os.getenv('ATLAS_DIR', DEFAULT_ATLAS_DIR))
+        self.sources_dir = self.root / 'sources'
+        self.state_path = self.root / 'atlas.json'
+        self.state = {'cell': list(CELL_SIZE), 'columns': SHEET_COLUMNS, 'rows': SHEET_ROWS, 'logos': {}, 'sheets': {}}
+        if self.state_path.exists():
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            # A different layout invalidates every slot
+            if (state.get('cell'), state.get('columns'), state.get('rows')) == (list(CELL_SIZE), SHEET_COLUMNS, SHEET_ROWS):
+                self.state = state
+
+    def reset(self):
+        self.state['logos'] = {}
+        self.state['sheets'] = {}
+
+    def assign(self, hashes):
+        """Give every bpo_id in {bpo_id: sha256} a slot, keeping existing ones; returns the dirty sheet numbers"""
+        logos = self.state['logos']
+        dirty = set()
+        for bpo_id in [b for b in logos if b not in hashes]:
+            dirty.add(logos.pop(bpo_id)['slot'] // SHEET_CAPACITY)
+
+        taken = {entry['slot'] for entry in logos.values()}
+        free = (slot for slot in range(len(hashes) + len(taken) + 1) if slot not in taken)
+        for bpo_id in sorted(hashes):
+            entry = logos.get(bpo_id)
+            if entry is None:
+                entry = logos[bpo_id] = {'slot': next(free), 'sha256': None}
+            if entry['sha256'] != hashes[bpo_id]:
+                entry['sha256'] = hashes[bpo_id]
+                dirty.add(entry['slot'] // SHEET_CAPACITY)
+
+        # Sheets never rendered (or whose file is gone) are dirty too
+        for sheet in {entry['slot'] // SHEET_CAPACITY for entry in logos.values()}:
+            recorded = self.state['sheets'].get(str(sheet))
+            if not recorded or not (self.root / recorded['file']).exists():
+                dirty.add(sheet)
+        return dirty
+
+    def sheet_members(self, sheet):
+        return {
+            bpo_id: entry for bpo_id, entry in self.state['logos'].items()
+            if entry['slot'] // SHEET_CAPACITY == sheet
+        }
+
+    def render(self, sheet, cache):
+        """Draw one sheet from the cached sources; returns its file name"""
+        members = self.sheet_members(sheet)
+        if not members:
+            previous = self.state['sheets'].pop(str(sheet), None)
+            if previous and (self.root / previous['file']).exists():
+                (self.root / previous['file']).unlink()
+            return None
+        canvas = Image.new('RGBA', sheet_size(), (0, 0, 0, 0))
+        for bpo_id, entry in members.items():
+            try:
+                canvas.paste(fit_cell(cache.object_path(entry['sha256'])), slot_offset(entry['slot']))
+            except Exception as e:
+                print(f"  ⚠️  Could not draw logo for {bpo_id}: {e}")
+
+        layout = sorted((entry['slot'], entry['sha256']) for entry in members.values())
+        digest = hashlib.sha256(json.dumps(layout).encode('utf-8')).hexdigest()[:12]
+        name = f"logo-atlas-{sheet}.{digest}.webp"
+        self.root.mkdir(parents=True, exist_ok=True)
+        canvas.save(self.root / name, 'WEBP', **SAVE_OPTIONS['webp'])
+        previous = self.state['sheets'].get(str(sheet))
+        if previous and previous['file'] != name and (self.root / previous['file']).exists():
+            (self.root / previous['file']).unlink()
+        self.state['sheets'][str(sheet)] = {'file': name, 'logos': len(members)}
+        return name
+
+    def save(self):
+        """Atomically rewrite atlas.json"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+
+def build_atlas(supabase, atlas, cache, dry_run=False):
+    """Refresh sources, re-render dirty sheets and record offsets; returns the re-rendered sheet numbers"""
+    sources = load_sources(supabase)
+    print(f"📥 {len(sources)} members with a primary logo")
+
+    atlas.sources_dir.mkdir(parents=True, exist_ok=True)
+    jobs = [(url, atlas.sources_dir / bpo_id) for bpo_id, url in sources.items()]
+    hashes = {}
+    for (bpo_id, (url, path)), ok in zip(zip(sources, jobs), download_all(jobs, cache.fetch)):
+        if ok:
+            hashes[bpo_id] = cache.store_file(path)
+        elif bpo_id in atlas.state['logos']:
+            # Keep the last good copy rather than dropping the logo from the sheet
+            hashes[bpo_id] = atlas.state['logos'][bpo_id]['sha256']
+    cache.save()
+
+    previous = set(atlas.state['logos'])
+    dirty = atlas.assign(hashes)
+    for sheet in sorted(dirty):
+        name = atlas.render(sheet, cache)
+        print(f"  🧩 Sheet {sheet}: {name or 'empty, dropped'}")
+
+    # atlas.json only records sheets that were uploaded and recorded, so a
+    # dry run or a failed upload leaves them dirty for the next run
+    if dry_run or not dirty:
+        return dirty
+
+    bucket = supabase.storage.from_(BUCKET_NAME)
+    for sheet in sorted(dirty):
+        recorded = atlas.state['sheets'].get(str(sheet))
+        if recorded:
+            with open(atlas.root / recorded['file'], 'rb') as f:
+                bucket.upload(
+                    f"{ATLAS_FOLDER}/{recorded['file']}",
+                    f.read(),
+                    {'content-type': 'image/webp', 'cache-control': '31536000', 'upsert': 'true'}
+                )
+
+    rows = []
+    for bpo_id, entry in atlas.state['logos'].items():
+        sheet = entry['slot'] // SHEET_CAPACITY
+        if sheet in dirty:
+            url = bucket.get_public_url(f"{ATLAS_FOLDER}/{atlas.state['sheets'][str(sheet)]['file']}")
+            rows.append(media_row(bpo_id, ATLAS_MEDIA_TYPE, url + fragment(entry['slot'])))
+    upsert_media(supabase, rows)
+
+    removed = sorted(previous - set(atlas.state['logos']))
+    if removed:
+        supabase.table('bpo_media').delete().eq('media_type', ATLAS_MEDIA_TYPE).in_('bpo_id', removed).execute()
+    print(f"💾 Recorded {len(rows)} atlas offsets, removed {len(removed)}")
+    atlas.save()
+    return dirty
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build logo sprite sheets for the member directory")
+    parser.add_argument("--dry-run", action="store_true", help="Build sheets locally without uploading or recording")
+    parser.add_argument("--rebuild", action="store_true", help="Discard slot assignments and repack every sheet")
+    args = parser.parse_args()
+
+    supabase = get_client(SUPABASE_URL, SUPABASE_KEY)
+    atlas = LogoAtlas()
+    if args.rebuild:
+        atlas.reset()
+    cache = LogoCache()
+
+    print("=" * 80)
+    print("HIMAP Logo Atlas")
+    print("=" * 80)
+
+    dirty = build_atlas(supabase, atlas, cache, args.dry_run)
+
+    print(f"\n{'='*80}")
+    print(f"✅ {len(atlas.state['logos'])} logos on {len(atlas.state['sheets'])} sheet(s), "
+          f"{len(dirty)} re-rendered -> {atlas.root}/")
+    print(f"🗄️  Cache: {cache.summary()}")
+    print(f"{'='*80}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Content-addressed local store for logos, with conditional re-fetch and upload skipping
+
+Layout (LOGO_CACHE_DIR, default .logo_cache/):
+    objects/ab/ab12...ef      file bytes, named by their SHA-256
+    manifest.json             {"sources": {url: {sha256, etag, last_modified, size, fetched_at}},
+                               "uploads": {bucket/path: {sha256, size, uploaded_at}}}
+
+fetch() sends If-None-Match / If-Modified-Since from the manifest, so an
+unchanged logo costs a 304 and no body. needs_upload() skips an upload
+when the manifest says the same SHA-256 went to that storage path and the
+bucket still holds an object of that size (checked with one list() call
+per folder per run). A re-sync with no changes moves almost no bytes.
+
+One cache is shared by the download and upload worker threads: the
+manifest, stats and listed folders are only touched under its locks, and
+objects are written to a temporary name and renamed into place.
+"""
+import os
+import json
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from logo_downloader import session, stream_to_file, REQUEST_TIMEOUT
+
+DEFAULT_CACHE_DIR = '.logo_cache'
+
+# Objects per storage list() page
+LIST_PAGE_SIZE = 1000
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class LogoCache:
+    """SHA-256 object store plus manifest of source validators and uploaded hashes"""
+
+    def __init__(self, root=None):
+        self.root = Path(root or os.getenv('LOGO_CACHE_DIR', DEFAULT_CACHE_DIR))
+        self.objects = self.root / 'objects'
+        self.manifest_path = self.root / 'manifest.json'
+        self.lock = threading.Lock()
+        # Held while a folder is listed, so concurrent uploads list it once
+        self.remote_lock = threading.Lock()
+        self.remote = {}
+        self.stats = {'not_modified': 0, 'fetched': 0, 'bytes_fetched': 0, 'uploads_skipped': 0, 'uploads': 0}
+
+        self.manifest = {'sources': {}, 'uploads': {}}
+        if self.manifest_path.exists():
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest.update(json.load(f))
+
+    def object_path(self, sha):
+        return self.objects / sha[:2] / sha
+
+    def add_object(self, file_path, sha):
+        """Copy a file into the object store under its hash, unless it is already there"""
+        path = self.object_path(sha)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{sha}.{threading.get_ident()}.tmp")
+            shutil.copyfile(file_path, tmp)
+            os.replace(tmp, path)
+
+    def store_file(self, file_path):
+        """Add a local file to the object store and return its hash"""
+        sha = sha256_file(file_path)
+        self.add_object(file_path, sha)
+        return sha
+
+    def fetch(self, url, filename):
+        """Conditionally download url into filename, reusing the cached copy on 304"""
+        with self.lock:
+            entry = self.manifest['sources'].get(url)
+        cached = entry and self.object_path(entry['sha256']).exists()
+
+        headers = {}
+        if cached and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if cached and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        response = session.get(url, timeout=REQUEST_TIMEOUT, headers=headers, stream=True)
+        if response.status_code == 304 and cached:
+            response.close()
+            shutil.copyfile(self.object_path(entry['sha256']), filename)
+            with self.lock:
+                self.stats['not_modified'] += 1
+            return True
+
+        response.raise_for_status()
+        body = stream_to_file(response, filename)
+        self.add_object(filename, body['sha256'])
+        with self.lock:
+            self.manifest['sources'][url] = {
+                'sha256': body['sha256'],
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'size': body['size'],
+                'mime': body['mime'],
+                'fetched_at': now_iso(),
+            }
+            self.stats['fetched'] += 1
+            self.stats['bytes_fetched'] += body['size']
+        return True
+
+    def remote_sizes(self, bucket, bucket_name, folder):
+        """{name: size} of the objects in a bucket folder, listed once per run"""
+        key = (bucket_name, folder)
+        with self.remote_lock:
+            if key not in self.remote:
+                sizes, offset = {}, 0
+                while True:
+                    page = bucket.list(folder, {'limit': LIST_PAGE_SIZE, 'offset': offset})
+                    for item in page:
+                        sizes[item['name']] = (item.get('metadata') or {}).get('size')
+                    if len(page) < LIST_PAGE_SIZE:
+                        break
+                    offset += LIST_PAGE_SIZE
+                self.remote[key] = sizes
+            return self.remote[key]
+
+    def needs_upload(self, bucket, bucket_name, storage_path, file_path):
+        """(needed, sha) - False when this exact content is already at storage_path"""
+        sha = self.store_file(file_path)
+        with self.lock:
+            uploaded = self.manifest['uploads'].get(f"{bucket_name}/{storage_path}")
+        if not uploaded or uploaded['sha256'] != sha:
+            return True, sha
+
+        folder, _, name = storage_path.rpartition('/')
+        try:
+            remote_size = self.remote_sizes(bucket, bucket_name, folder).get(name)
+        except Exception:
+            return True, sha
+        if remote_size is None or remote_size != uploaded['size']:
+            return True, sha
+
+        with self.lock:
+            self.stats['uploads_skipped'] += 1
+        return False, sha
+
+    def record_upload(self, bucket_name, storage_path, sha):
+        size = self.object_path(sha).stat().st_size
+        with self.lock:
+            self.manifest['uploads'][f"{bucket_name}/{storage_path}"] = {
+                'sha256': sha,
+                'size': size,
+                'uploaded_at': now_iso(),
+            }
+            self.stats['uploads'] += 1
+        folder, _, name = storage_path.rpartition('/')
+        with self.remote_lock:
+            if (bucket_name, folder) in self.remote:
+                self.remote[(bucket_name, folder)][name] = size
+
+    def save(self):
+        """Atomically rewrite the manifest"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix('.tmp')
+        with self.lock:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.manifest, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.manifest_path)
+
+    def summary(self):
+        s = self.stats
+        return (f"{s['fetched']} fetched ({s['bytes_fetched'] / 1024:.1f} KB), {s['not_modified']} not modified, "
+                f"{s['uploads']} uploaded, {s['uploads_skipped']} uploads skipped")
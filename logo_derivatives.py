@@ -0,0 +1,202 @@
+"""
+Trim logos and render WebP/AVIF derivatives at fixed widths for the directory grid
+
+Usage:
+    python logo_derivatives.py                       # downloaded_logos/ -> logo_derivatives/
+    python logo_derivatives.py --widths 128 256 --workers 4
+
+Each logo is trimmed of its transparent or flat-colour border, then saved
+at every width in DERIVATIVE_WIDTHS it can fill as WebP and, when Pillow
+has AVIF support, AVIF. Logos are never upscaled: a width wider than the
+trimmed logo is skipped, so every <name>_<width>w file is exactly that
+wide, and a logo narrower than all of them is served as the original. Logos are processed in a process pool, one
+per CPU core by default, and outputs newer than their source are reused.
+
+The upload scripts store derivatives next to the original in bpo-assets
+(logos/derived/<name>_<width>w.<format>) and record each one in bpo_media
+with its own media_type, e.g. logo_256w_webp, which himap-directory.html
+turns into a <picture> srcset.
+"""
+import os
+import re
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageChops, features
+
+# Rendered widths in pixels; the grid shows logos about 70px tall, 1x-3x wide
+DERIVATIVE_WIDTHS = [128, 256, 512]
+
+# Output formats, best compression first; AVIF needs a Pillow built with libavif
+DERIVATIVE_FORMATS = [fmt for fmt in ['avif', 'webp'] if features.check(fmt)]
+
+# Encoder settings per format
+SAVE_OPTIONS = {
+    'webp': {'quality': 82, 'method': 4},
+    'avif': {'quality': 55, 'speed': 8},
+}
+
+CONTENT_TYPES = {'webp': 'image/webp', 'avif': 'image/avif'}
+
+# Channel difference still treated as background when trimming
+TRIM_TOLERANCE = 16
+
+# Transparent margin kept around the trimmed logo, as a fraction of its size
+TRIM_PADDING = 0.04
+
+DEFAULT_OUTPUT_DIR = Path('logo_derivatives')
+
+
+def media_type(width, fmt):
+    """bpo_media.media_type for a derivative, e.g. logo_256w_webp"""
+    return f"logo_{width}w_{fmt}"
+
+
+def storage_stem(company_name):
+    """Same safe file name the upload scripts use for the original"""
+    return re.sub(r'[^a-zA-Z0-9_-]', '_', company_name.lower())
+
+
+def trim(image, tolerance=TRIM_TOLERANCE):
+    """Crop away a transparent or flat-colour border, keeping a small transparent margin"""
+    rgba = image.convert('RGBA')
+    alpha = rgba.getchannel('A')
+    if alpha.getextrema()[0] < 255:
+        mask = alpha.point(lambda a: 255 if a > tolerance else 0)
+    else:
+        background = Image.new('RGBA', rgba.size, rgba.getpixel((0, 0)))
+        mask = ImageChops.difference(rgba, background).convert('L').point(lambda v: 255 if v > tolerance else 0)
+    bbox = mask.getbbox()
+    if not bbox:
+        return rgba
+    cropped = rgba.crop(bbox)
+
+    pad = int(max(cropped.size) * TRIM_PADDING)
+    if not pad:
+        return cropped
+    padded = Image.new('RGBA', (cropped.width + 2 * pad, cropped.height + 2 * pad), (0, 0, 0, 0))
+    padded.paste(cropped, (pad, pad))
+    return padded
+
+
+def derivative_path(output_dir, stem, width, fmt):
+    return Path(output_dir) / f"{stem}_{width}w.{fmt}"
+
+
+def rendered_width(path):
+    """Pixel width of an existing derivative, read from its header"""
+    try:
+        with Image.open(path) as image:
+            return image.width
+    except Exception:
+        return None
+
+
+def render_derivatives(source, stem, output_dir, widths=DERIVATIVE_WIDTHS, formats=DERIVATIVE_FORMATS):
+    """Trim one logo and write every width/format it is wide enough for; returns [{media_type, width, format, path, bytes}]"""
+    source = Path(source)
+    targets = [(w, fmt, derivative_path(output_dir, stem, w, fmt)) for w in widths for fmt in formats]
+    source_mtime = source.stat().st_mtime
+
+    image = None
+    results = []
+    for width, fmt, path in targets:
+        if not (path.exists() and path.stat().st_mtime >= source_mtime and rendered_width(path) == width):
+            if image is None:
+                with Image.open(source) as original:
+                    original.load()
+                    image = trim(original)
+            # A logo narrower than the target is never upscaled, and a native-size file labeled {width}w would lie to the srcset
+            if image.width < width:
+                path.unlink(missing_ok=True)
+                continue
+            scaled = image
+            if image.width > width:
+                scaled = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            scaled.save(path, fmt.upper(), **SAVE_OPTIONS[fmt])
+        results.append({
+            'media_type': media_type(width, fmt),
+            'width': width,
+            'format': fmt,
+            'path': str(path),
+            'bytes': path.stat().st_size,
+        })
+    return results
+
+
+def render_job(job):
+    source, stem, output_dir, widths, formats = job
+    try:
+        return source, render_derivatives(source, stem, output_dir, widths, formats), None
+    except Exception as e:
+        return source, [], str(e)
+
+
+def build_derivatives(sources, output_dir=DEFAULT_OUTPUT_DIR, widths=DERIVATIVE_WIDTHS,
+                      formats=DERIVATIVE_FORMATS, workers=None):
+    """Render derivatives for [(source_path, stem)] across a process pool; returns {source_path: [derivative]}"""
+    jobs = [(str(source), stem, str(output_dir), list(widths), list(formats)) for source, stem in sources]
+    if not jobs:
+        return {}
+
+    derivatives = {}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for source, results, error in pool.map(render_job, jobs, chunksize=max(1, len(jobs) // 32)):
+            if error:
+                print(f"  ⚠️  Could not process {source}: {error}")
+            derivatives[source] = results
+    return derivatives
+
+
+def upload_derivatives(supabase, company_name, derivatives, cache=None, bucket_name='bpo-assets'):
+    """Upload one logo's derivatives; returns [(media_type, public_url)] for those that made it"""
+    bucket = supabase.storage.from_(bucket_name)
+    uploaded = []
+    for derivative in derivatives:
+        storage_path = f"logos/derived/{storage_stem(company_name)}_{derivative['width']}w.{derivative['format']}"
+
+        # Each derivative stands alone, so a format the bucket rejects doesn't drop the others
+        try:
+            needed, sha = cache.needs_upload(bucket, bucket_name, storage_path, derivative['path']) if cache else (True, None)
+            if needed:
+                with open(derivative['path'], 'rb') as f:
+                    bucket.upload(
+                        storage_path,
+                        f.read(),
+                        {'content-type': CONTENT_TYPES[derivative['format']], 'upsert': 'true'}
+                    )
+                if cache:
+                    cache.record_upload(bucket_name, storage_path, sha)
+        except Exception as e:
+            print(f"  ⚠️  Could not upload {storage_path}: {e}")
+            continue
+        uploaded.append((derivative['media_type'], bucket.get_public_url(storage_path)))
+    return uploaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render trimmed WebP/AVIF logo derivatives")
+    parser.add_argument("--input-dir", default="downloaded_logos", help="Directory of original logos (default: downloaded_logos)")
+    parser.add_argument("--output-dir", default=str(DEFAULT_OUTPUT_DIR), help=f"Output directory (default: {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument("--widths", type=int, nargs="+", default=DERIVATIVE_WIDTHS, help="Widths in pixels")
+    parser.add_argument("--workers", type=int, help="Processes (default: one per CPU core)")
+    args = parser.parse_args()
+
+    sources = sorted(p for p in Path(args.input_dir).iterdir() if p.suffix.lower() in ('.png', '.jpg', '.jpeg', '.webp'))
+    print(f"🖼️  Rendering {len(sources)} logos at {args.widths} as {', '.join(DERIVATIVE_FORMATS)}...")
+
+    derivatives = build_derivatives([(p, p.stem) for p in sources], args.output_dir, args.widths, workers=args.workers)
+
+    original_bytes = sum(p.stat().st_size for p in sources)
+    print(f"\n{'Format':<8} {'Width':>6} {'Total KB':>10} {'vs originals':>13}")
+    for fmt in DERIVATIVE_FORMATS:
+        for width in args.widths:
+            total = sum(d['bytes'] for results in derivatives.values() for d in results
+                        if d['format'] == fmt and d['width'] == width)
+            print(f"{fmt:<8} {width:>6} {total / 1024:>10.1f} {total / original_bytes:>12.1%}")
+    print(f"\n✅ Originals: {original_bytes / 1024:.1f} KB in {len(sources)} files -> {args.output_dir}/")
+
+
+if __name__ == '__main__':
+    main()
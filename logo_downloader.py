@@ -0,0 +1,194 @@
+"""
+Concurrent logo downloads over one pooled keep-alive HTTP session
+
+Usage:
+    from logo_downloader import download_all
+    results = download_all([(url, path), ...])
+
+A thread pool works through the (url, path) jobs; every thread shares one
+requests.Session whose connection pool keeps connections to each host
+alive, and a per-host semaphore caps how many requests hit the same host
+at once. A progress line is printed per file and a throughput report at
+the end.
+
+Bodies are streamed to a .part file in chunks and only kept once they are
+complete, within the bucket's file_size_limit (create_bucket.py) and
+sniffed as one of its allowed image types; an oversized Content-Length
+aborts before any body is read.
+"""
+import os
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from create_bucket import FILE_SIZE_LIMIT, ALLOWED_MIME_TYPES
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# Downloads in flight overall, and against any single host
+DEFAULT_WORKERS = 16
+DEFAULT_PER_HOST = 4
+
+REQUEST_TIMEOUT = 30
+
+CHUNK_SIZE = 64 * 1024
+
+# Leading bytes -> MIME type, for the formats the bucket accepts
+MAGIC_NUMBERS = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+]
+
+
+class DownloadRejected(Exception):
+    """A download that is too large or not an allowed image type"""
+
+
+# Bytes needed to tell every allowed format apart
+SNIFF_BYTES = 16
+
+
+def sniff_mime(head):
+    """MIME type from the first bytes of a file, or None if unrecognized"""
+    for magic, mime in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return mime
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def allowed_mime(head, allowed_types):
+    """Sniffed MIME type of `head`, raising DownloadRejected unless it is allowed"""
+    mime = sniff_mime(head)
+    if mime not in allowed_types:
+        raise DownloadRejected(f"not an allowed image type (starts with {head[:8]!r})")
+    return mime
+
+
+def stream_to_file(response, filename, max_bytes=FILE_SIZE_LIMIT, allowed_types=ALLOWED_MIME_TYPES):
+    """Stream a response body to filename; returns {'sha256', 'size', 'mime'}"""
+    declared = response.headers.get('Content-Length')
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        response.close()
+        raise DownloadRejected(f"Content-Length {int(declared)} exceeds the {max_bytes} byte limit")
+
+    part = f"{filename}.part"
+    digest = hashlib.sha256()
+    size = 0
+    head = b''
+    mime = None
+    try:
+        with open(part, 'wb') as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if mime is None:
+                    head += chunk[:SNIFF_BYTES - len(head)]
+                    if len(head) >= SNIFF_BYTES:
+                        mime = allowed_mime(head, allowed_types)
+                size += len(chunk)
+                if size > max_bytes:
+                    raise DownloadRejected(f"body exceeds the {max_bytes} byte limit")
+                digest.update(chunk)
+                f.write(chunk)
+        if mime is None:
+            mime = allowed_mime(head, allowed_types)
+        os.replace(part, filename)
+    except BaseException:
+        response.close()
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    return {'sha256': digest.hexdigest(), 'size': size, 'mime': mime}
+
+
+def make_session(pool_size=DEFAULT_WORKERS):
+    """Session with a connection pool large enough for every worker, retrying transient errors"""
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=['GET', 'HEAD'],
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.headers['User-Agent'] = USER_AGENT
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Shared by every download in the process
+session = make_session()
+
+
+def download_file(url, filename):
+    """Stream one URL to a file over the shared session, within the bucket's size and type limits"""
+    response = session.get(url, timeout=REQUEST_TIMEOUT, stream=True)
+    response.raise_for_status()
+    stream_to_file(response, filename)
+    return True
+
+
+class HostLimiter:
+    """One semaphore per host, created on first use"""
+
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self.semaphores = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            return self.semaphores.setdefault(host, threading.BoundedSemaphore(self.per_host))
+
+
+def file_size(path):
+    try:
+        return path.stat().st_size
+    except (OSError, AttributeError):
+        return 0
+
+
+def download_all(jobs, fetch=download_file, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST):
+    """Run fetch(url, path) for every (url, path) job concurrently; returns success flags in job order"""
+    jobs = list(jobs)
+    if not jobs:
+        return []
+
+    host_slot = HostLimiter(per_host)
+    progress = {'done': 0, 'failed': 0, 'bytes': 0}
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def run(job):
+        url, path = job
+        with host_slot(url):
+            try:
+                ok = bool(fetch(url, path))
+            except Exception as e:
+                print(f"  ❌ Error downloading {url}: {e}")
+                ok = False
+        size = file_size(path) if ok else 0
+        with lock:
+            progress['done'] += 1
+            progress['failed'] += int(not ok)
+            progress['bytes'] += size
+            status = f"✅ {path} ({size / 1024:.1f} KB)" if ok else f"❌ {url}"
+            print(f"  [{progress['done']}/{len(jobs)}] {status}")
+        return ok
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run, jobs))
+
+    elapsed = time.perf_counter() - started
+    megabytes = progress['bytes'] / 1024 / 1024
+    print(f"\n📈 Downloaded {len(jobs) - progress['failed']}/{len(jobs)} files, {megabytes:.2f} MB "
+          f"in {elapsed:.2f}s ({len(jobs) / elapsed:.1f} files/s, {megabytes / elapsed:.2f} MB/s, "
+          f"{workers} workers, {per_host} per host)")
+    return results
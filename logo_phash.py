@@ -0,0 +1,204 @@
+"""
+Find duplicate and near-duplicate logos with perceptual hashes
+
+Usage:
+    python logo_phash.py                           # report duplicate groups in downloaded_logos/
+    python logo_phash.py --max-distance 4 --input-dir temp_logos
+
+    from logo_phash import find_duplicates, DuplicateIndex
+    representative = find_duplicates(paths)        # {path: path of the copy to keep}
+    earlier = DuplicateIndex().add(path)           # one at a time; the first copy wins
+
+Each logo is trimmed (logo_derivatives.trim), flattened onto white and
+reduced to a 64-bit aHash and dHash; the bit comparisons for the whole
+corpus run as single NumPy operations. dHashes go into a BK-tree, so each
+logo is compared only with the few hashes within DEFAULT_MAX_DISTANCE
+bits instead of with every other logo, and a candidate counts as a
+duplicate only if its aHash is within the same distance too. Each group keeps its
+largest image (most pixels) as the representative.
+"""
+import argparse
+import threading
+from pathlib import Path
+import numpy as np
+from PIL import Image
+from logo_derivatives import trim
+
+# Bits (of 64) two hashes may differ by and still count as the same logo
+DEFAULT_MAX_DISTANCE = 6
+
+HASH_SIZE = 8
+
+# Gray levels a dHash gradient must exceed; keeps JPEG noise in flat areas from flipping bits
+GRADIENT_TOLERANCE = 4
+
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.webp')
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def load_thumbnails(path):
+    """(aHash input 8x8, dHash input 8x9, pixel count) for one logo, as grayscale arrays"""
+    with Image.open(path) as original:
+        original.load()
+        pixels = original.width * original.height
+        image = trim(original)
+    flat = Image.new('RGBA', image.size, (255, 255, 255, 255))
+    flat.alpha_composite(image)
+    gray = flat.convert('L')
+    small = np.asarray(gray.resize((HASH_SIZE, HASH_SIZE), Image.LANCZOS), dtype=np.float32)
+    wide = np.asarray(gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS), dtype=np.float32)
+    return small, wide, pixels
+
+
+def pack(bits):
+    """(N, 8, 8) booleans -> N 64-bit ints"""
+    packed = np.packbits(bits.reshape(len(bits), -1), axis=1)
+    return [int(value) for value in packed.view('>u8').ravel()]
+
+
+def hash_images(paths):
+    """{path: (ahash, dhash, pixels)} for every readable image, hashed in one vectorized pass"""
+    loaded = []
+    for path in paths:
+        try:
+            loaded.append((str(path),) + load_thumbnails(path))
+        except Exception as e:
+            print(f"  ⚠️  Could not hash {path}: {e}")
+    if not loaded:
+        return {}
+
+    small = np.stack([entry[1] for entry in loaded])
+    wide = np.stack([entry[2] for entry in loaded])
+    ahashes = pack(small > small.mean(axis=(1, 2), keepdims=True))
+    dhashes = pack(wide[:, :, 1:] > wide[:, :, :-1] + GRADIENT_TOLERANCE)
+    return {
+        entry[0]: (ahash, dhash, entry[3])
+        for entry, ahash, dhash in zip(loaded, ahashes, dhashes)
+    }
+
+
+class BKTree:
+    """Metric tree over 64-bit hashes under Hamming distance"""
+
+    def __init__(self):
+        self.root = None
+
+    def add(self, value, item):
+        if self.root is None:
+            self.root = (value, [item], {})
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            if distance not in node[2]:
+                node[2][distance] = (value, [item], {})
+                return
+            node = node[2][distance]
+
+    def search(self, value, radius):
+        """Items whose hash is within `radius` bits of value"""
+        found = []
+        pending = [self.root] if self.root else []
+        while pending:
+            node = pending.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                found.extend(node[1])
+            for edge, child in node[2].items():
+                if distance - radius <= edge <= distance + radius:
+                    pending.append(child)
+        return found
+
+
+def group_duplicates(hashes, max_distance=DEFAULT_MAX_DISTANCE):
+    """Groups (lists of paths, largest first) of two or more near-identical images"""
+    tree = BKTree()
+    for path, (_, dhash, _) in hashes.items():
+        tree.add(dhash, path)
+
+    parent = {path: path for path in hashes}
+
+    def find(path):
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    for path, (ahash, dhash, _) in hashes.items():
+        for other in tree.search(dhash, max_distance):
+            if other != path and hamming(ahash, hashes[other][0]) <= max_distance:
+                parent[find(other)] = find(path)
+
+    groups = {}
+    for path in hashes:
+        groups.setdefault(find(path), []).append(path)
+    return [
+        sorted(members, key=lambda p: (-hashes[p][2], p))
+        for members in groups.values() if len(members) > 1
+    ]
+
+
+class DuplicateIndex:
+    """Incremental duplicate check for logos that arrive one at a time; the first copy seen is kept"""
+
+    def __init__(self, max_distance=DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.tree = BKTree()
+        self.ahashes = {}
+        self.lock = threading.Lock()
+
+    def add(self, path):
+        """Path of an earlier near-identical logo, or None after indexing this one as new"""
+        hashed = hash_images([path]).get(str(path))
+        if not hashed:
+            return None
+        ahash, dhash, _ = hashed
+        with self.lock:
+            for other in self.tree.search(dhash, self.max_distance):
+                if hamming(ahash, self.ahashes[other]) <= self.max_distance:
+                    return other
+            self.tree.add(dhash, str(path))
+            self.ahashes[str(path)] = ahash
+        return None
+
+
+def find_duplicates(paths, max_distance=DEFAULT_MAX_DISTANCE):
+    """{path: representative path} for every duplicate; paths not listed are unique"""
+    representative = {}
+    for group in group_duplicates(hash_images(paths), max_distance):
+        for path in group[1:]:
+            representative[path] = group[0]
+    return representative
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report duplicate and near-duplicate logos")
+    parser.add_argument("--input-dir", default="downloaded_logos", help="Directory of logos (default: downloaded_logos)")
+    parser.add_argument("--max-distance", type=int, default=DEFAULT_MAX_DISTANCE,
+                        help=f"Bits two hashes may differ by (default: {DEFAULT_MAX_DISTANCE})")
+    args = parser.parse_args()
+
+    paths = sorted(p for p in Path(args.input_dir).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    print(f"🔍 Hashing {len(paths)} logos...")
+    hashes = hash_images(paths)
+    groups = group_duplicates(hashes, args.max_distance)
+
+    for group in groups:
+        print(f"\n  🟰 {Path(group[0]).name} (kept)")
+        for path in group[1:]:
+            distance = hamming(hashes[path][1], hashes[group[0]][1])
+            print(f"     {Path(path).name}  ({distance} bits)")
+
+    duplicates = sum(len(group) - 1 for group in groups)
+    wasted = sum(Path(path).stat().st_size for group in groups for path in group[1:])
+    print(f"\n✅ {len(groups)} duplicate groups, {duplicates} redundant files ({wasted / 1024:.1f} KB)")
+
+
+if __name__ == '__main__':
+    main()
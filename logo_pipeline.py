@@ -0,0 +1,419 @@
+"""
+Incremental logo pipeline: scrape -> download -> dedupe -> normalize -> match -> upload -> record
+
+Usage:
+    python logo_pipeline.py                          # mapping file as the source, run what is stale
+    python logo_pipeline.py --source himap --refresh # re-scrape himap.ph with Firecrawl
+    python logo_pipeline.py --until match            # stop before touching storage
+    python logo_pipeline.py --force normalize        # rebuild one stage even if its inputs are unchanged
+    python logo_pipeline.py --status
+
+Every stage writes a JSON artifact to LOGO_PIPELINE_DIR (default
+.logo_pipeline/) and remembers a fingerprint of what it was built from:
+the artifacts of the stages it depends on plus its own parameters. A stage
+reruns only when that fingerprint changes (or it is forced), and a rerun
+that produces an identical artifact leaves its dependents up to date, so
+fixing one mapping row re-uploads one logo instead of all of them. A stage
+where any download or upload failed keeps its partial artifact but no
+fingerprint, so it stays stale and the next run retries the failed items.
+
+The dedupe stage (logo_phash.py) collapses repeated and near-identical
+images, so each distinct logo is rendered and stored once and every
+company using it links to the same objects.
+
+External inputs are fingerprinted too: the mapping file's contents and
+the size and mtime of every logo it names, the set of active companies
+(one select), and the logos found in the recorded Firecrawl scrape, which
+is only repeated with --refresh.
+"""
+import os
+import re
+import csv
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from supabase_backend import get_client
+from company_matcher import CompanyMatcher
+from logo_downloader import download_all
+from logo_cache import LogoCache
+from logo_derivatives import build_derivatives, upload_derivatives, storage_stem, DERIVATIVE_WIDTHS, DERIVATIVE_FORMATS
+from bpo_media import media_row, upsert_media
+from logo_phash import find_duplicates, DEFAULT_MAX_DISTANCE
+from scrape_cache import ScrapeCache, ScrapeCacheMiss
+
+# Load environment variables
+load_dotenv()
+
+# Configuration
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+
+HIMAP_MEMBERS_URL = 'https://himap.ph/members/list-of-members/'
+IMAGE_PATTERN = r'!\[([^\]]*)\]\(([^)]+)\)'
+
+MAPPING_FILE = 'logo_company_mapping.csv'
+LOGOS_DIR = Path('downloaded_logos')
+BUCKET_NAME = 'bpo-assets'
+
+DEFAULT_WORK_DIR = '.logo_pipeline'
+
+# Stages in dependency order, and what each one is built from
+STAGES = ['scrape', 'download', 'dedupe', 'normalize', 'match', 'upload', 'record']
+DEPENDENCIES = {
+    'scrape': [],
+    'download': ['scrape'],
+    'dedupe': ['download'],
+    'normalize': ['download', 'dedupe'],
+    'match': ['scrape'],
+    'upload': ['scrape', 'download', 'dedupe', 'normalize', 'match'],
+    'record': ['upload'],
+}
+
+# Initialize Supabase
+supabase = get_client(SUPABASE_URL, SUPABASE_KEY)
+
+
+def digest(value):
+    """Stable SHA-256 of a JSON-serializable value"""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def local_stat(path):
+    """[size, mtime_ns] of a local logo, or None if it is missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def mapping_rows():
+    with open(MAPPING_FILE, 'r', encoding='utf-8') as f:
+        return [row for row in csv.DictReader(f) if row['company_name'].strip()]
+
+
+def himap_images(mode=None):
+    """[(alt text, image URL)] on the members page, via the Firecrawl scrape cache"""
+    scraper = ScrapeCache(mode=mode)
+    markdown = scraper.scrape(HIMAP_MEMBERS_URL, formats=['markdown'])['data'].get('markdown') or ''
+    return re.findall(IMAGE_PATTERN, markdown)
+
+
+class LogoPipeline:
+    """Runs the stages whose inputs changed and persists their artifacts"""
+
+    def __init__(self, source='mapping', work_dir=None, refresh=False):
+        self.source = source
+        self.work_dir = Path(work_dir or os.getenv('LOGO_PIPELINE_DIR', DEFAULT_WORK_DIR))
+        self.refresh = refresh
+        self.state_path = self.work_dir / 'state.json'
+        self.state = {}
+        if self.state_path.exists():
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        self._cache = None
+        self._matcher = None
+        # Keys the running stage could not build; a stage with failures is left stale
+        self.failed = []
+
+    # Artifacts
+
+    def artifact_path(self, stage):
+        return self.work_dir / f"{stage}.json"
+
+    def load(self, stage):
+        with open(self.artifact_path(stage), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save(self, stage, artifact, fingerprint):
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        path = self.artifact_path(stage)
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(artifact, f, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+        self.state[stage] = {
+            'fingerprint': fingerprint,
+            'artifact': digest(artifact),
+            'built_at': datetime.now(timezone.utc).isoformat(),
+        }
+        tmp = self.state_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            self._cache = LogoCache()
+        return self._cache
+
+    @property
+    def matcher(self):
+        if self._matcher is None:
+            self._matcher = CompanyMatcher.load(supabase)
+        return self._matcher
+
+    # Fingerprints
+
+    def params(self, stage):
+        """The stage's own inputs besides upstream artifacts"""
+        if stage == 'scrape':
+            if self.source == 'mapping':
+                # A replaced logo file changes its size or mtime even when the mapping does not
+                files = {row['logo_file']: local_stat(LOGOS_DIR / row['logo_file']) for row in mapping_rows()}
+                return {'source': 'mapping', 'mapping': file_digest(MAPPING_FILE), 'files': digest(files)}
+            # The recorded scrape, of any age and without touching the network; --refresh forces a new one
+            try:
+                images = sorted(himap_images(mode='replay'))
+            except ScrapeCacheMiss:
+                images = None
+            return {'source': 'himap', 'logos': digest(images) if images is not None else None}
+        if stage == 'dedupe':
+            return {'max_distance': DEFAULT_MAX_DISTANCE}
+        if stage == 'normalize':
+            return {'widths': DERIVATIVE_WIDTHS, 'formats': DERIVATIVE_FORMATS}
+        if stage == 'match':
+            companies = [(c['id'], c['company_name'], c.get('trade_name')) for c in self.matcher.companies]
+            return {'companies': digest(sorted(companies))}
+        if stage == 'upload':
+            return {'bucket': BUCKET_NAME}
+        return {}
+
+    def fingerprint(self, stage):
+        inputs = {dep: self.state.get(dep, {}).get('artifact') for dep in DEPENDENCIES[stage]}
+        return digest({'inputs': inputs, 'params': self.params(stage)})
+
+    def is_stale(self, stage):
+        recorded = self.state.get(stage)
+        return (
+            not recorded
+            or not self.artifact_path(stage).exists()
+            or recorded['fingerprint'] != self.fingerprint(stage)
+        )
+
+    # Stages
+
+    def run_scrape(self, inputs):
+        """[{key, name, url, local}] from the mapping file or a Firecrawl scrape of the members page"""
+        items = []
+        if self.source == 'mapping':
+            for row in mapping_rows():
+                local = LOGOS_DIR / row['logo_file']
+                stat = local_stat(local)
+                items.append({
+                    'key': row['logo_url'] or row['logo_file'],
+                    'name': row['company_name'].strip(),
+                    'url': row['logo_url'],
+                    'local': str(local) if stat else None,
+                    # Part of the artifact, so a replaced file makes download and everything after it stale
+                    'stat': stat,
+                })
+            return {'items': items}
+
+        seen = set()
+        for alt_text, url in himap_images(mode='refresh' if self.refresh else None):
+            if len(alt_text.strip()) < 3 or url in seen:
+                continue
+            seen.add(url)
+            items.append({'key': url, 'name': alt_text.strip(), 'url': url, 'local': None})
+        return {'items': items}
+
+    def run_download(self, inputs):
+        """{key: {path, sha256}} - local files are hashed in place, remote ones fetched conditionally"""
+        downloads_dir = self.work_dir / 'downloads'
+        downloads_dir.mkdir(parents=True, exist_ok=True)
+
+        files = {}
+        jobs = []
+        for idx, item in enumerate(inputs['scrape']['items']):
+            if item['local']:
+                files[item['key']] = item['local']
+            elif item['url']:
+                ext = '.png' if 'png' in item['url'].lower() else '.jpg'
+                path = downloads_dir / f"logo_{idx:03d}{ext}"
+                jobs.append((item['url'], path))
+                files[item['key']] = str(path)
+
+        ok = dict(zip((url for url, _ in jobs), download_all(jobs, self.cache.fetch))) if jobs else {}
+        self.cache.save()
+
+        artifact = {}
+        for item in inputs['scrape']['items']:
+            path = files.get(item['key'])
+            if not path:
+                continue
+            if item['url'] and not item['local'] and not ok.get(item['url']):
+                self.failed.append(item['key'])
+                continue
+            artifact[item['key']] = {'path': path, 'sha256': self.cache.store_file(path)}
+        return artifact
+
+    def run_dedupe(self, inputs):
+        """{key: representative key} for every download that repeats another one"""
+        keys = {entry['path']: key for key, entry in inputs['download'].items()}
+        duplicates = find_duplicates(list(keys))
+        return {keys[path]: keys[representative] for path, representative in duplicates.items()}
+
+    def run_normalize(self, inputs):
+        """{key: [derivative]} rendered from the downloaded files, skipping duplicates"""
+        downloads = {key: entry for key, entry in inputs['download'].items() if key not in inputs['dedupe']}
+        rendered = build_derivatives(
+            [(entry['path'], entry['sha256'][:16]) for entry in downloads.values()],
+            self.work_dir / 'derived'
+        )
+        return {
+            key: [{k: v for k, v in d.items() if k != 'bytes'} for d in rendered.get(entry['path'], [])]
+            for key, entry in downloads.items()
+        }
+
+    def run_match(self, inputs):
+        """{key: {bpo_id, company_name, score}} for every item that matches a company"""
+        matches = {}
+        for item in inputs['scrape']['items']:
+            company, score = self.matcher.match(item['name'])
+            if company:
+                matches[item['key']] = {'bpo_id': company['id'], 'company_name': company['company_name'], 'score': score}
+            else:
+                print(f"  ⚠️  No match found for: {item['name']}")
+        return matches
+
+    def run_upload(self, inputs):
+        """{key: {bpo_id, media: {media_type: public_url}}} for matched, downloaded items
+
+        A duplicate is linked to its representative's objects, which are
+        uploaded once under the representative's name.
+        """
+        names = {item['key']: item['name'] for item in inputs['scrape']['items']}
+        bucket = supabase.storage.from_(BUCKET_NAME)
+        sources = {}
+        uploaded = {}
+        for key, match in inputs['match'].items():
+            if key not in inputs['download']:
+                continue
+            source = inputs['dedupe'].get(key, key)
+            if source not in sources:
+                sources[source] = self.upload_source(bucket, names[source], inputs['download'][source]['path'],
+                                                     inputs['normalize'].get(source, []))
+            media, complete = sources[source]
+            if media:
+                uploaded[key] = {'bpo_id': match['bpo_id'], 'media': media}
+            if not complete:
+                self.failed.append(key)
+        self.cache.save()
+        return uploaded
+
+    def upload_source(self, bucket, name, path, derivatives):
+        """Upload one logo and its derivatives; returns ({media_type: public_url} or None, everything uploaded)"""
+        storage_path = f"logos/{storage_stem(name)}{Path(path).suffix}"
+        try:
+            needed, sha = self.cache.needs_upload(bucket, BUCKET_NAME, storage_path, path)
+            if needed:
+                with open(path, 'rb') as f:
+                    bucket.upload(storage_path, f.read(), {'content-type': f'image/{Path(path).suffix[1:]}', 'upsert': 'true'})
+                self.cache.record_upload(BUCKET_NAME, storage_path, sha)
+            media = {'logo': bucket.get_public_url(storage_path)}
+            uploaded = upload_derivatives(supabase, name, derivatives, self.cache, BUCKET_NAME)
+            media.update(uploaded)
+        except Exception as e:
+            print(f"  ❌ Upload failed for {name}: {e}")
+            return None, False
+        return media, len(uploaded) == len(derivatives)
+
+    def run_record(self, inputs):
+        """Upsert every media row in one request"""
+        rows = [
+            media_row(entry['bpo_id'], media_type, url)
+            for entry in inputs['upload'].values()
+            for media_type, url in sorted(entry['media'].items())
+        ]
+        written = upsert_media(supabase, rows)
+        return {'rows': len(written)}
+
+    # Runner
+
+    def status(self):
+        for stage in STAGES:
+            recorded = self.state.get(stage)
+            if not recorded:
+                state = 'never built'
+            elif all(not self.is_stale(dep) for dep in DEPENDENCIES[stage]) and not self.is_stale(stage):
+                state = f"up to date (built {recorded['built_at']})"
+            else:
+                state = 'stale'
+            print(f"   {stage:<10} {state}")
+
+    def run(self, force=(), until=None):
+        """Run the stale stages in order; returns {stage: 'built'|'skipped'}"""
+        forced = set(force)
+        if self.refresh and self.source == 'himap':
+            forced.add('scrape')
+        last = STAGES.index(until) if until else len(STAGES) - 1
+
+        outcome = {}
+        for stage in STAGES[:last + 1]:
+            if stage not in forced and not self.is_stale(stage):
+                print(f"⏭️  {stage:<10} up to date")
+                outcome[stage] = 'skipped'
+                continue
+
+            print(f"▶️  {stage:<10} building...")
+            inputs = {dep: self.load(dep) for dep in DEPENDENCIES[stage]}
+            fingerprint = self.fingerprint(stage)
+            self.failed = []
+            artifact = getattr(self, f"run_{stage}")(inputs)
+            if stage == 'scrape':
+                # A refreshed scrape changes the recording the fingerprint is read from
+                fingerprint = self.fingerprint(stage)
+            previous = self.state.get(stage, {}).get('artifact')
+            # Without a fingerprint the stage stays stale, so the next run retries what failed
+            self.save(stage, artifact, None if self.failed else fingerprint)
+            unchanged = previous == self.state[stage]['artifact']
+            count = len(artifact['items']) if stage == 'scrape' else artifact['rows'] if stage == 'record' else len(artifact)
+            print(f"✅ {stage:<10} {count} entries{' (unchanged)' if unchanged else ''}")
+            if self.failed:
+                print(f"⚠️  {stage:<10} {len(self.failed)} failed; the next run retries them")
+            outcome[stage] = 'built'
+        return outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental HIMAP logo pipeline")
+    parser.add_argument("--source", choices=["mapping", "himap"], default="mapping",
+                        help=f"mapping: {MAPPING_FILE} + {LOGOS_DIR}/; himap: Firecrawl scrape of the members page (default: mapping)")
+    parser.add_argument("--refresh", action="store_true", help="Repeat the himap scrape instead of reusing the last one")
+    parser.add_argument("--force", nargs="+", choices=STAGES, default=[], help="Rebuild these stages; dependents follow only if the output changed")
+    parser.add_argument("--until", choices=STAGES, help="Stop after this stage")
+    parser.add_argument("--work-dir", help=f"Artifact directory (default: {DEFAULT_WORK_DIR})")
+    parser.add_argument("--status", action="store_true", help="Show which stages are up to date and exit")
+    args = parser.parse_args()
+
+    pipeline = LogoPipeline(args.source, args.work_dir, args.refresh)
+
+    print("=" * 80)
+    print(f"HIMAP Logo Pipeline ({args.source})")
+    print("=" * 80)
+
+    if args.status:
+        pipeline.status()
+        return
+
+    outcome = pipeline.run(args.force, args.until)
+    built = [stage for stage, result in outcome.items() if result == 'built']
+    print(f"\n{'='*80}")
+    print(f"✅ Built {len(built)} stage(s){': ' + ', '.join(built) if built else ''}")
+    if pipeline._cache:
+        print(f"🗄️  Cache: {pipeline.cache.summary()}")
+    print(f"{'='*80}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+Quoted, chunked SQL and COPY data for bulk bpo_media backfills
+
+Usage:
+    from media_sql import write_sql, write_copy, execute_rows
+    write_sql(rows, sys.stdout, batch_size=500)    # one upsert per 500 rows, in one transaction
+    write_copy(rows, 'media_load')                 # bpo_media.csv + load.sql for psql \\copy
+    execute_rows(os.getenv('DATABASE_URL'), rows)  # straight into Postgres (needs psycopg)
+
+Rows are bpo_media.media_row() dicts. Every value goes through
+sql_literal(), which doubles quotes and rejects NUL bytes, so a company
+or file name can never end a string early. Statements are capped at
+batch_size rows instead of one INSERT for the whole table, and each one
+upserts on the unique key from migrations/add_bpo_media_unique_key.sql,
+so a rerun converges rather than duplicating rows. Statements are built
+as the rows stream in: a key repeated within a batch keeps its last row,
+and one repeated in a later batch is simply upserted again.
+
+COPY output loads the CSV into a temporary table and upserts from it in
+the same transaction; COPY itself cannot resolve conflicts. execute_rows()
+binds values as parameters (or streams COPY) through psycopg, which is
+only imported when it is used.
+"""
+import csv
+import sys
+from pathlib import Path
+from bpo_media import media_row, dedupe, conflict_key
+from bulk_io import chunked, copy_value
+from logo_derivatives import storage_stem
+
+# Columns written for each row, in order
+MEDIA_COLUMNS = ['bpo_id', 'media_type', 'file_url', 'is_primary']
+
+# Unique key added by migrations/add_bpo_media_unique_key.sql
+CONFLICT_CLAUSE = "ON CONFLICT (bpo_id, logo_media_type, is_primary) DO UPDATE SET file_url = EXCLUDED.file_url"
+
+# Rows per INSERT; keeps every statement well clear of parser and packet limits
+DEFAULT_BATCH_SIZE = 500
+
+# Staging table used by COPY loads, dropped at commit
+LOAD_TABLE = 'bpo_media_load'
+LOAD_TABLE_SQL = (
+    f"CREATE TEMP TABLE {LOAD_TABLE} "
+    "(bpo_id UUID, media_type TEXT, file_url TEXT, is_primary BOOLEAN) ON COMMIT DROP"
+)
+MERGE_SQL = (
+    f"INSERT INTO bpo_media ({', '.join(MEDIA_COLUMNS)}) "
+    f"SELECT {', '.join(MEDIA_COLUMNS)} FROM {LOAD_TABLE} {CONFLICT_CLAUSE}"
+)
+
+STORAGE_URL = 'https://llvsayyfvwkqbmhnmumh.supabase.co'
+BUCKET_NAME = 'bpo-assets'
+
+
+def sql_literal(value):
+    """A Python value as a Postgres literal (standard_conforming_strings on)"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    text = str(value)
+    if '\x00' in text:
+        raise ValueError(f"NUL byte in SQL value {text!r}")
+    return "'" + text.replace("'", "''") + "'"
+
+
+def unique_batches(rows, size):
+    """Batches of at most `size` rows, streamed, with no conflict key twice in one batch (the last row wins)"""
+    batch = {}
+    for index, row in enumerate(rows):
+        key = conflict_key(row, index)
+        if key not in batch and len(batch) == size:
+            yield list(batch.values())
+            batch = {}
+        batch[key] = row
+    if batch:
+        yield list(batch.values())
+
+
+def insert_statement(rows):
+    """One multi-row upsert for the given rows"""
+    values = ",\n  ".join(
+        "(" + ", ".join(sql_literal(row[column]) for column in MEDIA_COLUMNS) + ")"
+        for row in rows
+    )
+    return f"INSERT INTO bpo_media ({', '.join(MEDIA_COLUMNS)}) VALUES\n  {values}\n{CONFLICT_CLAUSE};"
+
+
+def insert_statements(rows, batch_size=DEFAULT_BATCH_SIZE):
+    """Upserts of at most batch_size rows each, generated as rows arrive; a repeated key ends on its last row"""
+    for batch in unique_batches(rows, batch_size):
+        yield insert_statement(batch)
+
+
+def write_sql(rows, out, batch_size=DEFAULT_BATCH_SIZE, transaction=True):
+    """Write the upserts to a file object, wrapped in BEGIN/COMMIT; returns the statement count"""
+    out.write("SET standard_conforming_strings = on;\n")
+    if transaction:
+        out.write("BEGIN;\n")
+    count = 0
+    for statement in insert_statements(rows, batch_size):
+        out.write(statement + "\n")
+        count += 1
+    if transaction:
+        out.write("COMMIT;\n")
+    return count
+
+
+def write_copy(rows, output_dir):
+    """Write bpo_media.csv and load.sql, which loads and upserts it with psql \\copy in one transaction"""
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    # COPY rows are merged by a single INSERT ... SELECT, which cannot touch a key twice
+    rows = dedupe(rows)
+
+    with open(output_path / 'bpo_media.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(MEDIA_COLUMNS)
+        for row in rows:
+            writer.writerow([copy_value(row[column]) for column in MEDIA_COLUMNS])
+
+    lines = [
+        "-- Load bpo_media.csv into Postgres; run from this directory:",
+        "--   psql \"$DATABASE_URL\" -v ON_ERROR_STOP=1 -f load.sql",
+        "BEGIN;",
+        f"{LOAD_TABLE_SQL};",
+        f"\\copy {LOAD_TABLE} ({', '.join(MEDIA_COLUMNS)}) FROM 'bpo_media.csv' WITH (FORMAT csv, HEADER true)",
+        f"{MERGE_SQL};",
+        "COMMIT;",
+    ]
+    script = output_path / 'load.sql'
+    script.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    return script, len(rows)
+
+
+def execute_rows(dsn, rows, batch_size=DEFAULT_BATCH_SIZE, copy=False):
+    """Upsert rows directly in one transaction, as bound parameters or a COPY stream; returns the row count"""
+    try:
+        import psycopg
+    except ImportError:
+        raise RuntimeError("Running SQL directly needs psycopg: pip install 'psycopg[binary]'")
+
+    rows = dedupe(rows)
+    with psycopg.connect(dsn) as conn:
+        with conn.transaction(), conn.cursor() as cur:
+            if copy:
+                cur.execute(LOAD_TABLE_SQL)
+                with cur.copy(f"COPY {LOAD_TABLE} ({', '.join(MEDIA_COLUMNS)}) FROM STDIN") as stream:
+                    for row in rows:
+                        stream.write_row([row[column] for column in MEDIA_COLUMNS])
+                cur.execute(MERGE_SQL)
+            else:
+                placeholders = "(" + ", ".join(["%s"] * len(MEDIA_COLUMNS)) + ")"
+                for batch in chunked(rows, batch_size):
+                    cur.execute(
+                        f"INSERT INTO bpo_media ({', '.join(MEDIA_COLUMNS)}) VALUES "
+                        + ", ".join([placeholders] * len(batch)) + f" {CONFLICT_CLAUSE}",
+                        [row[column] for row in batch for column in MEDIA_COLUMNS]
+                    )
+    return len(rows)
+
+
+def mapping_rows(mapping_file, resolver, storage_url=None):
+    """Primary 'logo' rows for logo_company_mapping.csv; unresolved names are reported on stderr"""
+    base = f"{(storage_url or STORAGE_URL).rstrip('/')}/storage/v1/object/public/{BUCKET_NAME}"
+    with open(mapping_file, 'r', encoding='utf-8') as f:
+        mappings = [m for m in csv.DictReader(f) if m['company_name'].strip()]
+
+    rows = []
+    for mapping in mappings:
+        company_name = mapping['company_name'].strip()
+        bpo_id = resolver.resolve(company_name)
+        if not bpo_id:
+            # Unresolved names go to stderr so they never vanish from the generated SQL silently
+            print(f"-- ⚠️  No unique company named '{company_name}' - skipped", file=sys.stderr)
+            continue
+        # Same object name the upload scripts store the logo under
+        file_ext = Path(mapping['logo_file']).suffix
+        rows.append(media_row(bpo_id, 'logo', f"{base}/logos/{storage_stem(company_name)}{file_ext}"))
+    return rows
@@ -0,0 +1,197 @@
+"""
+Stream member companies from a CSV or JSONL file (or stdin) with per-row validation
+
+Usage:
+    from member_source import MemberSource
+    source = MemberSource("partner_export.csv")
+    for company in source:
+        ...
+    print(source.accepted, source.rejected)
+
+Rows are read, validated and yielded one at a time, so memory stays flat
+however large the file is. The accepted shape is the one
+generate_synthetic_members.py writes: only name and website are required;
+in CSV, services are separated by ';' and accreditations are written as
+'name:status;name:status'.
+"""
+import sys
+import csv
+import json
+from pathlib import Path
+from generate_synthetic_members import ACCREDITATION_STATES, DELIVERY_MODELS
+
+FORMATS = ["csv", "jsonl"]
+
+REQUIRED_FIELDS = ["name", "website"]
+TEXT_FIELDS = ["city", "province", "delivery_model"]
+COUNT_FIELDS = ["total_employees", "healthcare_fte_count", "no_of_active_clients", "years_serving_healthcare"]
+
+# Rejected rows reported individually before going quiet
+MAX_REPORTED_ERRORS = 20
+
+
+class MemberValidationError(ValueError):
+    """A source row that cannot be loaded as a member"""
+
+
+def text(value):
+    """Stripped string, or None for missing/blank values"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def parse_count(field, value):
+    """Non-negative integer from an int or a numeric string, None when blank"""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        number = int(str(value).strip().replace(",", ""))
+    except ValueError:
+        raise MemberValidationError(f"{field} must be a whole number, got {value!r}")
+    if number < 0:
+        raise MemberValidationError(f"{field} must not be negative, got {number}")
+    return number
+
+
+def parse_services(value):
+    """List of service categories from a list or a ';'-separated string"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(";")
+    if not isinstance(value, list):
+        raise MemberValidationError(f"services must be a list or ';'-separated text, got {value!r}")
+    services = []
+    for service in value:
+        service = text(service)
+        if service and service not in services:
+            services.append(service)
+    return services or None
+
+
+def parse_accreditations(value):
+    """List of {name, status} from a list of objects or 'name:status;...' text"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = [
+            dict(zip(("name", "status"), (part.strip() for part in item.rsplit(":", 1))))
+            for item in value.split(";") if item.strip()
+        ]
+    if not isinstance(value, list):
+        raise MemberValidationError(f"accreditations must be a list or 'name:status;...' text, got {value!r}")
+    accreditations = []
+    for item in value:
+        if not isinstance(item, dict) or not text(item.get("name")):
+            raise MemberValidationError(f"accreditation without a name: {item!r}")
+        status = (text(item.get("status")) or "active").lower()
+        if status not in ACCREDITATION_STATES:
+            raise MemberValidationError(
+                f"accreditation status must be one of {', '.join(ACCREDITATION_STATES)}, got {status!r}"
+            )
+        accreditations.append({"name": text(item["name"]), "status": status})
+    return accreditations
+
+
+def validate_member(row):
+    """Normalize one raw row into a member dict, raising MemberValidationError if it is unusable"""
+    if not isinstance(row, dict):
+        raise MemberValidationError(f"expected an object, got {type(row).__name__}")
+
+    member = {}
+    for field in REQUIRED_FIELDS:
+        member[field] = text(row.get(field))
+        if not member[field]:
+            raise MemberValidationError(f"missing required field '{field}'")
+    if not member["website"].lower().startswith(("http://", "https://")):
+        raise MemberValidationError(f"website must be an http(s) URL, got {member['website']!r}")
+
+    for field in TEXT_FIELDS:
+        value = text(row.get(field))
+        if value is not None:
+            member[field] = value
+    if member.get("delivery_model") and member["delivery_model"] not in DELIVERY_MODELS:
+        raise MemberValidationError(
+            f"delivery_model must be one of {', '.join(DELIVERY_MODELS)}, got {member['delivery_model']!r}"
+        )
+
+    for field in COUNT_FIELDS:
+        value = parse_count(field, row.get(field))
+        if value is not None:
+            member[field] = value
+
+    services = parse_services(row.get("services"))
+    if services:
+        member["services"] = services
+    accreditations = parse_accreditations(row.get("accreditations"))
+    if accreditations is not None:
+        member["accreditations"] = accreditations
+    return member
+
+
+def detect_format(path):
+    """Source format from the file extension; stdin and unknown extensions read as JSONL"""
+    return "csv" if path != "-" and Path(path).suffix.lower() == ".csv" else "jsonl"
+
+
+class MemberSource:
+    """Iterable of validated members read lazily from a CSV/JSONL file or '-' for stdin"""
+
+    def __init__(self, path, file_format=None, strict=False):
+        self.path = path
+        self.file_format = file_format or detect_format(path)
+        self.strict = strict
+        self.accepted = 0
+        self.rejected = 0
+
+    def open(self):
+        if self.path == "-":
+            return sys.stdin
+        return open(self.path, "r", newline="", encoding="utf-8-sig")
+
+    def raw_rows(self, f):
+        """(line number, raw row) pairs straight from the file"""
+        if self.file_format == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError as e:
+                yield line_no, MemberValidationError(f"invalid JSON: {e}")
+
+    def reject(self, line_no, error):
+        self.rejected += 1
+        message = f"{self.path}:{line_no}: {error}"
+        if self.strict:
+            raise MemberValidationError(message)
+        if self.rejected <= MAX_REPORTED_ERRORS:
+            print(f"⚠️  Skipping {message}", file=sys.stderr)
+        elif self.rejected == MAX_REPORTED_ERRORS + 1:
+            print("⚠️  Further invalid rows are skipped silently", file=sys.stderr)
+
+    def __iter__(self):
+        f = self.open()
+        try:
+            for line_no, row in self.raw_rows(f):
+                try:
+                    if isinstance(row, MemberValidationError):
+                        raise row
+                    member = validate_member(row)
+                except MemberValidationError as e:
+                    self.reject(line_no, e)
+                    continue
+                self.accepted += 1
+                yield member
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+    def summary(self):
+        return f"{self.accepted} valid, {self.rejected} rejected rows from {self.path}"
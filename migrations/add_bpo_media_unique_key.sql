@@ -0,0 +1,52 @@
+-- ============================================
+-- BPO_MEDIA Unique Key (set-based logo upserts)
+-- ============================================
+-- This migration adds a unique key on logo rows so the logo scripts
+-- (bpo_media.upsert_media) and the generate_*.py SQL can write every media
+-- row with a single INSERT ... ON CONFLICT instead of a SELECT followed by
+-- an UPDATE or INSERT per logo, without racing.
+--
+-- Only logo media types are keyed: each company keeps one primary and one
+-- non-primary row per logo media_type (logo derivatives use their own,
+-- logo_256w_webp, ...), while photos (operations_photo, office_photo,
+-- team_photo, ...) may have any number of rows and are left untouched.
+--
+-- The key lives on a generated column rather than a partial index, because
+-- PostgREST's on_conflict takes column names only and cannot name the
+-- predicate a partial index needs: logo_media_type is media_type for logo
+-- rows and NULL otherwise, and NULLs never conflict.
+
+-- ============================================
+-- 1. REMOVE DUPLICATES
+-- ============================================
+-- Earlier check-then-insert runs could leave several logo rows per key;
+-- keep the most recently uploaded one
+
+DELETE FROM bpo_media m
+USING bpo_media d
+WHERE m.media_type LIKE 'logo%'
+AND m.bpo_id = d.bpo_id
+AND m.media_type = d.media_type
+AND m.is_primary IS NOT DISTINCT FROM d.is_primary
+AND (m.uploaded_at, m.id) < (d.uploaded_at, d.id);
+
+-- ============================================
+-- 2. UNIQUE KEY
+-- ============================================
+
+UPDATE bpo_media SET is_primary = false WHERE is_primary IS NULL;
+ALTER TABLE bpo_media ALTER COLUMN is_primary SET NOT NULL;
+
+ALTER TABLE bpo_media ADD COLUMN IF NOT EXISTS logo_media_type TEXT
+    GENERATED ALWAYS AS (CASE WHEN media_type LIKE 'logo%' THEN media_type END) STORED;
+
+-- An earlier version of this migration keyed every media_type
+DROP INDEX IF EXISTS idx_bpo_media_bpo_type_primary;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_bpo_media_logo_key ON bpo_media(bpo_id, logo_media_type, is_primary);
+
+-- ============================================
+-- MIGRATION COMPLETE
+-- ============================================
+-- Usage:
+--   INSERT INTO bpo_media (bpo_id, media_type, file_url, is_primary) VALUES (...)
+--   ON CONFLICT (bpo_id, logo_media_type, is_primary) DO UPDATE SET file_url = EXCLUDED.file_url;
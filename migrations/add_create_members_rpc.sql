@@ -0,0 +1,107 @@
+-- ============================================
+-- HIMAP Transactional Member Creation RPC
+-- ============================================
+-- This migration adds create_members(), which creates a company together
+-- with its services, client profile and operations rows in one transaction.
+-- populate_members.py --mode rpc calls it with one or many members per request.
+-- Run add_member_natural_key.sql first: the function fills bpos.member_key.
+-- CREATE OR REPLACE makes it safe to rerun over an older create_members().
+
+-- ============================================
+-- 1. CREATE_MEMBERS FUNCTION
+-- ============================================
+-- Accepts a single member document or an array of them:
+--   {
+--     "company":        { ...bpos columns... },
+--     "services":       [ { ...bpo_services columns... } ],
+--     "client_profile": { ...bpo_clients_profile columns... },
+--     "operations":     { ...bpo_operations columns... }
+--   }
+-- Any bpo_id inside the child objects is ignored; the new company id is used.
+-- "company" carries the member_key computed by member_key() in populate_members.py.
+-- If any row fails, the whole call (every member in the batch) is rolled back.
+
+CREATE OR REPLACE FUNCTION create_members(members JSONB)
+RETURNS TABLE (bpo_id UUID, company_name TEXT) AS $$
+#variable_conflict use_column
+DECLARE
+    member JSONB;
+    new_id UUID;
+    new_name TEXT;
+BEGIN
+    IF jsonb_typeof(members) = 'object' THEN
+        members := jsonb_build_array(members);
+    END IF;
+
+    FOR member IN SELECT value FROM jsonb_array_elements(members) LOOP
+        INSERT INTO bpos (
+            company_name, trade_name, year_established, registration_number,
+            headquarters_address, city, province, country, website_url,
+            linkedin_url, email, contact_number, company_description, mission,
+            vision, total_employees, healthcare_fte_count, ownership_type,
+            parent_company, is_active, member_key
+        )
+        SELECT
+            c.company_name, c.trade_name, c.year_established, c.registration_number,
+            c.headquarters_address, c.city, c.province, COALESCE(c.country, 'Philippines'), c.website_url,
+            c.linkedin_url, c.email, c.contact_number, c.company_description, c.mission,
+            c.vision, c.total_employees, c.healthcare_fte_count, c.ownership_type,
+            c.parent_company, COALESCE(c.is_active, true), c.member_key
+        FROM jsonb_populate_record(NULL::bpos, member->'company') c
+        RETURNING bpos.id, bpos.company_name INTO new_id, new_name;
+
+        INSERT INTO bpo_services (
+            bpo_id, service_category, service_name, description,
+            certifications_required, tools_used, is_primary_service
+        )
+        SELECT
+            new_id, s.service_category, s.service_name, s.description,
+            s.certifications_required, s.tools_used, COALESCE(s.is_primary_service, false)
+        FROM jsonb_populate_recordset(NULL::bpo_services, COALESCE(member->'services', '[]'::jsonb)) s;
+
+        IF member ? 'client_profile' THEN
+            INSERT INTO bpo_clients_profile (
+                bpo_id, target_market, client_types, average_client_size,
+                no_of_active_clients, largest_client_type, years_serving_healthcare
+            )
+            SELECT
+                new_id, p.target_market, p.client_types, p.average_client_size,
+                p.no_of_active_clients, p.largest_client_type, p.years_serving_healthcare
+            FROM jsonb_populate_record(NULL::bpo_clients_profile, member->'client_profile') p;
+        END IF;
+
+        IF member ? 'operations' THEN
+            INSERT INTO bpo_operations (
+                bpo_id, number_of_sites, delivery_model, work_shifts,
+                compliance_frameworks, data_security_measures, business_continuity_plan,
+                disaster_recovery_site, ehr_systems_supported, billing_platforms_supported,
+                coding_systems_supported
+            )
+            SELECT
+                new_id, o.number_of_sites, o.delivery_model, o.work_shifts,
+                o.compliance_frameworks, o.data_security_measures, o.business_continuity_plan,
+                o.disaster_recovery_site, o.ehr_systems_supported, o.billing_platforms_supported,
+                o.coding_systems_supported
+            FROM jsonb_populate_record(NULL::bpo_operations, member->'operations') o;
+        END IF;
+
+        bpo_id := new_id;
+        company_name := new_name;
+        RETURN NEXT;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- 2. PERMISSIONS
+-- ============================================
+-- Bulk member creation is a seeding/admin operation only
+
+REVOKE EXECUTE ON FUNCTION create_members(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION create_members(JSONB) TO service_role;
+
+-- ============================================
+-- MIGRATION COMPLETE
+-- ============================================
+-- Usage:
+--   python populate_members.py --mode rpc --chunk-size 50
@@ -0,0 +1,61 @@
+-- ============================================
+-- HIMAP Member Natural Key (idempotent loads)
+-- ============================================
+-- This migration adds a natural key to bpos and unique keys on the child
+-- tables so populate_members.py --upsert can rerun a load without creating
+-- duplicate companies.
+
+-- ============================================
+-- 1. BPOS.MEMBER_KEY
+-- ============================================
+-- Website domain (lowercase, no scheme, no "www.", no path), or the
+-- company name lowercased with non-alphanumerics collapsed to "-" when the
+-- company has no website. Must match member_key() in populate_members.py.
+
+ALTER TABLE bpos ADD COLUMN IF NOT EXISTS member_key TEXT;
+
+-- Backfill existing rows; when earlier non-idempotent runs left duplicates,
+-- only the oldest row of each key gets it (the unique index allows NULLs)
+WITH keyed AS (
+    SELECT
+        id,
+        COALESCE(
+            NULLIF(regexp_replace(split_part(regexp_replace(lower(website_url), '^https?://', ''), '/', 1), '^www\.', ''), ''),
+            trim(BOTH '-' FROM regexp_replace(lower(company_name), '[^a-z0-9]+', '-', 'g'))
+        ) AS member_key,
+        created_at
+    FROM bpos
+    WHERE member_key IS NULL
+),
+ranked AS (
+    SELECT id, member_key, ROW_NUMBER() OVER (PARTITION BY member_key ORDER BY created_at, id) AS rn
+    FROM keyed
+)
+UPDATE bpos
+SET member_key = ranked.member_key
+FROM ranked
+WHERE bpos.id = ranked.id
+AND ranked.rn = 1
+AND NOT EXISTS (SELECT 1 FROM bpos b WHERE b.member_key = ranked.member_key);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_bpos_member_key ON bpos(member_key);
+
+-- ============================================
+-- 2. BPO_SERVICES UNIQUE KEY
+-- ============================================
+-- bpo_clients_profile and bpo_operations are already UNIQUE on bpo_id;
+-- services are upserted per (bpo_id, service_category)
+
+DELETE FROM bpo_services s
+USING bpo_services d
+WHERE s.bpo_id = d.bpo_id
+AND s.service_category = d.service_category
+AND (s.created_at, s.id) > (d.created_at, d.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_bpo_services_bpo_category ON bpo_services(bpo_id, service_category);
+
+-- ============================================
+-- MIGRATION COMPLETE
+-- ============================================
+-- Usage:
+--   python populate_members.py --mode batched --upsert --journal populate_members.journal
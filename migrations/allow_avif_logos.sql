@@ -0,0 +1,17 @@
+-- ============================================
+-- BPO-ASSETS: ALLOW AVIF LOGO DERIVATIVES
+-- ============================================
+-- logo_derivatives.py renders AVIF next to WebP whenever Pillow has AVIF
+-- support, and uploads it as image/avif. Buckets created before AVIF was
+-- added to create_bucket.py ALLOWED_MIME_TYPES reject those uploads.
+-- (python create_bucket.py applies the same change through the API.)
+
+UPDATE storage.buckets
+SET allowed_mime_types = array_append(allowed_mime_types, 'image/avif')
+WHERE id = 'bpo-assets'
+AND allowed_mime_types IS NOT NULL
+AND NOT ('image/avif' = ANY(allowed_mime_types));
+
+-- ============================================
+-- MIGRATION COMPLETE
+-- ============================================
@@ -1,7 +1,19 @@
 import os
+import re
+import csv
+import json
+import uuid
+import time
 import random
+import asyncio
+import argparse
+from pathlib import Path
+from datetime import datetime, timezone
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase_backend import get_client, get_async_client
+from generate_synthetic_members import generate_members
+from member_source import FORMATS, MemberSource, MemberValidationError
+from bulk_io import chunked, copy_value
 
 # Load environment variables
 load_dotenv()
@@ -10,10 +22,10 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Initialize Supabase client (SUPABASE_BACKEND=memory for the offline stand-in)
+supabase = get_client(SUPABASE_URL, SUPABASE_KEY)
 
-# HIMAP Members extracted from website
+# HIMAP Members extracted from website (used when no --input or --synthetic source is given)
 companies = [
     {"name": "Abbott Philippines", "website": "https://www.abbott.com/"},
     {"name": "Accenture", "website": "https://www.accenture.com/us-en"},
@@ -94,32 +106,111 @@ service_categories = [
     "Patient Support Services"
 ]
 
+# Rows per multi-row insert in batched mode
+DEFAULT_CHUNK_SIZE = 100
+
+# Companies in flight at once in async mode
+DEFAULT_CONCURRENCY = 16
+
+# Column order of the COPY files written by --mode copy, parents first
+COPY_COLUMNS = {
+    "bpos": [
+        "id", "company_name", "trade_name", "city", "province", "country", "website_url", "email",
+        "company_description", "total_employees", "healthcare_fte_count", "is_active", "member_key",
+    ],
+    "bpo_services": ["id", "bpo_id", "service_category", "service_name", "description", "is_primary_service"],
+    "bpo_clients_profile": ["id", "bpo_id", "target_market", "client_types", "no_of_active_clients", "years_serving_healthcare"],
+    "bpo_operations": ["id", "bpo_id", "delivery_model", "work_shifts", "compliance_frameworks", "ehr_systems_supported"],
+}
+
+# Conflict targets for --upsert (see migrations/add_member_natural_key.sql)
+UPSERT_CONFLICT_KEYS = {
+    "bpos": "member_key",
+    "bpo_services": "bpo_id,service_category",
+    "bpo_clients_profile": "bpo_id",
+    "bpo_operations": "bpo_id",
+}
+
 # Philippines cities
 cities = [
     "Manila", "Makati", "Bonifacio Global City", "Quezon City", "Pasig",
     "Ortigas", "Alabang", "Cebu", "Davao", "Clark"
 ]
 
+def member_key(company):
+    """Natural key of a company: its website domain, or its normalized name if it has no website"""
+    domain = re.sub(r'^https?://', '', (company.get("website") or "").lower()).split('/')[0]
+    domain = re.sub(r'^www\.', '', domain)
+    if domain:
+        return domain
+    return re.sub(r'[^a-z0-9]+', '-', company["name"].lower()).strip('-')
+
+class CheckpointJournal:
+    """Append-only JSONL record of companies whose rows are fully committed"""
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.completed = set()
+        self.skipped = 0
+        
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self.completed.add(json.loads(line)["key"])
+                    except (ValueError, KeyError):
+                        # A crash can leave a torn last line; that company simply reruns
+                        continue
+        
+        self._file = open(self.path, 'a', encoding='utf-8')
+    
+    def __contains__(self, key):
+        return key in self.completed
+    
+    def pending(self, items):
+        """Yield the companies that are not in the journal yet"""
+        for item in items:
+            if member_key(item) in self.completed:
+                self.skipped += 1
+                continue
+            yield item
+    
+    def record(self, entries):
+        """Append (key, bpo_id) pairs and force them to disk"""
+        committed_at = datetime.now(timezone.utc).isoformat()
+        for key, bpo_id in entries:
+            self._file.write(json.dumps({"key": key, "bpo_id": bpo_id, "committed_at": committed_at}) + "\n")
+            self.completed.add(key)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+    
+    def close(self):
+        self._file.close()
+
 def create_mock_data(company):
-    """Create mock data for a company"""
+    """Create mock data for a company; fields the company already carries are kept"""
+    services = company.get("services") or [random.choice(service_categories)]
     return {
         "company_name": company["name"],
         "trade_name": company["name"].replace(" Philippines", "").replace(" Inc.", ""),
-        "city": random.choice(cities),
-        "province": "Metro Manila" if random.random() > 0.3 else "Cebu",
+        "city": company.get("city") or random.choice(cities),
+        "province": company.get("province") or ("Metro Manila" if random.random() > 0.3 else "Cebu"),
         "country": "Philippines",
         "website_url": company["website"],
         "email": f"info@{company['website'].replace('http://', '').replace('https://', '').replace('www.', '').split('/')[0]}",
-        "company_description": f"Leading healthcare BPO provider specializing in {random.choice(service_categories).lower()} and related services.",
-        "total_employees": random.randint(100, 5000),
-        "healthcare_fte_count": random.randint(50, 3000),
+        "company_description": f"Leading healthcare BPO provider specializing in {services[0].lower()} and related services.",
+        "total_employees": company.get("total_employees") or random.randint(100, 5000),
+        "healthcare_fte_count": company.get("healthcare_fte_count") or random.randint(50, 3000),
         "is_active": True
     }
 
-def create_services(bpo_id):
-    """Create 2-4 services for each company"""
-    num_services = random.randint(2, 4)
-    selected_services = random.sample(service_categories, num_services)
+def create_services(bpo_id, company=None):
+    """Create the company's services, or 2-4 random ones if it has none"""
+    if company and company.get("services"):
+        selected_services = company["services"]
+    else:
+        num_services = random.randint(2, 4)
+        selected_services = random.sample(service_categories, num_services)
     
     services = []
     for service in selected_services:
@@ -132,59 +223,471 @@ def create_services(bpo_id):
         })
     return services
 
-def populate_database():
+def create_client_profile(bpo_id, company=None):
+    """Create the client profile row for a company"""
+    company = company or {}
+    return {
+        "bpo_id": bpo_id,
+        "target_market": "United States, Canada",
+        "client_types": "Hospitals, Physician Practices, Insurance Payers",
+        "no_of_active_clients": company.get("no_of_active_clients") or random.randint(5, 50),
+        "years_serving_healthcare": company.get("years_serving_healthcare") or random.randint(3, 20)
+    }
+
+def create_operations(bpo_id, company=None):
+    """Create the operations row for a company"""
+    company = company or {}
+    if company.get("accreditations") is not None:
+        active = [a["name"] for a in company["accreditations"] if a["status"] == "active"]
+        compliance_frameworks = ", ".join(active) or None
+    else:
+        compliance_frameworks = "HIPAA, SOC 2, ISO 27001"
+    return {
+        "bpo_id": bpo_id,
+        "delivery_model": company.get("delivery_model") or random.choice(["Onsite", "Offshore", "Hybrid"]),
+        "work_shifts": "24/7 Operations",
+        "compliance_frameworks": compliance_frameworks,
+        "ehr_systems_supported": "Epic, Cerner, Meditech, Athenahealth"
+    }
+
+def create_child_rows(bpo_ids, members):
+    """Build the services, client profile and operations rows for companies and their new ids"""
+    pairs = list(zip(bpo_ids, members))
+    return {
+        "bpo_services": [service for bpo_id, company in pairs for service in create_services(bpo_id, company)],
+        "bpo_clients_profile": [create_client_profile(bpo_id, company) for bpo_id, company in pairs],
+        "bpo_operations": [create_operations(bpo_id, company) for bpo_id, company in pairs],
+    }
+
+def create_company_row(company, upsert=False):
+    """Create the bpos row for a company, carrying its natural key when upserting"""
+    row = create_mock_data(company)
+    if upsert:
+        row["member_key"] = member_key(company)
+    return row
+
+def write_rows(client, table, rows, upsert=False):
+    """Build an insert, or an upsert on the table's natural key, ready to execute"""
+    if upsert:
+        return client.table(table).upsert(rows, on_conflict=UPSERT_CONFLICT_KEYS[table])
+    return client.table(table).insert(rows)
+
+def stale_service_ids(existing, services):
+    """Ids of existing service rows whose (bpo_id, service_category) is not in the new set"""
+    kept = {(service["bpo_id"], service["service_category"]) for service in services}
+    return [row["id"] for row in existing if (row["bpo_id"], row["service_category"]) not in kept]
+
+def prune_services(client, bpo_ids, services):
+    """After an upsert, delete the companies' services that are no longer offered"""
+    existing = client.table("bpo_services").select("id, bpo_id, service_category").in_("bpo_id", bpo_ids).execute()
+    stale = stale_service_ids(existing.data, services)
+    if stale:
+        client.table("bpo_services").delete().in_("id", stale).execute()
+    return len(stale)
+
+async def prune_services_async(client, bpo_ids, services):
+    """Async flavour of prune_services()"""
+    existing = await client.table("bpo_services").select("id, bpo_id, service_category").in_("bpo_id", bpo_ids).execute()
+    stale = stale_service_ids(existing.data, services)
+    if stale:
+        await client.table("bpo_services").delete().in_("id", stale).execute()
+    return len(stale)
+
+def pending_companies(members, journal=None):
+    """Companies still to load, skipping those already in the checkpoint journal"""
+    return journal.pending(members) if journal else iter(members)
+
+def source_size(members):
+    """Number of companies in a source, or '?' for a streamed one"""
+    return len(members) if hasattr(members, '__len__') else '?'
+
+def synthetic_source(count, seed):
+    """Stream `count` seeded synthetic members (see generate_synthetic_members.py)"""
+    return generate_members(count, seed)
+
+def print_journal_summary(journal):
+    """Report how much work the checkpoint journal let us skip"""
+    if journal and journal.skipped:
+        print(f"⏭️  Skipped {journal.skipped} companies already in {journal.path}")
+
+def create_member_document(company):
+    """Build the JSON document the create_members() RPC expects for one company"""
+    return {
+        # The natural key, so a later --upsert run finds the rows this call creates
+        "company": dict(create_mock_data(company), member_key=member_key(company)),
+        "services": create_services(None, company),
+        "client_profile": create_client_profile(None, company),
+        "operations": create_operations(None, company),
+    }
+
+def timed_insert(table, rows, stats, upsert=False):
+    """Insert rows into a table in one request and record rows/seconds in stats"""
+    started = time.perf_counter()
+    result = write_rows(supabase, table, rows, upsert).execute()
+    entry = stats.setdefault(table, {"rows": 0, "requests": 0, "seconds": 0.0})
+    entry["rows"] += len(rows)
+    entry["requests"] += 1
+    entry["seconds"] += time.perf_counter() - started
+    return result
+
+def print_throughput(stats):
+    """Print rows per second for each table"""
+    print(f"\n📈 Throughput by table:")
+    for table, entry in stats.items():
+        rate = entry["rows"] / entry["seconds"] if entry["seconds"] else 0.0
+        print(f"   {table:<22} {entry['rows']:>7} rows in {entry['requests']:>4} requests  "
+              f"{entry['seconds']:7.2f}s  {rate:9.1f} rows/s")
+
+def populate_database(members=None, journal=None, upsert=False):
     """Populate the Supabase database with HIMAP member companies"""
+    members = companies if members is None else members
+    total = source_size(members)
     print("🚀 Starting HIMAP member data population...")
-    print(f"📊 Total companies to insert: {len(companies)}\n")
+    print(f"📊 Total companies to insert: {total}\n")
     
     inserted_count = 0
     
-    for idx, company in enumerate(companies, 1):
+    for idx, company in enumerate(pending_companies(members, journal), 1):
         try:
             # Create company data
-            company_data = create_mock_data(company)
+            company_data = create_company_row(company, upsert)
             
             # Insert company
-            result = supabase.table("bpos").insert(company_data).execute()
+            result = write_rows(supabase, "bpos", company_data, upsert).execute()
             
             if result.data and len(result.data) > 0:
                 bpo_id = result.data[0]['id']
                 inserted_count += 1
                 
                 # Create services for this company
-                services_data = create_services(bpo_id)
-                supabase.table("bpo_services").insert(services_data).execute()
+                services_data = create_services(bpo_id, company)
+                write_rows(supabase, "bpo_services", services_data, upsert).execute()
+                if upsert:
+                    prune_services(supabase, [bpo_id], services_data)
                 
                 # Create client profile with mock data
-                client_profile = {
-                    "bpo_id": bpo_id,
-                    "target_market": "United States, Canada",
-                    "client_types": "Hospitals, Physician Practices, Insurance Payers",
-                    "no_of_active_clients": random.randint(5, 50),
-                    "years_serving_healthcare": random.randint(3, 20)
-                }
-                supabase.table("bpo_clients_profile").insert(client_profile).execute()
+                client_profile = create_client_profile(bpo_id, company)
+                write_rows(supabase, "bpo_clients_profile", client_profile, upsert).execute()
                 
                 # Create operations data
-                operations = {
-                    "bpo_id": bpo_id,
-                    "delivery_model": random.choice(["Onsite", "Offshore", "Hybrid"]),
-                    "work_shifts": "24/7 Operations",
-                    "compliance_frameworks": "HIPAA, SOC 2, ISO 27001",
-                    "ehr_systems_supported": "Epic, Cerner, Meditech, Athenahealth"
-                }
-                supabase.table("bpo_operations").insert(operations).execute()
+                operations = create_operations(bpo_id, company)
+                write_rows(supabase, "bpo_operations", operations, upsert).execute()
+                
+                if journal:
+                    journal.record([(member_key(company), bpo_id)])
                 
-                print(f"✅ {idx}/{len(companies)} - {company['name']} - Inserted successfully")
+                print(f"✅ {idx}/{total} - {company['name']} - Inserted successfully")
             else:
-                print(f"❌ {idx}/{len(companies)} - {company['name']} - Failed to insert")
+                print(f"❌ {idx}/{total} - {company['name']} - Failed to insert")
                 
         except Exception as e:
-            print(f"❌ {idx}/{len(companies)} - {company['name']} - Error: {str(e)}")
+            print(f"❌ {idx}/{total} - {company['name']} - Error: {str(e)}")
             continue
     
     print(f"\n🎉 Data population completed!")
-    print(f"✅ Successfully inserted: {inserted_count}/{len(companies)} companies")
+    print(f"✅ Successfully inserted: {inserted_count}/{total} companies")
+    print_journal_summary(journal)
+
+def populate_database_batched(members=None, chunk_size=DEFAULT_CHUNK_SIZE, journal=None, upsert=False):
+    """Populate the database with one multi-row insert per table for each chunk of companies"""
+    members = companies if members is None else members
+    total = source_size(members)
+    print("🚀 Starting HIMAP member data population (batched)...")
+    print(f"📊 Total companies to insert: {total} in chunks of {chunk_size}\n")
+    
+    inserted_count = 0
+    stats = {}
+    started = time.perf_counter()
+    
+    for chunk_no, chunk in enumerate(chunked(pending_companies(members, journal), chunk_size), 1):
+        try:
+            # Insert all companies of the chunk; PostgREST returns rows in insert order
+            company_rows = [create_company_row(company, upsert) for company in chunk]
+            result = timed_insert("bpos", company_rows, stats, upsert)
+            
+            if not result.data or len(result.data) != len(chunk):
+                print(f"❌ Chunk {chunk_no} - Expected {len(chunk)} ids, got {len(result.data or [])}")
+                continue
+            
+            bpo_ids = [row['id'] for row in result.data]
+            inserted_count += len(bpo_ids)
+            
+            # One multi-row insert per child table
+            child_rows = create_child_rows(bpo_ids, chunk)
+            for table, rows in child_rows.items():
+                timed_insert(table, rows, stats, upsert)
+            if upsert:
+                prune_services(supabase, bpo_ids, child_rows["bpo_services"])
+            
+            if journal:
+                journal.record(zip((member_key(company) for company in chunk), bpo_ids))
+            
+            print(f"✅ Chunk {chunk_no} - {inserted_count}/{total} companies inserted")
+            
+        except Exception as e:
+            print(f"❌ Chunk {chunk_no} - Error: {str(e)}")
+            continue
+    
+    elapsed = time.perf_counter() - started
+    print(f"\n🎉 Data population completed in {elapsed:.2f}s!")
+    print(f"✅ Successfully inserted: {inserted_count}/{total} companies")
+    print_journal_summary(journal)
+    print_throughput(stats)
+
+def write_copy_script(output_path):
+    """Write load.sql, which loads every CSV with psql \\copy in one transaction"""
+    lines = [
+        "-- Load the generated member CSVs into Postgres; run from this directory:",
+        "--   psql \"$DATABASE_URL\" -f load.sql",
+        "-- bpos.member_key comes from migrations/add_member_natural_key.sql",
+        "BEGIN;",
+    ]
+    for table, columns in COPY_COLUMNS.items():
+        lines.append(f"\\copy {table} ({', '.join(columns)}) FROM '{table}.csv' WITH (FORMAT csv, HEADER true)")
+    lines.append("COMMIT;")
+    
+    script = output_path / "load.sql"
+    script.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return script
+
+def export_copy_files(members=None, output_dir="member_seed"):
+    """Write COPY-ready CSVs with pre-generated UUIDs instead of calling the REST API"""
+    members = companies if members is None else members
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    
+    print("🚀 Starting HIMAP member COPY export...")
+    print(f"📊 Total companies to export: {source_size(members)}\n")
+    
+    files = {table: open(output_path / f"{table}.csv", "w", newline="", encoding="utf-8") for table in COPY_COLUMNS}
+    writers = {
+        table: csv.DictWriter(files[table], fieldnames=columns, extrasaction="ignore")
+        for table, columns in COPY_COLUMNS.items()
+    }
+    counts = dict.fromkeys(COPY_COLUMNS, 0)
+    started = time.perf_counter()
+    
+    try:
+        for writer in writers.values():
+            writer.writeheader()
+        
+        for company in members:
+            # Ids are generated here, so children can reference the parent without a round trip
+            bpo_id = str(uuid.uuid4())
+            # member_key lets a later --upsert run find these companies (add_member_natural_key.sql)
+            rows = {"bpos": [dict(create_company_row(company, upsert=True), id=bpo_id)]}
+            rows.update(create_child_rows([bpo_id], [company]))
+            
+            for table, table_rows in rows.items():
+                for row in table_rows:
+                    row.setdefault("id", str(uuid.uuid4()))
+                    writers[table].writerow({key: copy_value(value) for key, value in row.items()})
+                counts[table] += len(table_rows)
+    finally:
+        for f in files.values():
+            f.close()
+    
+    script = write_copy_script(output_path)
+    elapsed = time.perf_counter() - started
+    
+    print(f"🎉 Export completed in {elapsed:.2f}s!")
+    for table, count in counts.items():
+        print(f"   {table:<22} {count:>7} rows -> {output_path / (table + '.csv')}")
+    print(f"\n📋 Load with: cd {output_path} && psql \"$DATABASE_URL\" -f {script.name}")
+
+async def insert_company_async(client, idx, company, journal=None, upsert=False):
+    """Insert one company, then its three child rows concurrently"""
+    try:
+        company_data = create_company_row(company, upsert)
+        result = await write_rows(client, "bpos", company_data, upsert).execute()
+        
+        if not result.data:
+            print(f"❌ {idx} - {company['name']} - Failed to insert")
+            return False
+        
+        # The parent row must exist before the children reference it
+        bpo_id = result.data[0]['id']
+        child_rows = create_child_rows([bpo_id], [company])
+        await asyncio.gather(*(
+            write_rows(client, table, rows, upsert).execute()
+            for table, rows in child_rows.items()
+        ))
+        if upsert:
+            await prune_services_async(client, [bpo_id], child_rows["bpo_services"])
+        
+        if journal:
+            journal.record([(member_key(company), bpo_id)])
+        
+        print(f"✅ {idx} - {company['name']} - Inserted successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ {idx} - {company['name']} - Error: {str(e)}")
+        return False
+
+async def populate_database_async(members=None, concurrency=DEFAULT_CONCURRENCY, journal=None, upsert=False):
+    """Populate the database with up to `concurrency` companies in flight over one pooled client"""
+    members = companies if members is None else members
+    total = source_size(members)
+    print("🚀 Starting HIMAP member data population (async)...")
+    print(f"📊 Total companies to insert: {total} with {concurrency} in flight\n")
+    
+    # One async client means one pooled keep-alive HTTP connection pool
+    client = await get_async_client(SUPABASE_URL, SUPABASE_KEY)
+    pending = enumerate(pending_companies(members, journal), 1)
+    started = time.perf_counter()
+    
+    async def worker():
+        # Workers pull from a shared iterator, so at most `concurrency` companies are in flight
+        inserted = 0
+        for idx, company in pending:
+            if await insert_company_async(client, idx, company, journal, upsert):
+                inserted += 1
+        return inserted
+    
+    inserted_count = sum(await asyncio.gather(*(worker() for _ in range(concurrency))))
+    elapsed = time.perf_counter() - started
+    
+    print(f"\n🎉 Data population completed in {elapsed:.2f}s!")
+    print(f"✅ Successfully inserted: {inserted_count}/{total} companies")
+    print_journal_summary(journal)
+    if elapsed:
+        print(f"📈 {inserted_count / elapsed:.1f} companies/s")
+
+def populate_database_rpc(members=None, batch_size=DEFAULT_CHUNK_SIZE, journal=None):
+    """Populate the database through the create_members() RPC, one transaction per batch"""
+    members = companies if members is None else members
+    total = source_size(members)
+    print("🚀 Starting HIMAP member data population (rpc)...")
+    print(f"📊 Total companies to insert: {total} in batches of {batch_size}\n")
+    
+    inserted_count = 0
+    started = time.perf_counter()
+    
+    for batch_no, batch in enumerate(chunked(pending_companies(members, journal), batch_size), 1):
+        try:
+            # Every member in the batch commits or rolls back together
+            documents = [create_member_document(company) for company in batch]
+            result = supabase.rpc("create_members", {"members": documents}).execute()
+            
+            inserted_count += len(result.data or [])
+            if journal:
+                journal.record(zip((member_key(company) for company in batch), (row['bpo_id'] for row in result.data)))
+            print(f"✅ Batch {batch_no} - {inserted_count}/{total} companies inserted")
+            
+        except Exception as e:
+            print(f"❌ Batch {batch_no} - Rolled back, error: {str(e)}")
+            continue
+    
+    elapsed = time.perf_counter() - started
+    print(f"\n🎉 Data population completed in {elapsed:.2f}s!")
+    print(f"✅ Successfully inserted: {inserted_count}/{total} companies")
+    print_journal_summary(journal)
+    if elapsed:
+        print(f"📈 {inserted_count / elapsed:.1f} companies/s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Populate Supabase with HIMAP member companies")
+    parser.add_argument(
+        "--mode",
+        choices=["serial", "batched", "async", "rpc", "copy"],
+        default="serial",
+        help="serial: four inserts per company; batched: multi-row inserts per chunk; "
+             "async: concurrent companies over one pooled client; "
+             "rpc: one create_members() transaction per chunk; "
+             "copy: write COPY-ready CSVs for psql instead of calling the API (default: serial)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Companies per multi-row insert (batched) or per RPC call (rpc) (default: {DEFAULT_CHUNK_SIZE})"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Companies in flight at once in async mode (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--upsert",
+        action="store_true",
+        help="Upsert on the natural key instead of inserting, dropping services a company no longer offers "
+             "(needs migrations/add_member_natural_key.sql)"
+    )
+    parser.add_argument(
+        "--journal",
+        help="Append-only checkpoint file; companies already recorded there are skipped on rerun"
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--input",
+        metavar="FILE",
+        help="Stream members from a CSV or JSONL file, or '-' for stdin, instead of the HIMAP list"
+    )
+    source.add_argument(
+        "--synthetic",
+        type=int,
+        metavar="COUNT",
+        help="Load COUNT seeded synthetic members instead of the HIMAP list"
+    )
+    parser.add_argument(
+        "--input-format",
+        choices=FORMATS,
+        help="Format of --input (default: from the file extension, JSONL for stdin)"
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Abort on the first invalid --input row instead of skipping it"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed for --synthetic (default: 0)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        default="member_seed",
+        help="Directory for the CSVs and load.sql written by --mode copy (default: member_seed)"
+    )
+    args = parser.parse_args()
+    
+    if args.upsert and args.mode in ("rpc", "copy"):
+        parser.error(f"--upsert is not supported with --mode {args.mode}")
+    if args.journal and args.mode == "copy":
+        parser.error("--journal is not supported with --mode copy")
+    if args.synthetic is not None and args.synthetic < 1:
+        parser.error("--synthetic COUNT must be at least 1")
+    
+    if args.input:
+        members = MemberSource(args.input, args.input_format, args.strict)
+    elif args.synthetic is not None:
+        members = synthetic_source(args.synthetic, args.seed)
+    else:
+        members = companies
+    journal = CheckpointJournal(args.journal) if args.journal else None
+    
+    try:
+        if args.mode == "batched":
+            populate_database_batched(members, args.chunk_size, journal, args.upsert)
+        elif args.mode == "async":
+            asyncio.run(populate_database_async(members, args.concurrency, journal, args.upsert))
+        elif args.mode == "rpc":
+            populate_database_rpc(members, args.chunk_size, journal)
+        elif args.mode == "copy":
+            export_copy_files(members, args.output_dir)
+        else:
+            populate_database(members, journal, args.upsert)
+    except MemberValidationError as e:
+        print(f"❌ Invalid member row: {e}")
+        raise SystemExit(1)
+    finally:
+        if journal:
+            journal.close()
+        if args.input:
+            print(f"📄 Source: {members.summary()}")
 
 if __name__ == "__main__":
-    populate_database()
+    main()
@@ -0,0 +1,120 @@
+"""
+Thread stages connected by bounded queues
+
+Usage:
+    from queue_pipeline import Stage, run_stages
+    stats = run_stages(items, [
+        Stage('download', download, workers=16),
+        Stage('upload', upload, workers=4),
+        Stage('record', record, workers=1, finish=flush),
+    ])
+
+Each stage has its own worker threads and an input queue holding at most
+`queue_size` items (default twice its workers), so a fast stage blocks
+instead of piling up work ahead of a slow one and memory stays bounded.
+A stage function takes one item and returns the item for the next stage,
+a list of items, or None to drop it; an exception drops the item and is
+reported. `finish` runs once after a stage's last item, e.g. to flush a
+batch. With every stage busy at once, wall time approaches that of the
+slowest stage rather than the sum.
+"""
+import time
+import queue
+import threading
+
+# Marks the end of a stage's input
+DONE = object()
+
+
+class Stage:
+    """One step of the pipeline and how many threads run it"""
+
+    def __init__(self, name, fn, workers=1, queue_size=None, finish=None):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue_size = queue_size or workers * 2
+        self.finish = finish
+        self.stats = {'in': 0, 'out': 0, 'failed': 0, 'busy': 0.0, 'blocked': 0.0}
+        self.lock = threading.Lock()
+
+
+def run_stages(items, stages):
+    """Feed items through the stages; returns {stage name: stats} plus 'wall' seconds"""
+    queues = [queue.Queue(maxsize=stage.queue_size) for stage in stages]
+    started = time.perf_counter()
+
+    def forward(index, results):
+        if index + 1 >= len(stages) or results is None:
+            return 0
+        if not isinstance(results, list):
+            results = [results]
+        for result in results:
+            queues[index + 1].put(result)
+        return len(results)
+
+    def work(index, remaining):
+        stage = stages[index]
+        inbox = queues[index]
+        while True:
+            item = inbox.get()
+            if item is DONE:
+                break
+            began = time.perf_counter()
+            try:
+                results, failed = stage.fn(item), 0
+            except Exception as e:
+                print(f"  ❌ {stage.name}: {e}")
+                results, failed = None, 1
+            worked = time.perf_counter()
+            produced = forward(index, results)
+            with stage.lock:
+                stage.stats['in'] += 1
+                stage.stats['out'] += produced
+                stage.stats['failed'] += failed
+                stage.stats['busy'] += worked - began
+                stage.stats['blocked'] += time.perf_counter() - worked
+
+        # The last worker out finishes the stage and closes the next one
+        with stage.lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            if stage.finish:
+                try:
+                    forward(index, stage.finish())
+                except Exception as e:
+                    print(f"  ❌ {stage.name}: {e}")
+            if index + 1 < len(stages):
+                for _ in range(stages[index + 1].workers):
+                    queues[index + 1].put(DONE)
+
+    threads = []
+    for index, stage in enumerate(stages):
+        remaining = [stage.workers]
+        for n in range(stage.workers):
+            thread = threading.Thread(target=work, args=(index, remaining), name=f"{stage.name}-{n}", daemon=True)
+            thread.start()
+            threads.append(thread)
+
+    for item in items:
+        queues[0].put(item)
+    for _ in range(stages[0].workers):
+        queues[0].put(DONE)
+    for thread in threads:
+        thread.join()
+
+    wall = time.perf_counter() - started
+    report = {stage.name: dict(stage.stats) for stage in stages}
+    report['wall'] = wall
+    return report
+
+
+def print_report(report):
+    """One line per stage: items, failures, time spent working and time blocked on a full queue"""
+    for name, stats in report.items():
+        if name == 'wall':
+            continue
+        print(f"   {name:<10} {stats['in']:>5} in {stats['out']:>5} out {stats['failed']:>3} failed "
+              f"{stats['busy']:>8.2f}s busy {stats['blocked']:>8.2f}s blocked")
+    print(f"   {'wall':<10} {report['wall']:>8.2f}s")
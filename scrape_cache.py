@@ -0,0 +1,235 @@
+"""
+On-disk cache and local stand-in for Firecrawl scrape calls
+
+Usage:
+    from scrape_cache import ScrapeCache
+    scraper = ScrapeCache(api_key=FIRECRAWL_API_KEY)
+    response = scraper.scrape('https://himap.ph/members/list-of-members/', formats=['markdown'])
+    markdown = response['data'].get('markdown', '')
+
+    python scrape_cache.py list                       # recorded responses and their age
+    python scrape_cache.py prune                      # drop entries older than the TTL
+    python scrape_cache.py serve --port 3002          # caching proxy for any Firecrawl client
+    python scrape_cache.py serve --replay             # replay recordings only, no network
+
+Responses are recorded under FIRECRAWL_CACHE_DIR (default .scrape_cache/),
+one JSON file per request, keyed by a hash of the URL, formats and every
+other scrape option. FIRECRAWL_CACHE selects how they are used:
+
+    use      serve entries younger than FIRECRAWL_CACHE_TTL (default 86400s), else fetch and record
+    refresh  always fetch and record
+    replay   serve recordings of any age and never touch the network; a miss is an error
+    off      always fetch, record nothing
+
+serve runs the same cache behind POST /v2/scrape, so the Firecrawl SDK,
+brand-extractor/scripts/scrape_brand_data.py or a test can point its API
+URL at http://localhost:<port> and replay recorded pages with no API key
+or network.
+"""
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+
+DEFAULT_CACHE_DIR = '.scrape_cache'
+DEFAULT_TTL = 86400
+DEFAULT_API_URL = 'https://api.firecrawl.dev'
+DEFAULT_PORT = 3002
+
+MODES = ['use', 'refresh', 'replay', 'off']
+
+SCRAPE_PATH = '/v2/scrape'
+
+# A full-page scrape with screenshots can take a while
+REQUEST_TIMEOUT = 120
+
+
+class ScrapeCacheMiss(Exception):
+    """A replay-only lookup for a request that was never recorded"""
+
+
+def request_key(body):
+    """Cache key for a scrape request body: URL, formats and all other options"""
+    canonical = {
+        'url': body.get('url'),
+        'formats': body.get('formats') or [],
+        'options': {k: v for k, v in body.items() if k not in ('url', 'formats')},
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def now():
+    return datetime.now(timezone.utc)
+
+
+class ScrapeCache:
+    """Firecrawl /v2/scrape calls answered from recorded responses when possible"""
+
+    def __init__(self, root=None, ttl=None, mode=None, api_url=None, api_key=None):
+        self.root = Path(root or os.getenv('FIRECRAWL_CACHE_DIR', DEFAULT_CACHE_DIR))
+        self.ttl = ttl if ttl is not None else int(os.getenv('FIRECRAWL_CACHE_TTL', DEFAULT_TTL))
+        self.mode = mode or os.getenv('FIRECRAWL_CACHE', 'use')
+        if self.mode not in MODES:
+            raise ValueError(f"FIRECRAWL_CACHE must be one of {', '.join(MODES)}, not {self.mode!r}")
+        self.api_url = (api_url or os.getenv('FIRECRAWL_API_URL', DEFAULT_API_URL)).rstrip('/')
+        self.api_key = api_key or os.getenv('FIRECRAWL_API_KEY')
+        self.session = requests.Session()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'fetched': 0, 'stale': 0}
+
+    def entry_path(self, key):
+        return self.root / key[:2] / f"{key}.json"
+
+    def lookup(self, key):
+        path = self.entry_path(key)
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def age(self, entry):
+        return (now() - datetime.fromisoformat(entry['recorded_at'])).total_seconds()
+
+    def record(self, key, body, response):
+        """Atomically write one entry"""
+        path = self.entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'request': body, 'recorded_at': now().isoformat(), 'response': response}, f, indent=2)
+        os.replace(tmp, path)
+
+    def fetch(self, body, authorization=None):
+        """POST the request to Firecrawl; returns (status, payload)"""
+        headers = {'Content-Type': 'application/json'}
+        if authorization:
+            headers['Authorization'] = authorization
+        elif self.api_key:
+            headers['Authorization'] = f"Bearer {self.api_key}"
+        response = self.session.post(f"{self.api_url}{SCRAPE_PATH}", headers=headers, json=body, timeout=REQUEST_TIMEOUT)
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {'success': False, 'error': response.text}
+        return response.status_code, payload
+
+    def handle(self, body, authorization=None):
+        """(status, payload, source) for one request body; source is 'cache' or 'network'"""
+        key = request_key(body)
+        entry = self.lookup(key) if self.mode in ('use', 'replay') else None
+
+        if entry and (self.mode == 'replay' or self.age(entry) <= self.ttl):
+            with self.lock:
+                self.stats['hits'] += 1
+            return 200, entry['response'], 'cache'
+        if self.mode == 'replay':
+            raise ScrapeCacheMiss(f"no recorded response for {body.get('url')} with formats {body.get('formats')}")
+        if entry:
+            with self.lock:
+                self.stats['stale'] += 1
+
+        status, payload = self.fetch(body, authorization)
+        with self.lock:
+            self.stats['fetched'] += 1
+        # Only successful scrapes are worth replaying
+        if status == 200 and payload.get('success') and self.mode != 'off':
+            self.record(key, body, payload)
+        return status, payload, 'network'
+
+    def scrape(self, url, formats=('markdown',), **options):
+        """Scrape response ({'success', 'data': {...}}) for url, raising on failure"""
+        body = {'url': url, 'formats': list(formats), **options}
+        status, payload, _ = self.handle(body)
+        if status != 200 or not payload.get('success'):
+            raise RuntimeError(f"Firecrawl scrape failed with status {status}: {payload.get('error') or payload}")
+        return payload
+
+    def entries(self):
+        for path in sorted(self.root.glob('*/*.json')):
+            with open(path, 'r', encoding='utf-8') as f:
+                yield path, json.load(f)
+
+    def summary(self):
+        s = self.stats
+        return f"{s['hits']} from cache, {s['fetched']} fetched ({s['stale']} stale), mode {self.mode}"
+
+
+def make_handler(cache):
+    """Request handler serving POST /v2/scrape from `cache`"""
+
+    class ScrapeHandler(BaseHTTPRequestHandler):
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if self.path.rstrip('/') != SCRAPE_PATH:
+                self.send_json(404, {'success': False, 'error': f"only {SCRAPE_PATH} is served"})
+                return
+            body = {}
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+                status, payload, source = cache.handle(body, self.headers.get('Authorization'))
+            except ScrapeCacheMiss as e:
+                status, payload, source = 404, {'success': False, 'error': str(e)}, 'miss'
+            except Exception as e:
+                status, payload, source = 502, {'success': False, 'error': str(e)}, 'error'
+            self.send_json(status, payload)
+            print(f"  {'✅' if status == 200 else '❌'} {body.get('url')} -> {status} ({source})")
+
+        def log_message(self, format, *args):
+            pass
+
+    return ScrapeHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the Firecrawl scrape cache or serve it locally")
+    parser.add_argument("command", choices=["list", "prune", "serve"])
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port for serve (default: {DEFAULT_PORT})")
+    parser.add_argument("--replay", action="store_true", help="Serve recordings only, never call Firecrawl")
+    parser.add_argument("--upstream", help=f"Firecrawl API to forward misses to (default: FIRECRAWL_API_URL or {DEFAULT_API_URL})")
+    args = parser.parse_args()
+
+    cache = ScrapeCache(mode='replay' if args.replay else None, api_url=args.upstream)
+
+    if args.command == "list":
+        for path, entry in cache.entries():
+            request = entry['request']
+            print(f"{cache.age(entry) / 3600:>8.1f}h  {request['url']}  {','.join(request.get('formats') or [])}")
+        return
+
+    if args.command == "prune":
+        removed = 0
+        for path, entry in cache.entries():
+            if cache.age(entry) > cache.ttl:
+                path.unlink()
+                removed += 1
+        print(f"🧹 Removed {removed} entries older than {cache.ttl}s")
+        return
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(cache))
+    print(f"🔥 Firecrawl stand-in on http://127.0.0.1:{args.port}{SCRAPE_PATH} "
+          f"(mode {cache.mode}, cache {cache.root}/, upstream {cache.api_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n🗄️  {cache.summary()}")
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,544 @@
+"""
+Pluggable Supabase backend for the ingestion and logo scripts
+
+Scripts call get_client() instead of supabase.create_client(). With
+SUPABASE_BACKEND=memory they get an in-memory stand-in that implements the
+table()/rpc()/storage calls the scripts use, so pipelines can be run and
+benchmarked on a laptop with no network:
+
+    SUPABASE_BACKEND=memory SUPABASE_MEMORY_LATENCY_MS=40 python populate_members.py --mode batched
+
+SUPABASE_MEMORY_LATENCY_MS / SUPABASE_MEMORY_JITTER_MS inject a per-request
+delay to mimic the round trip to a real project, and
+SUPABASE_MEMORY_THROTTLE_RATE answers that fraction of requests with a 429
+(before applying them) to exercise the retry path. Like the real client it
+raises postgrest's APIError, whose body has no status, and reports the 429
+(with a Retry-After of SUPABASE_MEMORY_RETRY_AFTER seconds, when set)
+through the same httpx response hooks supabase_retry reads. Either way the
+client is wrapped by supabase_metrics, which times every call.
+"""
+import os
+import time
+import uuid
+import random
+import asyncio
+import threading
+from datetime import datetime, timezone
+import httpx
+from postgrest.exceptions import APIError
+from supabase import create_client, acreate_client
+from supabase_metrics import instrument
+
+DEFAULT_MEMORY_URL = "http://localhost:54321"
+
+# Unique keys the stand-in enforces, mirroring database-schema.sql and the migrations
+UNIQUE_KEYS = {
+    "bpos": [("member_key",)],
+    "bpo_services": [("bpo_id", "service_category")],
+    "bpo_clients_profile": [("bpo_id",)],
+    "bpo_operations": [("bpo_id",)],
+    "bpo_media": [("bpo_id", "logo_media_type", "is_primary")],
+}
+
+# Generated columns (GENERATED ALWAYS AS ... STORED), recomputed on every write
+GENERATED_COLUMNS = {
+    "bpo_media": {
+        "logo_media_type": lambda row: row.get("media_type") if (row.get("media_type") or "").startswith("logo") else None,
+    },
+}
+
+# Column defaults applied on insert
+COLUMN_DEFAULTS = {
+    "bpos": {"country": "Philippines", "is_active": True},
+    "bpo_media": {"is_primary": False},
+}
+
+
+def backend_name():
+    """Backend selected by SUPABASE_BACKEND: 'supabase' (default) or 'memory'"""
+    return os.getenv("SUPABASE_BACKEND", "supabase").lower()
+
+
+def memory_latency():
+    """(latency, jitter) in seconds from SUPABASE_MEMORY_LATENCY_MS / SUPABASE_MEMORY_JITTER_MS"""
+    latency = float(os.getenv("SUPABASE_MEMORY_LATENCY_MS", "0")) / 1000
+    jitter = float(os.getenv("SUPABASE_MEMORY_JITTER_MS", "0")) / 1000
+    return latency, jitter
+
+
+def memory_throttle_rate():
+    """Fraction of requests the stand-in rejects with 429, from SUPABASE_MEMORY_THROTTLE_RATE"""
+    return float(os.getenv("SUPABASE_MEMORY_THROTTLE_RATE", "0"))
+
+
+def memory_retry_after():
+    """Retry-After header sent with the stand-in's 429s, from SUPABASE_MEMORY_RETRY_AFTER (unset: none)"""
+    return os.getenv("SUPABASE_MEMORY_RETRY_AFTER") or None
+
+
+def get_client(url=None, key=None):
+    """Return an instrumented sync client for the configured backend"""
+    if backend_name() == "memory":
+        latency, jitter = memory_latency()
+        return instrument(InMemoryClient(url=url, latency=latency, jitter=jitter,
+                                         throttle=memory_throttle_rate(), retry_after=memory_retry_after()))
+    return instrument(create_client(url or os.getenv("SUPABASE_URL"), key or os.getenv("SUPABASE_SERVICE_ROLE_KEY")))
+
+
+async def get_async_client(url=None, key=None):
+    """Return an instrumented async client for the configured backend"""
+    if backend_name() == "memory":
+        latency, jitter = memory_latency()
+        return instrument(AsyncInMemoryClient(url=url, latency=latency, jitter=jitter,
+                                              throttle=memory_throttle_rate(), retry_after=memory_retry_after()))
+    return instrument(await acreate_client(url or os.getenv("SUPABASE_URL"), key or os.getenv("SUPABASE_SERVICE_ROLE_KEY")))
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class InMemoryAPIError(APIError):
+    """Raised where PostgREST would answer with an error; a postgrest.APIError built from the same body"""
+
+    def __init__(self, message, code=None):
+        super().__init__({"message": message, "code": code, "hint": None, "details": None})
+
+
+class InMemorySession:
+    """Stand-in for the httpx client under postgrest/storage: only its response hooks"""
+
+    def __init__(self):
+        self.event_hooks = {"request": [], "response": []}
+
+    def respond(self, status, headers=None):
+        response = httpx.Response(status, headers=headers)
+        for hook in self.event_hooks["response"]:
+            hook(response)
+
+
+class InMemoryResponse:
+    """Stand-in for postgrest's APIResponse"""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class InMemoryDatabase:
+    """Tables as lists of row dicts plus storage buckets as path -> bytes maps"""
+
+    def __init__(self):
+        self.tables = {}
+        self.buckets = {}
+        self.bucket_options = {}
+        self.requests = 0
+        self.lock = threading.RLock()
+
+    def reset(self):
+        with self.lock:
+            self.tables.clear()
+            self.buckets.clear()
+            self.bucket_options.clear()
+            self.requests = 0
+
+    def rows(self, table):
+        return self.tables.setdefault(table, [])
+
+    def generate(self, table, row):
+        """Row with its generated columns filled in"""
+        generated = GENERATED_COLUMNS.get(table)
+        if not generated:
+            return row
+        return dict(row, **{column: compute(row) for column, compute in generated.items()})
+
+    def find_conflict(self, table, row, keys):
+        """Existing row sharing any of the given unique keys with `row`"""
+        for key in keys:
+            if any(row.get(column) is None for column in key):
+                continue
+            for existing in self.rows(table):
+                if all(existing.get(column) == row.get(column) for column in key):
+                    return existing
+        return None
+
+    def insert(self, table, rows, on_conflict=None, ignore_duplicates=False):
+        """Insert rows; with on_conflict, update (or skip) the conflicting row instead"""
+        conflict_keys = [tuple(c.strip() for c in on_conflict.split(","))] if on_conflict else []
+        inserted = []
+        with self.lock:
+            for row in rows:
+                row = self.generate(table, row)
+                existing = self.find_conflict(table, row, conflict_keys) if conflict_keys else None
+                if existing is not None:
+                    if not ignore_duplicates:
+                        existing.update({k: v for k, v in row.items() if k != "id"})
+                        existing["updated_at"] = now_iso()
+                        inserted.append(dict(existing))
+                    continue
+
+                if self.find_conflict(table, row, UNIQUE_KEYS.get(table, [])) is not None:
+                    raise InMemoryAPIError(
+                        f'duplicate key value violates unique constraint on "{table}"', code="23505"
+                    )
+
+                stamped = dict(COLUMN_DEFAULTS.get(table, {}))
+                stamped.update(row)
+                stamped.setdefault("id", str(uuid.uuid4()))
+                stamped.setdefault("created_at", now_iso())
+                stamped.setdefault("updated_at", stamped["created_at"])
+                self.rows(table).append(stamped)
+                inserted.append(dict(stamped))
+        return inserted
+
+
+# Shared by every client in the process, so scripts imported together see the same data
+default_database = InMemoryDatabase()
+
+
+class InMemoryQuery:
+    """Chainable stand-in for postgrest's request builders"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.db = client.db
+        self.table = table
+        self.operation = "select"
+        self.columns = "*"
+        self.payload = None
+        self.options = {}
+        self.filters = []
+        self.ordering = []
+        self.window = None
+        self.count = None
+
+    # Operations
+    def select(self, columns="*", count=None):
+        self.operation = "select"
+        self.columns = columns
+        self.count = count
+        return self
+
+    def insert(self, rows, **options):
+        self.operation = "insert"
+        self.payload = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict="", ignore_duplicates=False, **options):
+        self.operation = "upsert"
+        self.payload = rows if isinstance(rows, list) else [rows]
+        self.options = {"on_conflict": on_conflict or "id", "ignore_duplicates": ignore_duplicates}
+        return self
+
+    def update(self, values, **options):
+        self.operation = "update"
+        self.payload = values
+        return self
+
+    def delete(self, **options):
+        self.operation = "delete"
+        return self
+
+    # Filters and modifiers
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) > value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) >= value)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) < value)
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) <= value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column, desc=False, **options):
+        self.ordering.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self.window = (start, end + 1)
+        return self
+
+    def limit(self, size, **options):
+        self.window = (0, size)
+        return self
+
+    # Execution
+    def matching(self):
+        return [row for row in self.db.rows(self.table) if all(f(row) for f in self.filters)]
+
+    def project(self, row):
+        if self.columns.strip() == "*":
+            return dict(row)
+        return {column.strip(): row.get(column.strip()) for column in self.columns.split(",")}
+
+    def run(self):
+        with self.db.lock:
+            self.db.requests += 1
+            if self.operation in ("insert", "upsert"):
+                return InMemoryResponse(self.db.insert(self.table, self.payload, **self.options))
+
+            rows = self.matching()
+            if self.operation == "update":
+                for row in rows:
+                    row.update(self.db.generate(self.table, dict(row, **self.payload)))
+                    row["updated_at"] = now_iso()
+                return InMemoryResponse([dict(row) for row in rows])
+            if self.operation == "delete":
+                removed = {id(row) for row in rows}
+                self.db.tables[self.table] = [r for r in self.db.rows(self.table) if id(r) not in removed]
+                return InMemoryResponse([dict(row) for row in rows])
+
+            for column, desc in reversed(self.ordering):
+                rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+            count = len(rows) if self.count else None
+            if self.window:
+                rows = rows[self.window[0]:self.window[1]]
+            return InMemoryResponse([self.project(row) for row in rows], count)
+
+    def execute(self):
+        self.client.wait()
+        return self.run()
+
+
+class InMemoryRPC:
+    """Stand-in for client.rpc(name, params)"""
+
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params or {}
+
+    def run(self):
+        handler = RPC_HANDLERS.get(self.name)
+        if handler is None:
+            raise InMemoryAPIError(f"Could not find the function public.{self.name}", code="PGRST202")
+        with self.client.db.lock:
+            self.client.db.requests += 1
+            return InMemoryResponse(handler(self.client.db, **self.params))
+
+    def execute(self):
+        self.client.wait()
+        return self.run()
+
+
+def rpc_create_members(db, members):
+    """In-memory create_members() (migrations/add_create_members_rpc.sql), all-or-nothing per call"""
+    if isinstance(members, dict):
+        members = [members]
+    snapshot = {table: [dict(row) for row in rows] for table, rows in db.tables.items()}
+    created = []
+    try:
+        for member in members:
+            company = db.insert("bpos", [member["company"]])[0]
+            bpo_id = company["id"]
+            db.insert("bpo_services", [dict(s, bpo_id=bpo_id) for s in member.get("services") or []])
+            for table, field in (("bpo_clients_profile", "client_profile"), ("bpo_operations", "operations")):
+                if member.get(field) is not None:
+                    db.insert(table, [dict(member[field], bpo_id=bpo_id)])
+            created.append({"bpo_id": bpo_id, "company_name": company["company_name"]})
+    except Exception:
+        db.tables = snapshot
+        raise
+    return created
+
+
+RPC_HANDLERS = {
+    "create_members": rpc_create_members,
+}
+
+
+class InMemoryUploadResponse:
+    def __init__(self, path):
+        self.path = path
+        self.full_path = path
+
+
+class InMemoryBucket:
+    """Stand-in for storage.from_(bucket)"""
+
+    def __init__(self, client, bucket):
+        self.client = client
+        self.db = client.db
+        self.bucket = bucket
+
+    def objects(self):
+        return self.db.buckets.setdefault(self.bucket, {})
+
+    def upload(self, path, file, file_options=None):
+        self.client.wait()
+        file_options = file_options or {}
+        upsert = str(file_options.get("upsert", file_options.get("x-upsert", "false"))).lower() == "true"
+        content = file.read() if hasattr(file, "read") else file
+        if isinstance(content, str):
+            with open(content, "rb") as f:
+                content = f.read()
+        with self.db.lock:
+            self.db.requests += 1
+            if path in self.objects() and not upsert:
+                raise InMemoryAPIError("The resource already exists", code="409")
+            allowed = self.db.bucket_options.get(self.bucket, {}).get("allowed_mime_types")
+            content_type = file_options.get("content-type", "application/octet-stream")
+            if allowed and content_type not in allowed:
+                raise InMemoryAPIError(f"mime type {content_type} is not supported", code="415")
+            self.objects()[path] = {
+                "content": bytes(content),
+                "content_type": file_options.get("content-type", "application/octet-stream"),
+                "updated_at": now_iso(),
+            }
+        return InMemoryUploadResponse(path)
+
+    def update(self, path, file, file_options=None):
+        return self.upload(path, file, dict(file_options or {}, upsert="true"))
+
+    def download(self, path):
+        self.client.wait()
+        with self.db.lock:
+            self.db.requests += 1
+            if path not in self.objects():
+                raise InMemoryAPIError("Object not found", code="404")
+            return self.objects()[path]["content"]
+
+    def remove(self, paths):
+        self.client.wait()
+        with self.db.lock:
+            self.db.requests += 1
+            return [{"name": p} for p in paths if self.objects().pop(p, None) is not None]
+
+    def list(self, path=None, options=None):
+        self.client.wait()
+        options = options or {}
+        prefix = f"{path.rstrip('/')}/" if path else ""
+        with self.db.lock:
+            self.db.requests += 1
+            names = sorted(p[len(prefix):] for p in self.objects() if p.startswith(prefix) and "/" not in p[len(prefix):])
+            offset = options.get("offset", 0)
+            names = names[offset:offset + options.get("limit", 100)]
+            return [
+                {
+                    "name": name,
+                    "updated_at": self.objects()[prefix + name]["updated_at"],
+                    "metadata": {
+                        "size": len(self.objects()[prefix + name]["content"]),
+                        "mimetype": self.objects()[prefix + name]["content_type"],
+                    },
+                }
+                for name in names
+            ]
+
+    def get_public_url(self, path, options=None):
+        return f"{self.client.url}/storage/v1/object/public/{self.bucket}/{path}"
+
+
+class InMemoryStorage:
+    """Stand-in for client.storage"""
+
+    def __init__(self, client):
+        self.client = client
+        self.session = client.session
+
+    def from_(self, bucket):
+        return InMemoryBucket(self.client, bucket)
+
+    def create_bucket(self, bucket_id, name=None, options=None):
+        with self.client.db.lock:
+            if bucket_id in self.client.db.buckets:
+                raise InMemoryAPIError("The resource already exists", code="409")
+            self.client.db.buckets[bucket_id] = {}
+            self.client.db.bucket_options[bucket_id] = dict(options or {})
+        return {"name": bucket_id}
+
+    def update_bucket(self, bucket_id, options):
+        with self.client.db.lock:
+            if bucket_id not in self.client.db.buckets:
+                raise InMemoryAPIError("Bucket not found", code="404")
+            self.client.db.bucket_options[bucket_id] = dict(options or {})
+        return {"message": "Successfully updated"}
+
+    def list_buckets(self):
+        return [{"id": name, "name": name} for name in self.client.db.buckets]
+
+
+class InMemoryClient:
+    """Offline stand-in for supabase.Client with injectable per-request latency"""
+
+    def __init__(self, url=None, db=None, latency=0.0, jitter=0.0, throttle=0.0, retry_after=None):
+        self.url = (url or DEFAULT_MEMORY_URL).rstrip("/")
+        self.db = db or default_database
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self.session = InMemorySession()
+        self.storage = InMemoryStorage(self)
+
+    def delay(self):
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def throttled(self):
+        if self.throttle and random.random() < self.throttle:
+            # The gateway's 429 body has no code; the status only reaches the response hooks
+            self.session.respond(429, {"retry-after": str(self.retry_after)} if self.retry_after else None)
+            raise InMemoryAPIError("Too Many Requests")
+
+    def wait(self):
+        delay = self.delay()
+        if delay:
+            time.sleep(delay)
+        self.throttled()
+
+    def table(self, table_name):
+        return InMemoryQuery(self, table_name)
+
+    from_ = table
+
+    def rpc(self, fn, params=None):
+        return InMemoryRPC(self, fn, params)
+
+
+class AsyncInMemoryQuery(InMemoryQuery):
+    async def execute(self):
+        await self.client.wait_async()
+        return self.run()
+
+
+class AsyncInMemoryRPC(InMemoryRPC):
+    async def execute(self):
+        await self.client.wait_async()
+        return self.run()
+
+
+class AsyncInMemoryClient(InMemoryClient):
+    """Async flavour of InMemoryClient: execute() is awaited and latency does not block the loop"""
+
+    async def wait_async(self):
+        delay = self.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        self.throttled()
+
+    def table(self, table_name):
+        return AsyncInMemoryQuery(self, table_name)
+
+    from_ = table
+
+    def rpc(self, fn, params=None):
+        return AsyncInMemoryRPC(self, fn, params)
@@ -0,0 +1,315 @@
+"""
+Latency and throughput instrumentation for Supabase calls
+
+supabase_backend.get_client() wraps every client in InstrumentedClient, which
+times each .execute() and each storage call and records, per target
+(table, rpc or bucket) and operation:
+
+- a latency histogram plus min/mean/p50/p95/max
+- the first ("cold") call separately: it pays DNS + TCP + TLS setup, so
+  cold minus p50 approximates connection setup, while per-table p50s
+  expose PostgREST and trigger overhead (bpos/bpo_services/bpo_media have
+  audit triggers, the other tables do not)
+- bytes sent, retries and errors
+
+Each call also goes through supabase_retry, which retries transient
+failures and adapts how many calls may be in flight; every retry is
+counted here and every attempt is timed on its own. The wrapper hooks the
+httpx sessions under PostgREST and storage so the retry loop sees the HTTP
+status and Retry-After of every error response.
+
+At exit a JSON summary is written to SUPABASE_METRICS_FILE
+(default: supabase_metrics.json), with a digest on stderr; set it to an
+empty string to disable.
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import random
+import inspect
+import threading
+from datetime import datetime, timezone
+from supabase_retry import call_with_retry, call_with_retry_async, watch_responses
+
+# Histogram bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+# Latency samples kept per (target, operation) for percentiles (reservoir sampling)
+RESERVOIR_SIZE = 2048
+
+# Builder methods that decide what a PostgREST request does
+OPERATIONS = {"select", "insert", "upsert", "update", "delete"}
+
+# Storage bucket methods that hit the network
+STORAGE_OPERATIONS = {"upload", "update", "download", "remove", "list", "move", "copy"}
+
+
+def payload_size(payload):
+    """Approximate request body size in bytes"""
+    if payload is None:
+        return 0
+    if isinstance(payload, (bytes, bytearray)):
+        return len(payload)
+    if isinstance(payload, str):
+        return len(payload.encode("utf-8"))
+    return len(json.dumps(payload, default=str).encode("utf-8"))
+
+
+class CallStats:
+    """Aggregated stats for one (target, operation) pair"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+        self.cold_ms = None
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.samples = []
+
+    def add(self, elapsed_ms, bytes_sent, error):
+        if self.cold_ms is None:
+            self.cold_ms = elapsed_ms
+        self.calls += 1
+        self.errors += int(error)
+        self.bytes_sent += bytes_sent
+        self.total_ms += elapsed_ms
+        self.min_ms = elapsed_ms if self.min_ms is None else min(self.min_ms, elapsed_ms)
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        for idx, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[idx] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        if len(self.samples) < RESERVOIR_SIZE:
+            self.samples.append(elapsed_ms)
+        else:
+            slot = random.randrange(self.calls)
+            if slot < RESERVOIR_SIZE:
+                self.samples[slot] = elapsed_ms
+
+    def percentile(self, fraction):
+        """Latency below which `fraction` of the sampled calls fall"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 2)
+
+    def summary(self):
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "bytes_sent": self.bytes_sent,
+            "latency_ms": {
+                "cold": round(self.cold_ms, 2) if self.cold_ms is not None else None,
+                "min": round(self.min_ms, 2) if self.min_ms is not None else None,
+                "mean": round(self.total_ms / self.calls, 2) if self.calls else None,
+                "p50": self.percentile(0.50),
+                "p95": self.percentile(0.95),
+                "max": round(self.max_ms, 2),
+                "total": round(self.total_ms, 2),
+                "histogram": {label: count for label, count in zip(labels, self.buckets) if count},
+            },
+        }
+
+
+class RunMetrics:
+    """Thread-safe collector for one script run"""
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def entry(self, target, operation):
+        return self.stats.setdefault((target, operation), CallStats())
+
+    def record(self, target, operation, elapsed_ms, bytes_sent=0, error=False):
+        with self.lock:
+            self.entry(target, operation).add(elapsed_ms, bytes_sent, error)
+
+    def record_retry(self, target, operation):
+        with self.lock:
+            self.entry(target, operation).retries += 1
+
+    def timed(self, target, operation, bytes_sent, fn):
+        """Call fn() and record its latency, counting raised exceptions as errors"""
+        started = time.perf_counter()
+        error = True
+        try:
+            result = fn()
+            error = False
+            return result
+        finally:
+            self.record(target, operation, (time.perf_counter() - started) * 1000, bytes_sent, error)
+
+    async def timed_async(self, target, operation, bytes_sent, fn):
+        """Await fn() and record its latency, counting raised exceptions as errors"""
+        started = time.perf_counter()
+        error = True
+        try:
+            result = await fn()
+            error = False
+            return result
+        finally:
+            self.record(target, operation, (time.perf_counter() - started) * 1000, bytes_sent, error)
+
+    def summary(self):
+        with self.lock:
+            return {
+                "started_at": self.started_at.isoformat(),
+                "duration_s": round(time.perf_counter() - self.started, 3),
+                "script": os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else None,
+                "calls": [
+                    dict(target=target, operation=operation, **stats.summary())
+                    for (target, operation), stats in sorted(self.stats.items())
+                ],
+            }
+
+    def write_summary(self, path=None):
+        """Write the JSON summary and print a one-line-per-call digest"""
+        path = os.getenv("SUPABASE_METRICS_FILE", "supabase_metrics.json") if path is None else path
+        if not path or not self.stats:
+            return None
+
+        summary = self.summary()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+        # stderr, so the digest never ends up in a script's own output (SQL, JSON reports)
+        print(f"\n📊 Supabase calls ({summary['duration_s']}s run) - full summary in {path}", file=sys.stderr)
+        for call in summary["calls"]:
+            latency = call["latency_ms"]
+            print(f"   {call['target']:<28} {call['operation']:<8} {call['calls']:>6} calls  "
+                  f"p50 {latency['p50']}ms  p95 {latency['p95']}ms  cold {latency['cold']}ms  "
+                  f"{call['bytes_sent']:>9} B  {call['retries']} retries  {call['errors']} errors", file=sys.stderr)
+        return path
+
+
+# One collector per process; every instrumented client reports into it
+run_metrics = RunMetrics()
+atexit.register(run_metrics.write_summary)
+
+
+class InstrumentedQuery:
+    """Wraps a PostgREST request builder; its execute() is timed and retried"""
+
+    def __init__(self, builder, metrics, target, operation="select", bytes_sent=0):
+        self._builder = builder
+        self._metrics = metrics
+        self._target = target
+        self._operation = operation
+        self._bytes_sent = bytes_sent
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            operation, bytes_sent = self._operation, self._bytes_sent
+            if name in OPERATIONS:
+                operation = name
+                if name != "select":
+                    bytes_sent = payload_size(args[0] if args else kwargs.get("json"))
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                return InstrumentedQuery(result, self._metrics, self._target, operation, bytes_sent)
+            return result
+
+        return call
+
+    def execute(self):
+        target, operation, bytes_sent = self._target, self._operation, self._bytes_sent
+        if inspect.iscoroutinefunction(self._builder.execute):
+            return call_with_retry_async(
+                lambda: self._metrics.timed_async(target, operation, bytes_sent, self._builder.execute),
+                target, operation, self._metrics,
+            )
+        return call_with_retry(
+            lambda: self._metrics.timed(target, operation, bytes_sent, self._builder.execute),
+            target, operation, self._metrics,
+        )
+
+
+class InstrumentedBucket:
+    """Wraps storage.from_(bucket); its network calls are timed and retried"""
+
+    def __init__(self, bucket, metrics, name):
+        self._bucket = bucket
+        self._metrics = metrics
+        self._target = f"storage:{name}"
+
+    def __getattr__(self, name):
+        attr = getattr(self._bucket, name)
+        if name not in STORAGE_OPERATIONS:
+            return attr
+
+        def call(*args, **kwargs):
+            bytes_sent = payload_size(args[1]) if name in ("upload", "update") and len(args) > 1 else 0
+            return call_with_retry(
+                lambda: self._metrics.timed(self._target, name, bytes_sent, lambda: attr(*args, **kwargs)),
+                self._target, name, self._metrics,
+            )
+
+        return call
+
+
+class InstrumentedStorage:
+    """Wraps client.storage so every bucket handle is instrumented"""
+
+    def __init__(self, storage, metrics):
+        self._storage = storage
+        self._metrics = metrics
+
+    def from_(self, bucket):
+        watch_responses(getattr(self._storage, "session", None))
+        return InstrumentedBucket(self._storage.from_(bucket), self._metrics, bucket)
+
+    def __getattr__(self, name):
+        return getattr(self._storage, name)
+
+
+class InstrumentedClient:
+    """Drop-in wrapper for a Supabase (or in-memory) client that reports to RunMetrics"""
+
+    def __init__(self, client, metrics=None):
+        self._client = client
+        self._metrics = metrics or run_metrics
+        self.storage = InstrumentedStorage(client.storage, self._metrics)
+
+    def watch(self):
+        # supabase-py rebuilds its PostgREST client on auth changes, so check on every request;
+        # the in-memory stand-in has no separate PostgREST client and carries the session itself
+        watch_responses(getattr(getattr(self._client, "postgrest", self._client), "session", None))
+
+    def table(self, table_name):
+        self.watch()
+        return InstrumentedQuery(self._client.table(table_name), self._metrics, table_name)
+
+    from_ = table
+
+    def rpc(self, fn, params=None, *args, **kwargs):
+        self.watch()
+        if params is None:
+            builder = self._client.rpc(fn, *args, **kwargs)
+        else:
+            builder = self._client.rpc(fn, params, *args, **kwargs)
+        return InstrumentedQuery(builder, self._metrics, f"rpc:{fn}", "rpc", payload_size(params))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def instrument(client, metrics=None):
+    """Wrap a client so its calls are timed"""
+    return InstrumentedClient(client, metrics)
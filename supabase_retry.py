@@ -0,0 +1,259 @@
+"""
+Retry policy and adaptive concurrency limit shared by every Supabase call
+
+InstrumentedClient (supabase_metrics.py) runs each PostgREST execute() and
+storage call through call_with_retry() / call_with_retry_async():
+
+- transient failures (connection errors, timeouts, 408/425/429/5xx,
+  Postgres serialization failures and deadlocks) are retried with
+  exponential backoff and full jitter, honoring Retry-After when the
+  server sends it
+- inserts and RPCs are only retried when the request cannot have been
+  applied (connection refused, 429, 503), so a lost response never
+  turns into a duplicate row
+- AdaptiveLimiter caps calls in flight: it halves on 429/503 and grows
+  back by one after a full window of successes (AIMD)
+
+postgrest's APIError carries only the JSON body (message/code/hint/details),
+not the HTTP status or headers. watch_responses() installs record_response()
+as a response hook on the httpx client under PostgREST and storage; it keeps
+the status and headers of the last error response in a context variable, and
+the retry loop copies them onto the exception (http_status / http_headers)
+before classifying it.
+
+Tuning: SUPABASE_MAX_ATTEMPTS, SUPABASE_RETRY_BASE_MS, SUPABASE_RETRY_MAX_MS,
+SUPABASE_MAX_CONCURRENCY.
+"""
+import os
+import time
+import random
+import asyncio
+import threading
+import contextvars
+import httpx
+
+# HTTP statuses worth retrying
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+# Statuses that mean "slow down"; they shrink the concurrency limit
+THROTTLE_STATUSES = {429, 503}
+
+# Postgres / PostgREST error codes worth retrying
+RETRYABLE_PG_CODES = {"40001", "40P01", "57014", "PGRST003"}
+
+# Operations that are not idempotent: retried only when the request was certainly not applied
+NON_IDEMPOTENT_OPERATIONS = {"insert", "rpc", "upload"}
+
+# Upper bound on a server-requested Retry-After, in seconds
+MAX_RETRY_AFTER = 60.0
+
+
+# (status, headers) of the last error response seen by this thread / task
+last_error_response = contextvars.ContextVar("last_error_response", default=None)
+
+
+def record_response(response):
+    """httpx response hook: remember the status and headers of an error response"""
+    if response.status_code >= 400:
+        last_error_response.set((response.status_code, response.headers))
+
+
+async def record_response_async(response):
+    record_response(response)
+
+
+def watch_responses(session):
+    """Install record_response on an httpx client (sync or async), once"""
+    hooks = getattr(session, "event_hooks", None)
+    if hooks is None:
+        return
+    hook = record_response_async if isinstance(session, httpx.AsyncClient) else record_response
+    if hook not in hooks["response"]:
+        hooks["response"].append(hook)
+
+
+def attach_response(exc):
+    """Copy the captured error response onto exc, unless it carries its own"""
+    captured = last_error_response.get()
+    if captured is None or getattr(exc, "response", None) is not None:
+        return
+    try:
+        exc.http_status, exc.http_headers = captured
+    except AttributeError:
+        pass
+
+
+def error_details(exc):
+    """(status, code, retry_after) from a postgrest/storage/httpx error, where available"""
+    status, code, retry_after = None, None, None
+
+    response = getattr(exc, "response", None)
+    if response is not None and getattr(response, "status_code", None):
+        status = response.status_code
+        retry_after = parse_retry_after(response.headers.get("retry-after"))
+    elif getattr(exc, "http_status", None):
+        # Captured by record_response on the way in
+        status = exc.http_status
+        retry_after = parse_retry_after(exc.http_headers.get("retry-after"))
+
+    raw_code = getattr(exc, "code", None)
+    if raw_code is not None:
+        code = str(raw_code)
+        if status is None and code.isdigit() and len(code) == 3:
+            status = int(code)
+
+    # storage3's StorageApiError carries the HTTP status separately from its code
+    raw_status = getattr(exc, "status", None)
+    if status is None and str(raw_status).isdigit():
+        status = int(raw_status)
+
+    return status, code, retry_after
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header given in seconds (HTTP-date values are ignored)"""
+    try:
+        return min(MAX_RETRY_AFTER, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return None
+
+
+def classify(exc, operation):
+    """(retryable, throttled, retry_after) for an exception raised by `operation`"""
+    if isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, ConnectionRefusedError)):
+        # Never reached the server: safe to retry anything
+        return True, False, None
+    if isinstance(exc, (httpx.TransportError, ConnectionError, TimeoutError)):
+        # Sent, but the response was lost: only idempotent operations may be replayed
+        return operation not in NON_IDEMPOTENT_OPERATIONS, False, None
+
+    status, code, retry_after = error_details(exc)
+    throttled = status in THROTTLE_STATUSES
+    if throttled:
+        return True, True, retry_after
+    if operation in NON_IDEMPOTENT_OPERATIONS:
+        return False, False, None
+    return status in RETRYABLE_STATUSES or code in RETRYABLE_PG_CODES, False, retry_after
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, capped, honoring Retry-After"""
+
+    def __init__(self, max_attempts=5, base_delay=0.25, max_delay=20.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_attempts=int(os.getenv("SUPABASE_MAX_ATTEMPTS", "5")),
+            base_delay=float(os.getenv("SUPABASE_RETRY_BASE_MS", "250")) / 1000,
+            max_delay=float(os.getenv("SUPABASE_RETRY_MAX_MS", "20000")) / 1000,
+        )
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to wait before retry number `attempt` (1-based)"""
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class AdaptiveLimiter:
+    """AIMD cap on calls in flight, shared by every thread (and the async engine)"""
+
+    def __init__(self, initial=8, minimum=1, maximum=64):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self.successes = 0
+        self.condition = threading.Condition()
+
+    @classmethod
+    def from_env(cls):
+        maximum = int(os.getenv("SUPABASE_MAX_CONCURRENCY", "64"))
+        return cls(initial=min(16, maximum), maximum=maximum)
+
+    def try_acquire(self):
+        with self.condition:
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self):
+        # Never block the event loop on the thread condition; poll cheaply instead
+        while not self.try_acquire():
+            await asyncio.sleep(0.005)
+
+    def release(self, throttled=False):
+        with self.condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit // 2)
+                self.successes = 0
+            else:
+                self.successes += 1
+                if self.successes >= self.limit and self.limit < self.maximum:
+                    self.limit += 1
+                    self.successes = 0
+            self.condition.notify_all()
+
+
+default_policy = RetryPolicy.from_env()
+default_limiter = AdaptiveLimiter.from_env()
+
+
+def call_with_retry(fn, target, operation, metrics=None, policy=None, limiter=None):
+    """Run fn() under the limiter, retrying transient failures"""
+    policy = policy or default_policy
+    limiter = limiter or default_limiter
+
+    for attempt in range(1, policy.max_attempts + 1):
+        limiter.acquire()
+        throttled = False
+        last_error_response.set(None)
+        try:
+            return fn()
+        except Exception as exc:
+            attach_response(exc)
+            retryable, throttled, retry_after = classify(exc, operation)
+            if not retryable or attempt == policy.max_attempts:
+                raise
+        finally:
+            limiter.release(throttled)
+
+        if metrics:
+            metrics.record_retry(target, operation)
+        time.sleep(policy.delay(attempt, retry_after))
+
+
+async def call_with_retry_async(fn, target, operation, metrics=None, policy=None, limiter=None):
+    """Await fn() under the limiter, retrying transient failures"""
+    policy = policy or default_policy
+    limiter = limiter or default_limiter
+
+    for attempt in range(1, policy.max_attempts + 1):
+        await limiter.acquire_async()
+        throttled = False
+        last_error_response.set(None)
+        try:
+            return await fn()
+        except Exception as exc:
+            attach_response(exc)
+            retryable, throttled, retry_after = classify(exc, operation)
+            if not retryable or attempt == policy.max_attempts:
+                raise
+        finally:
+            limiter.release(throttled)
+
+        if metrics:
+            metrics.record_retry(target, operation)
+        await asyncio.sleep(policy.delay(attempt, retry_after))
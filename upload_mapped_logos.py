@@ -5,7 +5,11 @@ import os
 import csv
 from pathlib import Path
 from dotenv import load_dotenv
-from supabase import create_client
+from supabase_backend import get_client
+from company_matcher import CompanyMatcher
+from logo_cache import LogoCache
+from logo_derivatives import build_derivatives, upload_derivatives, storage_stem
+from bpo_media import media_row, upsert_media
 import re
 
 # Load environment variables
@@ -19,54 +23,44 @@ LOGOS_DIR = Path('downloaded_logos')
 MAPPING_FILE = 'logo_company_mapping.csv'
 
 # Initialize Supabase
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase = get_client(SUPABASE_URL, SUPABASE_KEY)
 
-def match_company_to_db(company_name):
+def match_company_to_db(matcher, company_name):
     """Match company name to database ID"""
-    try:
-        response = supabase.table('bpos').select('id, company_name, trade_name').eq('is_active', True).execute()
-        companies = response.data
-        
-        # Exact match
-        for company in companies:
-            if company['company_name'].lower() == company_name.lower():
-                return company['id'], company['company_name']
-            if company.get('trade_name') and company['trade_name'].lower() == company_name.lower():
-                return company['id'], company['company_name']
-        
-        # Partial match
-        for company in companies:
-            if company_name.lower() in company['company_name'].lower():
-                return company['id'], company['company_name']
-            if company.get('trade_name') and company_name.lower() in company['trade_name'].lower():
-                return company['id'], company['company_name']
-        
-        return None, None
-        
-    except Exception as e:
-        print(f"  ❌ Error matching: {e}")
+    company, score = matcher.match(company_name)
+    if not company:
         return None, None
+    return company['id'], company['company_name']
 
-def upload_logo(file_path, company_name):
-    """Upload logo to Supabase Storage"""
+def upload_logo(file_path, company_name, cache=None):
+    """Upload logo to Supabase Storage, skipping files already there unchanged"""
     try:
         safe_name = re.sub(r'[^a-zA-Z0-9_-]', '_', company_name.lower())
         file_ext = Path(file_path).suffix
         storage_path = f"logos/{safe_name}{file_ext}"
+        bucket = supabase.storage.from_('bpo-assets')
+        
+        if cache:
+            needed, sha = cache.needs_upload(bucket, 'bpo-assets', storage_path, file_path)
+            if not needed:
+                print(f"    ⏭️  Unchanged, skipping upload")
+                return bucket.get_public_url(storage_path)
         
         # Read file
         with open(file_path, 'rb') as f:
             file_content = f.read()
         
         # Upload to storage
-        supabase.storage.from_('bpo-assets').upload(
+        bucket.upload(
             storage_path,
             file_content,
             {'content-type': f'image/{file_ext[1:]}', 'upsert': 'true'}
         )
+        if cache:
+            cache.record_upload('bpo-assets', storage_path, sha)
         
         # Get public URL
-        public_url = supabase.storage.from_('bpo-assets').get_public_url(storage_path)
+        public_url = bucket.get_public_url(storage_path)
         
         return public_url
         
@@ -74,34 +68,6 @@ def upload_logo(file_path, company_name):
         print(f"  ❌ Upload error: {e}")
         return None
 
-def update_bpo_media(bpo_id, logo_url):
-    """Update bpo_media table with logo"""
-    try:
-        # Check if exists
-        existing = supabase.table('bpo_media').select('*').eq('bpo_id', bpo_id).eq('media_type', 'logo').execute()
-        
-        if existing.data:
-            # Update
-            supabase.table('bpo_media').update({
-                'file_url': logo_url,
-                'is_primary': True
-            }).eq('id', existing.data[0]['id']).execute()
-        else:
-            # Insert
-            supabase.table('bpo_media').insert({
-                'bpo_id': bpo_id,
-                'media_type': 'logo',
-                'file_url': logo_url,
-                'is_primary': True,
-                'display_order': 1
-            }).execute()
-        
-        return True
-        
-    except Exception as e:
-        print(f"  ❌ Database error: {e}")
-        return False
-
 def main():
     """Main execution"""
     print("=" * 80)
@@ -124,9 +90,27 @@ def main():
     print(f"\n📊 Found {len(mappings_to_process)} logos with company names assigned")
     print(f"    (Skipping {len(mappings) - len(mappings_to_process)} without names)\n")
     
-    # Process each mapping
+    # Load companies once for every lookup
+    try:
+        matcher = CompanyMatcher.load(supabase)
+    except Exception as e:
+        print(f"❌ Error loading companies: {e}")
+        return
+    
+    # Local content-addressed cache: unchanged logos are not re-uploaded
+    cache = LogoCache()
+    
+    # Trim and render WebP/AVIF derivatives for every logo across all CPU cores
+    print(f"🖼️  Rendering derivatives...")
+    derivatives = build_derivatives([
+        (LOGOS_DIR / m['logo_file'], storage_stem(m['company_name'].strip()))
+        for m in mappings_to_process if (LOGOS_DIR / m['logo_file']).exists()
+    ])
+    
+    # Process each mapping; media rows are written together at the end
     processed = 0
     skipped = 0
+    media_rows = []
     
     for idx, mapping in enumerate(mappings_to_process, 1):
         company_name = mapping['company_name'].strip()
@@ -136,7 +120,7 @@ def main():
         print(f"    File: {logo_file}")
         
         # Match to database
-        bpo_id, matched_name = match_company_to_db(company_name)
+        bpo_id, matched_name = match_company_to_db(matcher, company_name)
         
         if not bpo_id:
             print(f"    ⚠️  Company not found in database")
@@ -155,22 +139,39 @@ def main():
         
         # Upload to Supabase
         print(f"    📤 Uploading...")
-        public_url = upload_logo(file_path, company_name)
+        public_url = upload_logo(file_path, company_name, cache)
         
         if not public_url:
             skipped += 1
             continue
         
-        # Update database
-        if update_bpo_media(bpo_id, public_url):
-            print(f"    ✅ Success! {public_url}")
-            processed += 1
-        else:
-            skipped += 1
+        print(f"    ✅ Success! {public_url}")
+        media_rows.append(media_row(bpo_id, 'logo', public_url))
+        processed += 1
+        
+        # Upload the derivatives
+        try:
+            uploaded = upload_derivatives(supabase, company_name, derivatives.get(str(file_path), []), cache)
+            media_rows.extend(media_row(bpo_id, media_type, url) for media_type, url in uploaded)
+            print(f"    🖼️  {len(uploaded)} derivatives uploaded")
+        except Exception as e:
+            print(f"    ⚠️  Derivatives failed: {e}")
+    
+    # Record every logo and derivative in one upsert
+    try:
+        written = upsert_media(supabase, media_rows)
+        print(f"\n💾 Recorded {len(written)} media rows")
+    except Exception as e:
+        print(f"\n❌ Database error: {e}")
+        processed = 0
+        skipped = len(mappings_to_process)
+    
+    cache.save()
     
     print(f"\n{'='*80}")
     print(f"✅ Uploaded {processed} logos")
     print(f"⚠️  Skipped {skipped} logos")
+    print(f"🗄️  Cache: {cache.summary()}")
     print(f"{'='*80}")
 
 if __name__ == '__main__':